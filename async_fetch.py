@@ -0,0 +1,199 @@
+import asyncio
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPMessage
+from urllib.error import HTTPError, URLError
+
+import aiohttp
+
+from rate_limit import THROTTLE_STATUSES, bucket_for_request, pytubefix_client_names
+
+# En-têtes ajoutés par pytubefix.request._execute_request
+BASE_HEADERS = {"User-Agent": "Mozilla/5.0", "accept-language": "en-US,en"}
+
+_local = threading.local()
+
+
+class NeedsFetch(BaseException):
+    """Levée par le hook quand une requête n'a pas encore de réponse
+
+    Hérite de BaseException: les `except Exception` de pytubefix (clients de
+    repli, botGuard...) ne doivent pas l'intercepter.
+    """
+
+    def __init__(self, key, url, method, headers, data, body):
+        super().__init__(f"{method} {url}")
+        self.key = key
+        self.url = url
+        self.method = method
+        self.headers = headers
+        self.data = data
+        self.body = body
+
+
+class PrefetchedResponse:
+    """Réponse servie à pytubefix à la place de celle d'urlopen"""
+
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self._body = io.BytesIO(body)
+
+    def read(self, size=-1):
+        return self._body.read(size)
+
+    def getcode(self):
+        return self.status
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return self.headers
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PrefetchedResponses:
+    """Réponses (ou erreurs) déjà obtenues pour une opération pytubefix"""
+
+    def __init__(self):
+        self._entries = {}
+
+    def call(self, func):
+        """Exécute `func()` dans le thread courant; retourne (NeedsFetch ou None, résultat)"""
+        _local.responses = self
+        try:
+            return None, func()
+        except NeedsFetch as need:
+            return need, None
+        finally:
+            _local.responses = None
+
+    def store(self, key, entry):
+        self._entries[key] = entry
+
+    def respond(self, url, method, headers, data):
+        if data and not isinstance(data, bytes):
+            body = bytes(json.dumps(data), encoding='utf-8')
+        else:
+            body = data or None
+        method = method or ('POST' if body is not None else 'GET')
+        key = (method, url, body)
+        if key not in self._entries:
+            raise NeedsFetch(key, url, method, headers, data, body)
+        entry = self._entries[key]
+        if isinstance(entry, Exception):
+            raise entry
+        status, response_headers, content = entry
+        return PrefetchedResponse(url, status, response_headers, content)
+
+
+def install_prefetch_hook():
+    """Sert les requêtes pytubefix depuis PrefetchedResponses quand le thread en a un
+
+    Installé par-dessus le hook de limite de débit: en mode asyncio, la
+    limite s'applique au moment de la vraie requête (aiohttp), sans bloquer.
+    """
+    from pytubefix import request
+
+    current = request._execute_request
+    if getattr(current, 'prefetch_hook', False):
+        return
+
+    def prefetching_execute_request(url, method=None, headers=None, data=None, *args, **kwargs):
+        responses = getattr(_local, 'responses', None)
+        if responses is None:
+            return current(url, method, headers, data, *args, **kwargs)
+        return responses.respond(url, method, headers, data)
+
+    prefetching_execute_request.prefetch_hook = True
+    prefetching_execute_request.__wrapped__ = getattr(current, '__wrapped__', current)
+    request._execute_request = prefetching_execute_request
+
+
+class YouTubePrefetcher:
+    """Exécute du code pytubefix synchrone dont les requêtes HTTP passent par aiohttp
+
+    Le code est relancé jusqu'à ce qu'il aboutisse: chaque requête sans
+    réponse interrompt l'exécution (NeedsFetch), la réponse est obtenue
+    de façon asynchrone puis l'exécution reprend. Les objets pytubefix
+    conservant ce qu'ils ont déjà obtenu, seule l'étape interrompue est
+    rejouée. Le code synchrone (analyse JSON, déchiffrement de signature)
+    tourne dans un petit pool de threads pour ne pas bloquer la boucle.
+    """
+
+    def __init__(self, governor=None, parse_workers=4, connections=200, timeout=30,
+                 max_fetches=32, url_rewriter=None):
+        self.governor = governor
+        self.connections = connections
+        self.timeout = timeout
+        self.max_fetches = max_fetches
+        # Redirection des URL YouTube (faux serveurs des tests et benchmarks)
+        self.url_rewriter = url_rewriter
+        self.client_names = pytubefix_client_names()
+        self.fetches = 0
+        self._executor = ThreadPoolExecutor(max_workers=parse_workers, thread_name_prefix='pytubefix-parse')
+        self._session = None
+        install_prefetch_hook()
+
+    async def start(self):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.connections),
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+        self._executor.shutdown(wait=False)
+
+    async def run(self, func):
+        """Résultat de `func()`, toutes ses requêtes HTTP étant faites par aiohttp"""
+        loop = asyncio.get_running_loop()
+        responses = PrefetchedResponses()
+        for _ in range(self.max_fetches):
+            need, result = await loop.run_in_executor(self._executor, responses.call, func)
+            if need is None:
+                return result
+            responses.store(need.key, await self._fetch(need))
+        raise RuntimeError(f"Plus de {self.max_fetches} requêtes HTTP pour une seule opération")
+
+    async def _fetch(self, need):
+        """Réponse (status, en-têtes, corps) ou exception à relever côté pytubefix"""
+        self.fetches += 1
+        bucket = None
+        if self.governor:
+            bucket = await self.governor.acquire_async(
+                bucket_for_request(need.url, need.headers, need.data, self.client_names)
+            )
+        url = self.url_rewriter(need.url) if self.url_rewriter else need.url
+        headers = dict(BASE_HEADERS, **(need.headers or {}))
+        try:
+            async with self._session.request(need.method, url, headers=headers, data=need.body) as response:
+                content = await response.read()
+                status, reason = response.status, response.reason
+                response_headers = HTTPMessage()
+                for name, value in response.headers.items():
+                    response_headers[name] = value
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Même type d'erreur qu'urlopen, pour les relances et la classification
+            return URLError(e)
+
+        if status >= 400:
+            if bucket and status in THROTTLE_STATUSES:
+                bucket.on_throttled()
+            return HTTPError(need.url, status, reason, response_headers, io.BytesIO(content))
+        if bucket:
+            bucket.on_success()
+        return status, response_headers, content
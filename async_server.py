@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Mode de service asyncio pour les endpoints de métadonnées
+/video_info, /available_resolutions/<video_id> et /health, même contrat JSON
+que l'API Flask. Les requêtes YouTube sont faites par aiohttp: une requête en
+attente de YouTube n'occupe aucun thread, un seul processus peut donc tenir
+des milliers de récupérations d'infos simultanées.
+
+Usage: python async_server.py (port ASYNC_SERVER_PORT, 5001 par défaut)
+Les autres endpoints (téléchargements, jobs, Drive) restent servis par main.py.
+"""
+
+import asyncio
+import time
+
+from aiohttp import web
+
+import main
+import metrics
+import startup
+from async_fetch import YouTubePrefetcher
+from config import Config
+from rate_limit import RateLimitTimeout
+from retry import RetryState, call_with_retry_async
+from singleflight import AsyncSingleFlight
+
+video_info_flights = AsyncSingleFlight('video_info')
+
+
+async def create_youtube_async(prefetcher, url):
+    """Équivalent asyncio de main.create_youtube_with_headers (mêmes clients, même circuit breaker)"""
+    last_error = None
+    for client in main.client_selector.ordering():
+        started = time.monotonic()
+        try:
+            # Objet créé hors de prefetcher.run: chaque relance réutilise ce qu'il a déjà obtenu
+            yt = main.build_youtube(url, client)
+            with metrics.phase_timer(metrics.PHASE_YOUTUBE_INIT):
+                # Forcer la requête player pour juger réellement le client
+                await prefetcher.run(lambda: yt.streams)
+        except main.content_errors():
+            main.client_selector.release(client)
+            metrics.YOUTUBE_CLIENT_ATTEMPTS.labels(client, 'content_error').inc()
+            raise
+        except RateLimitTimeout:
+            # Attente refusée par notre propre limiteur: rien à reprocher au client YouTube
+            main.client_selector.release(client)
+            metrics.YOUTUBE_CLIENT_ATTEMPTS.labels(client, 'rate_limited').inc()
+            raise
+        except asyncio.CancelledError:
+            # Requête annulée pendant la sonde: ne pas laisser le client bloqué en semi-ouvert
+            main.client_selector.release(client)
+            raise
+        except Exception as e:
+            main.client_selector.record(client, False, time.monotonic() - started)
+            metrics.YOUTUBE_CLIENT_ATTEMPTS.labels(client, 'failure').inc()
+            last_error = e
+            print(f"Echec YouTube(client={client}): {e}")
+            continue
+        main.client_selector.record(client, True, time.monotonic() - started)
+        metrics.YOUTUBE_CLIENT_ATTEMPTS.labels(client, 'success').inc()
+        return yt
+
+    raise last_error if last_error else RuntimeError("Impossible de créer l'objet YouTube")
+
+
+async def get_video_info(prefetcher, url, max_retries=None):
+    """Équivalent asyncio de main.get_video_info, retourne (video_info, erreur)"""
+    video_id = main.canonical_video_id(url)
+
+    cached_info = main.video_info_cache.get(video_id)
+    if cached_info is not None:
+        metrics.OPERATIONS.labels('video_info', 'cached').inc()
+        return cached_info, None
+
+    with metrics.IN_PROGRESS.labels('video_info').track_inprogress():
+        result, shared = await video_info_flights.do(
+            video_id, lambda: _fetch_video_info(prefetcher, url, video_id, max_retries)
+        )
+    metrics.OPERATIONS.labels('video_info', 'coalesced' if shared else ('success' if result[0] else 'failure')).inc()
+    return result
+
+
+async def _fetch_video_info(prefetcher, url, video_id, max_retries=None):
+    state = RetryState()
+
+    async def fetch():
+        print(f"Récupération des infos: {url}")
+        try:
+            yt = main.youtube_cache.get(video_id)
+            if yt is None:
+                yt = await create_youtube_async(prefetcher, url)
+            with metrics.phase_timer(metrics.PHASE_VIDEO_INFO):
+                # La date de publication peut encore nécessiter la page watch
+                video_info = await prefetcher.run(lambda: main.build_video_info(yt))
+        except Exception:
+            main.youtube_cache.invalidate(video_id)
+            raise
+        main.youtube_cache.set(video_id, yt)
+        main.video_info_cache.set(video_id, video_info)
+        return video_info
+
+    try:
+        policy = main.retry_policy(max_retries)
+        return await call_with_retry_async('metadata', fetch, policy, state, on_retry=main.retry_logger('video_info')), None
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Récupération des infos abandonnée après {state.total()} tentatives: {error_msg}")
+        main.log_error_advice(error_msg)
+        metrics.ERRORS.labels('video_info', metrics.classify_error(error_msg)).inc()
+        return None, f"Failed after {state.total()} attempts. Last error: {error_msg}"
+
+
+async def video_info(request):
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        if not data:
+            return web.json_response({"error": "Request body must be valid JSON"}, status=400)
+
+        url = data.get('url')
+
+        if not url:
+            return web.json_response({"error": "Missing 'url' parameter in the request body."}, status=400)
+
+        if not main.is_valid_youtube_url(url):
+            return web.json_response({"error": "Invalid YouTube URL."}, status=400)
+
+        info, error_message = await get_video_info(request.app['prefetcher'], url)
+
+        if info:
+            return web.json_response(info, status=200)
+        else:
+            return web.json_response({"error": error_message}, status=500)
+
+    except Exception as e:
+        print(f"Unexpected error in video_info endpoint: {str(e)}")
+        return web.json_response({"error": f"Internal server error: {str(e)}"}, status=500)
+
+
+async def available_resolutions(request):
+    video_id = request.match_info['video_id']
+    try:
+        url = f"https://www.youtube.com/watch?v={video_id}"
+        info, error_message = await get_video_info(request.app['prefetcher'], url)
+
+        if info:
+            return web.json_response({
+                "video_id": video_id,
+                "title": info["title"],
+                "available_resolutions": info["available_resolutions"]
+            }, status=200)
+        else:
+            return web.json_response({"error": error_message}, status=500)
+
+    except Exception as e:
+        print(f"Unexpected error in available_resolutions endpoint: {str(e)}")
+        return web.json_response({"error": f"Internal server error: {str(e)}"}, status=500)
+
+
+async def health(request):
+    payload = main.health_payload()
+    payload["config"]["serving_mode"] = "asyncio"
+    payload["config"]["coalescing"]["video_info"] = video_info_flights.stats()
+    payload["config"]["async_fetches"] = request.app['prefetcher'].fetches
+    return web.json_response(payload, status=200)
+
+
+def create_app(prefetcher=None):
+    """Application aiohttp; `prefetcher` permet d'injecter un YouTubePrefetcher configuré (tests, benchmarks)"""
+    app = web.Application()
+    # Hook de limite de débit installé avant celui du préchargement (qui l'englobe)
+    main.load_pytubefix()
+    app['prefetcher'] = prefetcher or YouTubePrefetcher(
+        governor=main.rate_governor,
+        parse_workers=Config.ASYNC_PARSE_WORKERS,
+        connections=Config.ASYNC_HTTP_CONNECTIONS
+    )
+
+    async def start_prefetcher(app):
+        await app['prefetcher'].start()
+        startup.report.ready("Serveur asyncio", Config.IMPORT_TIME_BUDGET_MS)
+
+    async def close_prefetcher(app):
+        await app['prefetcher'].close()
+
+    app.on_startup.append(start_prefetcher)
+    app.on_cleanup.append(close_prefetcher)
+    app.router.add_post('/video_info', video_info)
+    app.router.add_get('/available_resolutions/{video_id}', available_resolutions)
+    app.router.add_get('/health', health)
+    return app
+
+
+if __name__ == '__main__':
+    print(f"Starting YouTube Download API (asyncio, métadonnées) on port {Config.ASYNC_SERVER_PORT}...")
+    web.run_app(create_app(), host='0.0.0.0', port=Config.ASYNC_SERVER_PORT, print=None)
@@ -0,0 +1,29 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+def run_bounded(items, func, concurrency):
+    """Exécute `func(item)` pour chaque élément, au plus `concurrency` à la fois
+
+    Générateur qui produit (index, item, outcome, seconds) dans l'ordre de fin
+    d'exécution, `outcome` étant la valeur retournée ou l'exception levée.
+    Fermer le générateur (client déconnecté) annule les éléments pas encore
+    démarrés.
+    """
+    def timed(item):
+        started = time.perf_counter()
+        try:
+            outcome = func(item)
+        except Exception as e:
+            outcome = e
+        return outcome, time.perf_counter() - started
+
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='batch')
+    try:
+        futures = {executor.submit(timed, item): (index, item) for index, item in enumerate(items)}
+        for future in as_completed(futures):
+            index, item = futures[future]
+            outcome, seconds = future.result()
+            yield index, item, outcome, seconds
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
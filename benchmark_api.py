@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Benchmark hors ligne de l'API: main.py servi face à de faux serveurs locaux
+(innertube, googlevideo, Google Drive) dont la latence, le débit et les
+erreurs (403, 429, 503...) sont configurables. La charge est envoyée à
+concurrence réglable, endpoint par endpoint; le résultat JSON donne le
+débit, les latences p50/p95/p99 et la mémoire (RSS) maximale de l'API,
+pour comparer deux versions ou deux configurations.
+
+    python benchmark_api.py --endpoints available_resolutions download --concurrency 10 50 \\
+        --innertube-errors 429=0.05 --googlevideo-errors 403=0.02 --output resultats.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import aiohttp
+
+from benchmark_async_info import process_stats
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MB = 1024 * 1024
+
+ENDPOINTS = ('video_info', 'available_resolutions', 'download', 'stream', 'health')
+
+
+def endpoint_request(endpoint, video_id, resolution):
+    """(méthode, chemin, corps JSON) d'une requête vers `endpoint`"""
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    if endpoint == 'video_info':
+        return 'POST', '/video_info', {'url': url}
+    if endpoint == 'available_resolutions':
+        return 'GET', f"/available_resolutions/{video_id}", None
+    if endpoint == 'download':
+        return 'POST', f"/download/{resolution}", {'url': url}
+    if endpoint == 'stream':
+        return 'GET', f"/stream/{video_id}/{resolution}", None
+    return 'GET', '/health', None
+
+
+def parse_error_rates(values):
+    """['429=0.05', '403=0.01'] -> {429: 0.05, 403: 0.01}"""
+    rates = {}
+    for value in values or []:
+        status, _, rate = value.partition('=')
+        rates[int(status)] = float(rate)
+    return rates
+
+
+def ports(args):
+    return {
+        'innertube': args.base_port,
+        'googlevideo': args.base_port + 1,
+        'drive': args.base_port + 2,
+        'api': args.base_port + 3,
+    }
+
+
+def serve_fakes(args):
+    """Sous-processus des faux serveurs; leurs compteurs sont écrits dans --stats-file à l'arrêt"""
+    from fake_drive import FakeDriveServer
+    from fake_youtube import FakeGoogleVideoServer, FakeInnerTubeServer
+
+    port = ports(args)
+    googlevideo = FakeGoogleVideoServer(
+        int(args.media_mb * MB), bytes_per_second_per_connection=args.bandwidth_mbps * MB,
+        latency=args.googlevideo_latency, port=port['googlevideo']
+    )
+    googlevideo.set_error_rates(parse_error_rates(args.googlevideo_errors))
+    innertube = FakeInnerTubeServer(
+        latency=args.innertube_latency, media_url=googlevideo.url,
+        media_size=int(args.media_mb * MB), port=port['innertube']
+    )
+    innertube.set_error_rates(parse_error_rates(args.innertube_errors))
+    drive = FakeDriveServer(latency=args.drive_latency, port=port['drive'])
+    drive.state.error_rates = parse_error_rates(args.drive_errors)
+    servers = {'innertube': innertube, 'googlevideo': googlevideo, 'drive': drive}
+    for server in servers.values():
+        server.start()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    while not stop.wait(0.5):
+        pass
+    with open(args.stats_file, 'w') as f:
+        json.dump({name: server.stats() for name, server in servers.items()}, f)
+
+
+def serve_api(args):
+    """Sous-processus de l'API Flask, redirigée vers les faux serveurs"""
+    from fake_youtube import install_youtube_redirect
+
+    port = ports(args)
+    install_youtube_redirect(f"http://127.0.0.1:{port['innertube']}")
+
+    import main
+    from config import Config
+    if Config.GOOGLE_DRIVE_ENABLED:
+        from fake_drive import build_drive_service
+        main.get_drive_manager().service = build_drive_service(f"http://127.0.0.1:{port['drive']}/")
+    main.job_manager.start()
+    main.preload_pytubefix()
+    try:
+        main.app.run(host='127.0.0.1', port=port['api'], threaded=True, debug=False, use_reloader=False)
+    finally:
+        main.job_manager.stop()
+
+
+def spawn(mode, port, env, extra_args=(), timeout=60):
+    """Relance ce script (mêmes options) avec --serve `mode` et attend qu'il écoute"""
+    # Sorties ignorées: un tube jamais lu bloquerait les print() du serveur
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), *sys.argv[1:], *extra_args, '--serve', mode],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Le serveur {mode} s'est arrêté au démarrage (code {process.returncode})")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Serveur {mode} injoignable sur le port {port}")
+
+
+def percentile(values, p):
+    """Percentile par rang le plus proche, sur une liste triée"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))]
+
+
+async def load(base_url, pid, endpoint, concurrency, requests, phase, args):
+    """`requests` appels à `endpoint`, `concurrency` à la fois"""
+    latencies = []
+    status_codes = {}
+    received = 0
+    peak = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def one(i):
+            nonlocal received
+            index = i % args.videos if args.videos else i
+            method, path, body = endpoint_request(endpoint, f"p{phase:02d}{index:08d}", args.resolution)
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    async with session.request(method, base_url + path, json=body) as response:
+                        data = await response.read()
+                        status = str(response.status)
+                    received += len(data)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                status_codes[status] = status_codes.get(status, 0) + 1
+
+        async def sample():
+            while True:
+                for key, value in process_stats(pid).items():
+                    peak[key] = max(peak.get(key, 0), value)
+                await asyncio.sleep(0.1)
+
+        sampler = asyncio.create_task(sample())
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        sampler.cancel()
+
+    latencies.sort()
+    ok = sum(count for status, count in status_codes.items() if status.startswith('2'))
+    return {
+        'endpoint': endpoint,
+        'concurrency': concurrency,
+        'requests': requests,
+        'ok': ok,
+        'errors': requests - ok,
+        'status_codes': status_codes,
+        'seconds': round(elapsed, 2),
+        'requests_per_second': round(requests / elapsed, 1),
+        'received_mb': round(received / MB, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'max_ms': round(latencies[-1] * 1000, 1),
+        'peak_threads': peak.get('threads'),
+        'peak_rss_mb': peak.get('rss_mb'),
+    }
+
+
+async def api_health(base_url):
+    """Compteurs internes de l'API en fin de benchmark (relances, clients, caches)"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(base_url + '/health') as response:
+            config = (await response.json())['config']
+    return {
+        'retry_budget': config['retry_budget'],
+        'youtube_clients': config['youtube_clients'],
+        'metadata_cache': config['metadata_cache'],
+        'drive_uploads': config['google_drive']['uploads'],
+        'startup': config['startup'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoints', nargs='+', default=['available_resolutions', 'video_info', 'download'],
+                        choices=ENDPOINTS, help='Endpoints mesurés, un à la suite de l\'autre')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50], help='Niveaux de concurrence testés')
+    parser.add_argument('--requests', type=int, default=100, help='Requêtes par endpoint et par niveau de concurrence')
+    parser.add_argument('--videos', type=int, default=0,
+                        help='Vidéos distinctes par phase (0 = une par requête, sans cache ni mutualisation)')
+    parser.add_argument('--resolution', default='360p', help='Résolution demandée (download, stream)')
+    parser.add_argument('--drive', action='store_true', help='Uploads vers le faux Google Drive (sinon dossier local)')
+    parser.add_argument('--rate-limit', action='store_true', help='Garder la limite de débit vers YouTube')
+    parser.add_argument('--innertube-latency', type=float, default=0.05, help='Latence du faux innertube (secondes)')
+    parser.add_argument('--googlevideo-latency', type=float, default=0.02, help='Latence du faux googlevideo (secondes)')
+    parser.add_argument('--drive-latency', type=float, default=0.01, help='Latence du faux Drive (secondes)')
+    parser.add_argument('--bandwidth-mbps', type=float, default=8, help='Débit googlevideo par connexion (Mo/s, 0 = illimité)')
+    parser.add_argument('--media-mb', type=float, default=2, help='Taille des vidéos simulées (Mo)')
+    parser.add_argument('--innertube-errors', nargs='*', metavar='CODE=TAUX', help='Erreurs des requêtes player, ex. 429=0.05')
+    parser.add_argument('--googlevideo-errors', nargs='*', metavar='CODE=TAUX', help='Erreurs des requêtes média, ex. 403=0.02')
+    parser.add_argument('--drive-errors', nargs='*', metavar='CODE=TAUX', help='Erreurs des chunks Drive, ex. 503=0.05')
+    parser.add_argument('--timeout', type=float, default=600, help='Délai maximal par requête (secondes)')
+    parser.add_argument('--base-port', type=int, default=18710, help='Premier des 4 ports locaux utilisés')
+    parser.add_argument('--output', help='Écrit aussi le JSON dans ce fichier')
+    parser.add_argument('--serve', choices=['fakes', 'api'], help=argparse.SUPPRESS)
+    parser.add_argument('--stats-file', default='', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve == 'fakes':
+        serve_fakes(args)
+        return
+    if args.serve == 'api':
+        serve_api(args)
+        return
+
+    port = ports(args)
+    base_url = f"http://127.0.0.1:{port['api']}"
+    with tempfile.TemporaryDirectory(prefix='benchmark_api_') as folder:
+        stats_file = os.path.join(folder, 'fakes.json')
+        env = dict(
+            os.environ,
+            # Client sans base.js ni PO token, servi entièrement par le faux innertube
+            YOUTUBE_CLIENTS='IOS',
+            RATE_LIMIT_ENABLED=str(args.rate_limit),
+            GOOGLE_DRIVE_ENABLED=str(args.drive),
+            GOOGLE_DRIVE_FOLDER_ID='benchmark-folder',
+            GOOGLE_DRIVE_TOKEN_FILE=os.path.join(folder, 'token.json'),
+            FLASK_DEBUG='False',
+            METADATA_CACHE_DIR='',
+            SHARED_STATE_DB='',
+            JOB_DB=os.path.join(folder, 'jobs.db'),
+            DOWNLOAD_INDEX_DB=os.path.join(folder, 'download_index.db'),
+            DOWNLOAD_FOLDER=os.path.join(folder, 'downloads'),
+        )
+        fakes = spawn('fakes', port['innertube'], env, extra_args=('--stats-file', stats_file))
+        api = None
+        results = {
+            'config': {
+                key: value for key, value in vars(args).items()
+                if key not in ('serve', 'stats_file', 'output', 'base_port')
+            },
+            'phases': [],
+        }
+        try:
+            api = spawn('api', port['api'], env)
+            phase = 0
+            for endpoint in args.endpoints:
+                for concurrency in args.concurrency:
+                    results['phases'].append(asyncio.run(
+                        load(base_url, api.pid, endpoint, concurrency, args.requests, phase, args)
+                    ))
+                    phase += 1
+            results['api_process'] = {
+                'peak_rss_mb': max((p['peak_rss_mb'] or 0) for p in results['phases']) if results['phases'] else None,
+                'peak_threads': max((p['peak_threads'] or 0) for p in results['phases']) if results['phases'] else None,
+            }
+            results['api_health'] = asyncio.run(api_health(base_url))
+        finally:
+            for process in (api, fakes):
+                if process:
+                    process.terminate()
+                    process.wait()
+        if os.path.exists(stats_file):
+            with open(stats_file) as f:
+                results['fakes'] = json.load(f)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Benchmark des endpoints de métadonnées: API Flask (un thread par requête)
+contre le mode asyncio (async_server.py), face à un faux innertube local
+dont la latence simule celle de YouTube. Chaque serveur tourne dans son
+propre processus; chaque requête vise un identifiant vidéo différent
+(pas de cache ni de coalescing).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+from fake_youtube import FakeInnerTubeServer, install_youtube_redirect, youtube_url_rewriter
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def serve(mode, port, fake_url, latency):
+    """Point d'entrée des sous-processus (--serve)"""
+    if mode == 'fake':
+        server = FakeInnerTubeServer(latency=latency, port=port)
+        server.httpd.serve_forever()
+        return
+
+    install_youtube_redirect(fake_url)
+
+    import main
+    if mode == 'flask':
+        main.app.run(host='127.0.0.1', port=port, threaded=True, debug=False, use_reloader=False)
+    else:
+        from aiohttp import web
+        import async_server
+        from async_fetch import YouTubePrefetcher
+        from config import Config
+        main.load_pytubefix()
+        prefetcher = YouTubePrefetcher(
+            governor=main.rate_governor,
+            parse_workers=Config.ASYNC_PARSE_WORKERS,
+            connections=Config.ASYNC_HTTP_CONNECTIONS,
+            url_rewriter=youtube_url_rewriter(fake_url)
+        )
+        web.run_app(async_server.create_app(prefetcher), host='127.0.0.1', port=port, print=None)
+
+
+def spawn(mode, port, fake_url, latency, env, timeout=30):
+    """Lance un serveur dans un sous-processus et attend qu'il écoute"""
+    # Sorties ignorées: un tube jamais lu bloquerait les print() du serveur
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve', mode, '--port', str(port),
+         '--fake-url', fake_url, '--latency', str(latency)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Serveur {mode} injoignable sur le port {port}")
+
+
+def process_stats(pid):
+    """Threads et RSS (Mo) du processus serveur, lus dans /proc"""
+    stats = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('Threads:'):
+                    stats['threads'] = int(line.split()[1])
+                elif line.startswith('VmRSS:'):
+                    stats['rss_mb'] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return stats
+
+
+async def load(base_url, pid, concurrency, requests, offset):
+    """`requests` appels /available_resolutions, `concurrency` à la fois"""
+    latencies = []
+    errors = 0
+    peak = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=300)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    async with session.get(f"{base_url}/available_resolutions/b{offset + i:010d}") as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                except aiohttp.ClientError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        async def sample():
+            while True:
+                for key, value in process_stats(pid).items():
+                    peak[key] = max(peak.get(key, 0), value)
+                await asyncio.sleep(0.1)
+
+        sampler = asyncio.create_task(sample())
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        sampler.cancel()
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': errors,
+        'seconds': round(elapsed, 2),
+        'requests_per_second': round(requests / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        'peak_threads': peak.get('threads'),
+        'peak_rss_mb': peak.get('rss_mb'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 200], help='Niveaux de concurrence testés')
+    parser.add_argument('--requests', type=int, default=400, help='Requêtes par niveau de concurrence')
+    parser.add_argument('--latency', type=float, default=0.2, help='Latence par requête du faux innertube (secondes)')
+    parser.add_argument('--modes', nargs='+', default=['flask', 'asyncio'], choices=['flask', 'asyncio'])
+    parser.add_argument('--serve', choices=['flask', 'asyncio', 'fake'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--fake-url', default='', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.fake_url, args.latency)
+        return
+
+    folder = tempfile.mkdtemp(prefix='benchmark_async_info_')
+    env = dict(
+        os.environ,
+        # Clients sans base.js ni PO token, servis entièrement par le faux innertube
+        YOUTUBE_CLIENTS='IOS',
+        RATE_LIMIT_ENABLED='False',
+        GOOGLE_DRIVE_ENABLED='False',
+        FLASK_DEBUG='False',
+        METADATA_CACHE_DIR='',
+        JOB_DB=os.path.join(folder, 'jobs.db'),
+        DOWNLOAD_INDEX_DB=os.path.join(folder, 'download_index.db'),
+        DOWNLOAD_FOLDER=os.path.join(folder, 'downloads'),
+    )
+    fake_port, flask_port, async_port = 18700, 18701, 18702
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    ports = {'flask': flask_port, 'asyncio': async_port}
+
+    processes = [spawn('fake', fake_port, fake_url, args.latency, env)]
+    results = {'fake_latency_seconds': args.latency, 'modes': {}}
+    try:
+        for mode in args.modes:
+            server = spawn(mode, ports[mode], fake_url, args.latency, env)
+            processes.append(server)
+            results['modes'][mode] = [
+                asyncio.run(load(f"http://127.0.0.1:{ports[mode]}", server.pid, concurrency,
+                                 args.requests, offset=index * args.requests))
+                for index, concurrency in enumerate(args.concurrency)
+            ]
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
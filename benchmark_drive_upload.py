@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark mémoire/débit de l'upload Google Drive
+Compare l'ancien chemin (fichier temporaire + lecture complète + BytesIO)
+au pipeline en flux (ChunkPipe + upload résumable), contre un faux serveur Drive local
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from fake_drive import FakeDriveServer
+from google_drive import GoogleDriveManager
+
+MB = 1024 * 1024
+
+
+def simulated_download(size, chunk_size, bandwidth_mbps):
+    """Générateur imitant stream.iter_chunks() avec une bande passante limitée"""
+    sent = 0
+    started = time.perf_counter()
+    while sent < size:
+        length = min(chunk_size, size - sent)
+        chunk = b'\0' * length
+        sent += length
+        if bandwidth_mbps:
+            expected = sent / (bandwidth_mbps * MB)
+            delay = expected - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+        yield chunk
+
+
+def legacy_upload(manager, size, chunk_size, bandwidth_mbps):
+    """Ancien chemin de download_video: disque, puis lecture complète, puis upload_video"""
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'video.mp4')
+        with open(path, 'wb') as f:
+            for chunk in simulated_download(size, chunk_size, bandwidth_mbps):
+                f.write(chunk)
+        with open(path, 'rb') as f:
+            video_data = f.read()
+        return manager.upload_video(video_data, 'legacy.mp4')
+
+
+def streaming_upload(manager, size, chunk_size, bandwidth_mbps):
+    """Nouveau chemin: les chunks alimentent directement l'upload résumable"""
+    chunks = simulated_download(size, chunk_size, bandwidth_mbps)
+    return manager.upload_stream(chunks, 'streaming.mp4', size=size)
+
+
+def measure(name, func, manager, size, chunk_size, bandwidth_mbps):
+    tracemalloc.start()
+    started = time.perf_counter()
+    success, result = func(manager, size, chunk_size, bandwidth_mbps)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if not success:
+        raise RuntimeError(f"{name}: {result}")
+    return {
+        'mode': name,
+        'size_mb': round(size / MB, 1),
+        'seconds': round(elapsed, 3),
+        'throughput_mbps': round(size / MB / elapsed, 1),
+        'peak_memory_mb': round(peak / MB, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=128, help='Taille de la vidéo simulée')
+    parser.add_argument('--chunk-mb', type=int, default=9, help='Taille des chunks du flux YouTube')
+    parser.add_argument('--bandwidth-mbps', type=float, default=0, help='Débit simulé du téléchargement (0 = illimité)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latence par requête du faux Drive (secondes)')
+    args = parser.parse_args()
+
+    size = args.size_mb * MB
+    chunk_size = args.chunk_mb * MB
+    results = []
+    with FakeDriveServer(latency=args.latency) as server:
+        manager = GoogleDriveManager()
+        manager.service = server.build_service()
+        for name, func in (('legacy', legacy_upload), ('streaming', streaming_upload)):
+            results.append(measure(name, func, manager, size, chunk_size, args.bandwidth_mbps))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
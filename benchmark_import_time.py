@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark du démarrage à froid: temps d'import de main.py (python -X importtime),
+mesuré dans des processus neufs, Google Drive désactivé. Échoue (code 1) si
+la médiane dépasse le budget (IMPORT_TIME_BUDGET_MS) ou si une dépendance
+lourde censée être différée est importée au démarrage.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from config import Config
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Dépendances chargées au premier usage seulement (ou par le préchargement)
+DEFERRED_MODULES = (
+    'pytubefix',
+    'aiohttp',
+    'requests',
+    'google_drive',
+    'googleapiclient',
+    'google_auth_oauthlib',
+    'google.auth',
+    'httplib2',
+    # Variantes asyncio (retry, rate_limit, singleflight): serveur asyncio uniquement
+    'asyncio',
+)
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter() - started
+eager = [name for name in {deferred!r} if name in sys.modules]
+started = time.perf_counter()
+if {load_pytubefix!r}:
+    main.load_pytubefix()
+print(json.dumps({{'import_ms': imported * 1000, 'pytubefix_ms': (time.perf_counter() - started) * 1000, 'eager': eager}}))
+"""
+
+
+def parse_importtime(stderr, root='main'):
+    """Modules importés directement par `root` -> durée cumulée en ms (sortie de -X importtime)
+
+    Les lignes d'un import sont écrites après celles de ses dépendances,
+    indentées de deux espaces par niveau.
+    """
+    children = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children[name.strip()] = int(cumulative) / 1000
+        elif depth == 0:
+            if name.strip() == root:
+                return children
+            children = {}
+    return {}
+
+
+def measure(env, load_pytubefix):
+    """Un processus neuf: temps d'import de main et arbre -X importtime"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         PROBE.format(deferred=DEFERRED_MODULES, load_pytubefix=load_pytubefix)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['modules'] = parse_importtime(completed.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5, help='Nombre de processus mesurés')
+    parser.add_argument('--budget-ms', type=float, default=Config.IMPORT_TIME_BUDGET_MS,
+                        help="Budget de la médiane du temps d'import de main.py")
+    parser.add_argument('--top', type=int, default=10, help='Modules les plus coûteux affichés')
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='benchmark_import_time_')
+    env = dict(
+        os.environ,
+        GOOGLE_DRIVE_ENABLED='False',
+        SHARED_STATE_DB='',
+        METADATA_CACHE_DIR='',
+        JOB_DB=os.path.join(folder, 'jobs.db'),
+        DOWNLOAD_INDEX_DB=os.path.join(folder, 'download_index.db'),
+        DOWNLOAD_FOLDER=os.path.join(folder, 'downloads'),
+    )
+
+    # Premier processus écarté: caches disque et .pyc encore froids
+    measure(env, load_pytubefix=False)
+    runs = [measure(env, load_pytubefix=index == 0) for index in range(args.runs)]
+
+    import_ms = [run['import_ms'] for run in runs]
+    median_ms = statistics.median(import_ms)
+    modules = {}
+    for run in runs:
+        for name, ms in run['modules'].items():
+            modules.setdefault(name, []).append(ms)
+    heaviest = sorted(((statistics.median(values), name) for name, values in modules.items()), reverse=True)
+    eager = sorted({name for run in runs for name in run['eager']})
+
+    results = {
+        'runs': args.runs,
+        'import_main_ms': {
+            'median': round(median_ms, 1),
+            'min': round(min(import_ms), 1),
+            'max': round(max(import_ms), 1),
+        },
+        'budget_ms': args.budget_ms,
+        'within_budget': median_ms <= args.budget_ms,
+        'deferred_pytubefix_ms': round(runs[0]['pytubefix_ms'], 1),
+        'eager_deferred_modules': eager,
+        'heaviest_modules_ms': {name: round(ms, 1) for ms, name in heaviest[:args.top]},
+    }
+    print(json.dumps(results, indent=2))
+
+    if eager:
+        print(f"Dépendances importées au démarrage alors qu'elles devraient être différées: {', '.join(eager)}",
+              file=sys.stderr)
+    if not results['within_budget']:
+        print(f"Temps d'import de main.py au-delà du budget: {median_ms:.0f} ms > {args.budget_ms:.0f} ms",
+              file=sys.stderr)
+    sys.exit(0 if results['within_budget'] and not eager else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark d'écriture du store de jobs (job_store.py) sur une base SQLite temporaire
+Chaque job simulé écrit ses transitions d'état (en file, en cours, terminé)
+comme le JobManager, depuis plusieurs threads et plusieurs connexions
+(un JobStore par worker) à la même base
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from job_store import JobStore
+from jobs import JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED
+
+
+def run_worker(store, owner, jobs, latencies):
+    """Écrit les trois transitions de `jobs` jobs, note la durée de chaque écriture"""
+    for _ in range(jobs):
+        record = {
+            'id': uuid.uuid4().hex,
+            'kind': 'download',
+            'params': {'url': 'https://youtu.be/dQw4w9WgXcQ', 'resolution': '720p'},
+            'created_at': time.time(),
+            'owner': owner,
+        }
+        for state in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED):
+            record = dict(record, state=state, progress={'phase': state})
+            if state == JOB_SUCCEEDED:
+                record.update(result={'filename': 'video.mp4'}, finished_at=time.time())
+            started = time.perf_counter()
+            store.save(record)
+            latencies.append(time.perf_counter() - started)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def measure(folder, workers, threads, jobs):
+    path = os.path.join(folder, f"jobs-{workers}x{threads}.db")
+    stores = [JobStore(path) for _ in range(workers)]
+    latencies = []
+    pool = [
+        threading.Thread(target=run_worker, args=(stores[i % workers], f"worker-{i % workers}", jobs, latencies))
+        for i in range(workers * threads)
+    ]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    writes = len(latencies)
+    return {
+        'workers': workers,
+        'threads_per_worker': threads,
+        'jobs': workers * threads * jobs,
+        'writes': writes,
+        'seconds': round(elapsed, 3),
+        'writes_per_second': round(writes / elapsed),
+        'jobs_per_minute': round(workers * threads * jobs / elapsed * 60),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4], help='Connexions à la base (processus simulés)')
+    parser.add_argument('--threads', type=int, default=4, help='Threads d\'écriture par connexion')
+    parser.add_argument('--jobs', type=int, default=250, help='Jobs écrits par thread')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        results = [measure(folder, workers, args.threads, args.jobs) for workers in args.workers]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
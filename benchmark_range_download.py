@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark du téléchargeur par segments parallèles (RangeDownloader)
+Compare une connexion unique à N connexions simultanées contre un serveur
+local qui limite le débit par connexion, comme googlevideo
+"""
+
+import argparse
+import json
+import os
+import tempfile
+
+from downloader import RangeDownloader
+from fake_youtube import FakeGoogleVideoServer, media_bytes
+
+MB = 1024 * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=64, help='Taille du média simulé')
+    parser.add_argument('--per-connection-mbps', type=float, default=8.0, help='Débit max par connexion (Mo/s)')
+    parser.add_argument('--segment-mb', type=float, default=4.0, help='Taille des segments')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8], help='Niveaux de parallélisme testés')
+    parser.add_argument('--fail-segments', type=int, default=0, help='Nombre de réponses 503 injectées')
+    args = parser.parse_args()
+
+    size = args.size_mb * MB
+    expected = media_bytes(size)
+    results = []
+    with FakeGoogleVideoServer(size, bytes_per_second_per_connection=args.per_connection_mbps * MB) as server:
+        with tempfile.TemporaryDirectory() as folder:
+            for concurrency in args.concurrency:
+                path = os.path.join(folder, f"video_{concurrency}.mp4")
+                server.inject_errors(*([503] * args.fail_segments))
+                downloader = RangeDownloader(
+                    segment_size=int(args.segment_mb * MB),
+                    concurrency=concurrency,
+                    max_segment_retries=args.fail_segments + 1
+                )
+                stats = downloader.download(server.url, path, size)
+                with open(path, 'rb') as f:
+                    stats['verified'] = f.read() == expected
+                results.append(stats)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Coût CPU de create_youtube_with_headers et de la résolution des streams,
+sans réseau: les réponses YouTube (player, page watch, base.js) sont
+enregistrées une fois dans des cassettes, puis rejouées à l'identique.
+
+    # Enregistrement (réseau requis), une cassette par vidéo
+    python benchmark_youtube_parse.py record --videos dQw4w9WgXcQ jNQXAC9IVRw --dir cassettes
+
+    # Rejeu: médianes CPU/mur par étape, profil cProfile, comparaison à un résultat précédent
+    python benchmark_youtube_parse.py replay --dir cassettes --iterations 20 --profile 25 \\
+        --output apres.json --baseline avant.json
+
+Le rejeu vérifie aussi que les informations et les URL déchiffrées des
+streams sont identiques à celles obtenues à l'enregistrement (code de
+sortie 1 sinon, ou si une étape est plus lente que la référence au-delà
+de --tolerance).
+"""
+
+import argparse
+import cProfile
+import glob
+import io
+import json
+import os
+import pstats
+import sys
+import time
+
+from benchmark_api import percentile
+from cassette import Cassette
+
+PHASES = ('create_youtube', 'video_info', 'select_stream')
+# Écart minimal signalé: en dessous, le bruit de mesure domine
+MIN_REGRESSION_MS = 0.5
+
+
+def video_url(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def cassette_path(folder, video_id):
+    return os.path.join(folder, f"{video_id}.json.gz")
+
+
+def reset_js_cache():
+    """Oublie base.js: la prochaine vidéo le récupère (et l'enregistre) de nouveau"""
+    import pytubefix
+    pytubefix.__js__ = None
+    pytubefix.__js_url__ = None
+
+
+def resolve(main, video_id, resolution, timings=None):
+    """Exécute les étapes mesurées; retourne le résultat comparable au rejeu"""
+    def timed(phase, func):
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = func()
+        if timings is not None:
+            timings[phase]['wall'].append(time.perf_counter() - wall)
+            timings[phase]['cpu'].append(time.process_time() - cpu)
+        return result
+
+    yt = timed('create_youtube', lambda: main.create_youtube_with_headers(video_url(video_id)))
+    info = timed('video_info', lambda: main.build_video_info(yt))
+    stream = timed('select_stream', lambda: yt.streams.filter(
+        progressive=True, file_extension='mp4', resolution=resolution
+    ).first())
+    info['available_resolutions'] = sorted(info['available_resolutions'])
+    return {
+        'video_info': info,
+        'selected_itag': stream.itag if stream else None,
+        # URL finales: signature et paramètre n déchiffrés avec base.js
+        'stream_urls': {str(s.itag): s.url for s in yt.streams},
+    }
+
+
+def record(args):
+    if args.fake:
+        # Le faux innertube ne sert ni base.js ni PO token
+        os.environ.setdefault('YOUTUBE_CLIENTS', 'IOS')
+    import main
+    main.load_pytubefix()
+    if args.fake:
+        # Démonstration hors ligne: enregistre les réponses du faux innertube local
+        from fake_youtube import FakeInnerTubeServer
+        server = FakeInnerTubeServer().start()
+        server.install_redirect()
+
+    os.makedirs(args.dir, exist_ok=True)
+    failures = 0
+    for video_id in args.videos:
+        reset_js_cache()
+        cassette = Cassette(cassette_path(args.dir, video_id))
+        try:
+            with cassette.recording(save=False):
+                expected = resolve(main, video_id, args.resolution)
+        except Exception as e:
+            failures += 1
+            print(f"❌ {video_id}: {e}")
+            continue
+        cassette.metadata = {
+            'video_id': video_id,
+            'resolution': args.resolution,
+            'clients': main.Config.YOUTUBE_CLIENTS,
+            'expected': expected,
+        }
+        cassette.save()
+        print(f"✅ {video_id}: {len(cassette.interactions)} réponses -> {cassette.path}")
+    return 1 if failures else 0
+
+
+def compare(results, baseline, tolerance):
+    """Étapes dont la médiane CPU dépasse celle de la référence de plus de `tolerance`"""
+    slower = []
+    for phase in PHASES:
+        before = baseline.get('phases', {}).get(phase, {}).get('cpu_p50_ms')
+        after = results['phases'][phase]['cpu_p50_ms']
+        if before and after > before * (1 + tolerance) and after - before >= MIN_REGRESSION_MS:
+            slower.append(f"{phase}: {after:.2f} ms > {before:.2f} ms (+{tolerance:.0%} toléré)")
+    return slower
+
+
+def replay(args):
+    paths = sorted(glob.glob(os.path.join(args.dir, '*.json*')))
+    if not paths:
+        print(f"Aucune cassette dans {args.dir}")
+        return 1
+    cassettes = [Cassette.load(path) for path in paths]
+
+    # Mêmes clients qu'à l'enregistrement (les requêtes player sont identifiées par client)
+    os.environ.setdefault('YOUTUBE_CLIENTS', ','.join(cassettes[0].metadata['clients']))
+    # Mesure du CPU seul: pas d'attente imposée par la limite de débit
+    os.environ.setdefault('RATE_LIMIT_ENABLED', 'False')
+    import main
+    main.load_pytubefix()
+    timings = {phase: {'wall': [], 'cpu': []} for phase in PHASES}
+    mismatches = []
+    profiler = cProfile.Profile() if args.profile else None
+
+    for iteration in range(args.iterations):
+        for cassette in cassettes:
+            video_id = cassette.metadata['video_id']
+            cassette.rewind()
+            if args.cold_js or iteration == 0:
+                reset_js_cache()
+            with cassette.replaying(latency=args.latency):
+                if profiler:
+                    profiler.enable()
+                try:
+                    result = resolve(main, video_id, cassette.metadata['resolution'], timings)
+                finally:
+                    if profiler:
+                        profiler.disable()
+            if iteration == 0 and result != cassette.metadata['expected']:
+                mismatches.append(video_id)
+
+    results = {
+        'config': {
+            'cassettes': len(cassettes),
+            'iterations': args.iterations,
+            'latency': args.latency,
+            'cold_js': args.cold_js,
+        },
+        'phases': {},
+        'mismatches': mismatches,
+        'cassette_misses': sorted({key for cassette in cassettes for key in cassette.misses}),
+    }
+    for phase in PHASES:
+        wall = sorted(timings[phase]['wall'])
+        cpu = sorted(timings[phase]['cpu'])
+        results['phases'][phase] = {
+            'cpu_p50_ms': round(percentile(cpu, 50) * 1000, 2),
+            'cpu_p95_ms': round(percentile(cpu, 95) * 1000, 2),
+            'wall_p50_ms': round(percentile(wall, 50) * 1000, 2),
+            'wall_p95_ms': round(percentile(wall, 95) * 1000, 2),
+        }
+
+    slower = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            slower = compare(results, json.load(f), args.tolerance)
+        results['slower_than_baseline'] = slower
+
+    if profiler:
+        if args.profile_output:
+            profiler.dump_stats(args.profile_output)
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(args.profile)
+        print(text.getvalue())
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    for video_id in mismatches:
+        print(f"❌ {video_id}: résultat différent de celui de l'enregistrement")
+    for line in slower:
+        print(f"❌ Plus lent que la référence: {line}")
+    return 1 if mismatches or slower else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enregistrement/rejeu des réponses YouTube pour profiler l'analyse")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='Enregistre une cassette par vidéo')
+    record_parser.add_argument('--videos', nargs='+', required=True, help='Identifiants des vidéos')
+    record_parser.add_argument('--dir', default='cassettes', help='Dossier des cassettes')
+    record_parser.add_argument('--resolution', default='360p', help='Résolution du stream sélectionné')
+    record_parser.add_argument('--fake', action='store_true',
+                               help='Enregistre le faux innertube local au lieu de YouTube')
+
+    replay_parser = commands.add_parser('replay', help='Rejoue les cassettes et mesure chaque étape')
+    replay_parser.add_argument('--dir', default='cassettes', help='Dossier des cassettes')
+    replay_parser.add_argument('--iterations', type=int, default=10, help='Passages sur chaque cassette')
+    replay_parser.add_argument('--latency', type=float, default=0.0, help='Latence simulée par réponse (s)')
+    replay_parser.add_argument('--cold-js', action='store_true',
+                               help='Oublie base.js à chaque passage (mesure aussi son analyse)')
+    replay_parser.add_argument('--profile', type=int, default=0, help='Affiche les N fonctions les plus coûteuses')
+    replay_parser.add_argument('--profile-output', help='Écrit le profil cProfile (snakeviz, pstats)')
+    replay_parser.add_argument('--output', help='Écrit aussi le JSON dans ce fichier')
+    replay_parser.add_argument('--baseline', help='JSON d\'un rejeu précédent servant de référence')
+    replay_parser.add_argument('--tolerance', type=float, default=0.2,
+                               help='Ralentissement CPU toléré par rapport à la référence (0.2 = 20 %%)')
+    args = parser.parse_args()
+
+    sys.exit(record(args) if args.command == 'record' else replay(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Cache en mémoire borné (LRU) avec expiration (TTL)
+
+    Si `disk_folder` est fourni, les valeurs (sérialisables en JSON) sont aussi
+    écrites sur disque et survivent à un redémarrage du processus. Avec
+    `shared` (SharedState), ce second niveau est la base SQLite partagée par
+    les processus workers: une vidéo récupérée par un worker sert aux autres.
+    """
+
+    def __init__(self, max_entries, ttl, disk_folder=None, name='cache', shared=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_folder = disk_folder or None
+        self.shared = shared
+        self.name = name
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.disk_folder:
+            os.makedirs(self.disk_folder, exist_ok=True)
+
+    def get(self, key):
+        """Retourne la valeur associée à `key`, ou None si absente ou expirée"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value, expires_at = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store_locked(key, value, expires_at)
+        return value
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store_locked(key, value, expires_at)
+        self._write_disk(key, value, expires_at)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared:
+            self.shared.cache_delete(self.name, key)
+        elif self.disk_folder:
+            try:
+                os.remove(self._disk_path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round((self.hits + self.disk_hits) / lookups, 3) if lookups else None,
+                'disk_tier': bool(self.disk_folder or self.shared),
+                'shared_tier': bool(self.shared),
+            }
+
+    def _store_locked(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(f"{self.name}:{key}".encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_folder, f"{digest}.json")
+
+    def _read_disk(self, key, now):
+        if self.shared:
+            try:
+                return self.shared.cache_get(self.name, key)
+            except Exception as e:
+                print(f"Lecture du cache partagé {self.name} impossible: {e}")
+                return None, None
+        if not self.disk_folder:
+            return None, None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+        if data.get('key') != key or data.get('expires_at', 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None, None
+        return data.get('value'), data['expires_at']
+
+    def _write_disk(self, key, value, expires_at):
+        if self.shared:
+            try:
+                self.shared.cache_set(self.name, key, value, expires_at)
+            except Exception as e:
+                print(f"Impossible d'écrire le cache partagé {self.name}: {e}")
+            return
+        if not self.disk_folder:
+            return
+        path = self._disk_path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'expires_at': expires_at, 'value': value}, f)
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Impossible d'écrire le cache {self.name} sur disque: {e}")
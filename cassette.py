@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Enregistrement et rejeu des échanges HTTP de pytubefix avec YouTube
+(player innertube, page watch, base.js) dans des fichiers « cassettes »
+
+Le rejeu sert les réponses enregistrées sans réseau, dans l'ordre
+d'enregistrement et avec une latence fixe: le coût CPU de l'analyse et du
+déchiffrement des signatures peut ainsi être mesuré isolément et comparé
+d'une version à l'autre. Les flux googlevideo ne sont pas enregistrés.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+from http.client import HTTPMessage
+from urllib.error import HTTPError, URLError
+
+from async_fetch import PrefetchedResponse
+
+CASSETTE_VERSION = 1
+# Hôtes enregistrés: player, page watch et base.js (pas les flux média)
+RECORDED_HOSTS = re.compile(r"^https?://(www\.|m\.|music\.)?youtube\.com/")
+
+_lock = threading.Lock()
+_active = None
+
+
+def request_key(method, url, data):
+    """Clé de correspondance d'une requête
+
+    Le corps JSON des requêtes player contient des valeurs propres à la
+    session (visitorData, PO token, horodatages): seuls la vidéo et le client
+    identifient la requête.
+    """
+    if not data:
+        return f"{method} {url}"
+    try:
+        payload = json.loads(data)
+    except (ValueError, UnicodeDecodeError):
+        return f"{method} {url} sha1={hashlib.sha1(data).hexdigest()}"
+    if not isinstance(payload, dict):
+        return f"{method} {url} sha1={hashlib.sha1(data).hexdigest()}"
+    client = payload.get('context', {}).get('client', {})
+    return f"{method} {url} videoId={payload.get('videoId')} client={client.get('clientName')}"
+
+
+def _encode_body(content):
+    try:
+        return {'text': content.decode('utf-8')}
+    except UnicodeDecodeError:
+        return {'hex': content.hex()}
+
+
+def _decode_body(body):
+    if 'text' in body:
+        return body['text'].encode('utf-8')
+    return bytes.fromhex(body['hex'])
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class Cassette:
+    """Échanges HTTP enregistrés, rejoués dans leur ordre d'enregistrement
+
+    Une même requête enregistrée plusieurs fois reçoit ses réponses dans
+    l'ordre, puis la dernière indéfiniment.
+
+    Exemple:
+        with Cassette('cassettes/dQw4w9WgXcQ.json.gz').recording():
+            main.create_youtube_with_headers(url)
+        with Cassette.load('cassettes/dQw4w9WgXcQ.json.gz').replaying(latency=0.05):
+            main.create_youtube_with_headers(url)
+    """
+
+    def __init__(self, path=None, interactions=None, metadata=None):
+        self.path = path
+        self.interactions = list(interactions or [])
+        # Informations libres (ex: résultats attendus au rejeu, pour les tests de non-régression)
+        self.metadata = dict(metadata or {})
+        self.misses = []
+        self._positions = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, *paths):
+        """Cassette réunissant les échanges d'un ou plusieurs fichiers"""
+        interactions = []
+        metadata = {}
+        for path in paths:
+            with _open(path, 'r') as f:
+                document = json.load(f)
+            if document.get('version') != CASSETTE_VERSION:
+                raise ValueError(f"Version de cassette non supportée: {path}")
+            interactions.extend(document['interactions'])
+            metadata.update(document.get('metadata', {}))
+        return cls(paths[0] if len(paths) == 1 else None, interactions, metadata)
+
+    def save(self, path=None):
+        path = path or self.path
+        with self._lock:
+            document = {
+                'version': CASSETTE_VERSION,
+                'metadata': dict(self.metadata),
+                'interactions': list(self.interactions),
+            }
+        with _open(path, 'w') as f:
+            json.dump(document, f)
+
+    def record(self, key, url, status, reason, headers, content):
+        with self._lock:
+            self.interactions.append({
+                'key': key,
+                'url': url,
+                'status': status,
+                'reason': reason,
+                'headers': list(headers.items()),
+                'body': _encode_body(content),
+            })
+
+    def find(self, key):
+        """Prochaine interaction enregistrée pour `key`, ou None"""
+        with self._lock:
+            matches = [interaction for interaction in self.interactions if interaction['key'] == key]
+            if not matches:
+                self.misses.append(key)
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return matches[min(position, len(matches) - 1)]
+
+    def rewind(self):
+        """Rejoue de nouveau depuis la première réponse de chaque requête"""
+        with self._lock:
+            self._positions = {}
+
+    def recording(self, save=True):
+        """Contexte: les requêtes YouTube passent par le réseau et sont enregistrées"""
+        return _Session(self, 'record', save=save)
+
+    def replaying(self, latency=0.0):
+        """Contexte: les requêtes YouTube sont servies depuis la cassette"""
+        return _Session(self, 'replay', latency=latency)
+
+
+class _Session:
+    def __init__(self, cassette, mode, latency=0.0, save=False):
+        self.cassette = cassette
+        self.mode = mode
+        self.latency = latency
+        self.save = save
+
+    def __enter__(self):
+        global _active
+        install_cassette_hook()
+        with _lock:
+            if _active is not None:
+                raise RuntimeError("Une cassette est déjà active")
+            _active = self
+        return self.cassette
+
+    def __exit__(self, *exc):
+        global _active
+        with _lock:
+            _active = None
+        if self.save and self.cassette.path:
+            self.cassette.save()
+
+
+def _replay(session, key, url):
+    interaction = session.cassette.find(key)
+    if session.latency:
+        time.sleep(session.latency)
+    if interaction is None:
+        # Même type d'erreur qu'urlopen hors ligne, pour les relances et la classification
+        raise URLError(f"Requête absente de la cassette: {key}")
+    headers = HTTPMessage()
+    for name, value in interaction['headers']:
+        headers[name] = value
+    content = _decode_body(interaction['body'])
+    if interaction['status'] >= 400:
+        raise HTTPError(url, interaction['status'], interaction['reason'], headers, io.BytesIO(content))
+    return PrefetchedResponse(url, interaction['status'], headers, content)
+
+
+def _record(session, key, url, urlopen, req, args, kwargs):
+    try:
+        with urlopen(req, *args, **kwargs) as response:
+            content = response.read()
+            status, reason, headers = response.status, response.reason, response.headers
+    except HTTPError as e:
+        content = e.read()
+        session.cassette.record(key, url, e.code, e.reason, e.headers, content)
+        raise HTTPError(url, e.code, e.reason, e.headers, io.BytesIO(content)) from None
+    session.cassette.record(key, url, status, reason, headers, content)
+    return PrefetchedResponse(url, status, headers, content)
+
+
+def install_cassette_hook():
+    """Intercepte `pytubefix.request.urlopen` quand une cassette est active
+
+    Installé sous les hooks de `_execute_request` (limite de débit): ceux-ci
+    restent actifs pendant l'enregistrement comme pendant le rejeu. À
+    installer après une éventuelle redirection vers un faux innertube, pour
+    que les clés gardent les URL YouTube d'origine.
+    """
+    from pytubefix import request
+
+    current = request.urlopen
+    if getattr(current, 'cassette_hook', False):
+        return
+
+    def cassette_urlopen(req, *args, **kwargs):
+        session = _active
+        url = req.full_url
+        if session is None or not RECORDED_HOSTS.match(url):
+            return current(req, *args, **kwargs)
+        key = request_key(req.get_method(), url, req.data)
+        if session.mode == 'replay':
+            return _replay(session, key, url)
+        return _record(session, key, url, current, req, args, kwargs)
+
+    cassette_urlopen.cassette_hook = True
+    request.urlopen = cassette_urlopen
@@ -0,0 +1,196 @@
+import threading
+import time
+from collections import deque
+
+# États du circuit breaker
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+# Champs du circuit breaker, communs aux workers quand l'état est partagé (SharedState)
+BREAKER_FIELDS = ('state', 'consecutive_failures', 'opened_at', 'last_attempt_at', 'probe_owner', 'probe_expires')
+# Propriétaire des sondes quand l'état reste local au processus
+LOCAL_OWNER = 'local'
+
+
+class ClientHealth:
+    """Statistiques glissantes et circuit breaker d'un type de client YouTube"""
+
+    def __init__(self, name, priority, window):
+        self.name = name
+        self.priority = priority
+        self.samples = deque(maxlen=window)
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.last_attempt_at = None
+        # Sonde en cours: propriétaire (processus) et échéance, au-delà de laquelle elle est abandonnée
+        self.probe_owner = None
+        self.probe_expires = None
+
+    def probing(self, now):
+        return self.probe_owner is not None and self.probe_expires > now
+
+    def breaker(self):
+        return {field: getattr(self, field) for field in BREAKER_FIELDS}
+
+    def load_breaker(self, values):
+        for field in BREAKER_FIELDS:
+            setattr(self, field, values[field])
+
+    def success_rate(self):
+        if not self.samples:
+            return None
+        return sum(1 for success, _ in self.samples if success) / len(self.samples)
+
+    def average_latency(self):
+        latencies = [latency for success, latency in self.samples if success]
+        if not latencies:
+            return None
+        return sum(latencies) / len(latencies)
+
+    def expected_cost(self):
+        """Temps moyen attendu avant succès (latence / taux de succès)"""
+        rate = self.success_rate()
+        if rate is None:
+            return 0.0
+        latency = self.average_latency()
+        if latency is None:
+            # Aucun succès récent: coût basé sur la latence des échecs
+            latency = sum(latency for _, latency in self.samples) / len(self.samples)
+        return latency / max(rate, 0.01)
+
+    def to_dict(self):
+        rate = self.success_rate()
+        latency = self.average_latency()
+        return {
+            'state': self.state,
+            'samples': len(self.samples),
+            'success_rate': round(rate, 3) if rate is not None else None,
+            'average_latency': round(latency, 3) if latency is not None else None,
+            'consecutive_failures': self.consecutive_failures,
+            'opened_at': self.opened_at,
+        }
+
+
+class ClientSelector:
+    """Ordonne les clients YouTube selon leurs taux de succès et latences récents
+
+    Un client qui échoue `failure_threshold` fois de suite est écarté pendant
+    `cooldown` secondes, puis une seule requête de sonde est autorisée: un
+    succès le réintègre, un échec rouvre le circuit. Chaque appel à
+    `ordering()` distribue au plus une sonde, placée en tête de liste; une
+    sonde sans résultat après `probe_timeout` secondes est abandonnée. Un
+    client relégué en fin de liste est lui aussi resondé périodiquement.
+
+    Avec `shared` (SharedState), l'état des circuits est commun à tous les
+    workers: un client en panne n'est payé qu'une fois, pas une fois par
+    processus. Taux de succès et latences restent propres à chaque worker.
+    """
+
+    def __init__(self, clients, window=50, failure_threshold=3, cooldown=120.0, probe_timeout=60.0, shared=None):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+        self.shared = shared
+        self._clients = {
+            name: ClientHealth(name, priority, window)
+            for priority, name in enumerate(clients)
+        }
+        self._lock = threading.Lock()
+
+    def _owner(self):
+        return self.shared.owner if self.shared else LOCAL_OWNER
+
+    def _with_breakers(self, func):
+        """Exécute `func(now)` sous verrou, sur l'état des circuits partagé s'il y en a un"""
+        with self._lock:
+            if not self.shared:
+                return func(time.time())
+
+            def update(rows):
+                for name, values in rows.items():
+                    if name in self._clients:
+                        self._clients[name].load_breaker(values)
+                result = func(time.time())
+                return {name: client.breaker() for name, client in self._clients.items()}, result
+
+            return self.shared.breakers_update(update)
+
+    def ordering(self):
+        """Liste des clients à essayer, dans l'ordre"""
+        return self._with_breakers(self._ordering_locked)
+
+    def _ordering_locked(self, now):
+        probes = []
+        available = []
+
+        def take_probe(client):
+            client.probe_owner = self._owner()
+            client.probe_expires = now + self.probe_timeout
+            probes.append(client)
+
+        for client in self._clients.values():
+            if client.state == BREAKER_OPEN and now - client.opened_at >= self.cooldown:
+                client.state = BREAKER_HALF_OPEN
+            if client.state == BREAKER_HALF_OPEN:
+                # Une seule sonde par appel, essayée en premier: l'appelant essaie
+                # toujours le premier client, donc chaque sonde reçoit record/release
+                if not client.probing(now) and not probes:
+                    take_probe(client)
+            elif client.state == BREAKER_CLOSED:
+                available.append(client)
+
+        available.sort(key=lambda client: (client.expected_cost(), client.priority))
+        # Un client délaissé depuis `cooldown` secondes est resondé pour actualiser ses stats
+        for client in available[1:]:
+            stale = client.last_attempt_at is not None and now - client.last_attempt_at >= self.cooldown
+            if stale and not client.probing(now) and not probes:
+                take_probe(client)
+        available = [client for client in available if client not in probes]
+        order = probes + available
+        if not order:
+            # Tous les circuits sont ouverts: mieux vaut essayer que refuser la requête
+            order = sorted(self._clients.values(), key=lambda client: client.opened_at or 0)
+        return [client.name for client in order]
+
+    def _end_probe(self, client):
+        if client.probe_owner == self._owner():
+            client.probe_owner = client.probe_expires = None
+
+    def record(self, name, success, latency):
+        """Enregistre le résultat d'une tentative avec le client `name`"""
+        def update(now):
+            client = self._clients[name]
+            client.samples.append((success, latency))
+            client.last_attempt_at = now
+            self._end_probe(client)
+            if success:
+                client.consecutive_failures = 0
+                client.state = BREAKER_CLOSED
+                client.opened_at = None
+                return
+            client.consecutive_failures += 1
+            if client.state == BREAKER_HALF_OPEN or client.consecutive_failures >= self.failure_threshold:
+                if client.state != BREAKER_OPEN:
+                    print(f"Circuit ouvert pour le client YouTube {name} ({client.consecutive_failures} échecs)")
+                client.state = BREAKER_OPEN
+                client.opened_at = now
+
+        self._with_breakers(update)
+
+    def release(self, name):
+        """Libère une sonde dont le résultat n'est pas imputable au client"""
+        self._with_breakers(lambda now: self._end_probe(self._clients[name]))
+
+    def snapshot(self):
+        """État exposé dans /health: ordre courant et état des circuits"""
+        def read(now):
+            clients = sorted(self._clients.values(), key=lambda client: (client.state != BREAKER_CLOSED, client.expected_cost(), client.priority))
+            return {
+                'preferred_order': [client.name for client in clients if client.state == BREAKER_CLOSED],
+                'shared': bool(self.shared),
+                'clients': {client.name: client.to_dict() for client in self._clients.values()},
+            }
+
+        return self._with_breakers(read)
@@ -3,16 +3,103 @@ import os
 class Config:
     # Configuration Flask
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
-    DEBUG = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
+    # Serveur de développement avec reloader: à activer explicitement (FLASK_DEBUG=True)
+    DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     
     # Configuration YouTube
     MAX_RETRIES = int(os.environ.get('MAX_RETRIES', '3'))
+    # Délai de la 1re relance tiré entre MIN et MAX, doublé à chaque relance suivante
     RETRY_DELAY_MIN = float(os.environ.get('RETRY_DELAY_MIN', '1.0'))
     RETRY_DELAY_MAX = float(os.environ.get('RETRY_DELAY_MAX', '3.0'))
+    RETRY_BACKOFF_MAX = float(os.environ.get('RETRY_BACKOFF_MAX', '30'))
+    # Retry-After plus long que cette valeur: abandon plutôt qu'attente
+    RETRY_AFTER_MAX = float(os.environ.get('RETRY_AFTER_MAX', '120'))
+    # Budget global: relances <= RATIO x opérations + MIN_PER_SECOND x WINDOW sur WINDOW secondes
+    RETRY_BUDGET_RATIO = float(os.environ.get('RETRY_BUDGET_RATIO', '0.2'))
+    RETRY_BUDGET_MIN_PER_SECOND = float(os.environ.get('RETRY_BUDGET_MIN_PER_SECOND', '0.5'))
+    RETRY_BUDGET_WINDOW = float(os.environ.get('RETRY_BUDGET_WINDOW', '10'))
+    # Clients YouTube essayés (ordre initial) et circuit breaker par client
+    YOUTUBE_CLIENTS = [c.strip() for c in os.environ.get('YOUTUBE_CLIENTS', 'WEB,ANDROID').split(',') if c.strip()]
+    CLIENT_STATS_WINDOW = int(os.environ.get('CLIENT_STATS_WINDOW', '50'))
+    CLIENT_BREAKER_FAILURES = int(os.environ.get('CLIENT_BREAKER_FAILURES', '3'))
+    CLIENT_BREAKER_COOLDOWN = float(os.environ.get('CLIENT_BREAKER_COOLDOWN', '120'))
+    # Limite de débit sortante (requêtes/s) par type de client innertube et pour googlevideo
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    RATE_LIMITS = {
+        name.strip(): float(rate)
+        for name, rate in (
+            item.split('=', 1) for item in os.environ.get(
+                'RATE_LIMITS', 'WEB=2,ANDROID=2,default=2,googlevideo=20'
+            ).split(',') if '=' in item
+        )
+    }
+    RATE_LIMIT_BURST_SECONDS = float(os.environ.get('RATE_LIMIT_BURST_SECONDS', '2'))
+    # Débit plancher après réductions sur 429/403 (fraction du débit configuré)
+    RATE_LIMIT_MIN_FRACTION = float(os.environ.get('RATE_LIMIT_MIN_FRACTION', '0.1'))
+    RATE_LIMIT_MAX_WAIT = float(os.environ.get('RATE_LIMIT_MAX_WAIT', '60'))
+    # Intervalle de vérification de token_youtube.json (rechargement à chaud)
+    PO_TOKEN_CHECK_INTERVAL = float(os.environ.get('PO_TOKEN_CHECK_INTERVAL', '5.0'))
     
     # Configuration des téléchargements
     DOWNLOAD_FOLDER = os.environ.get('DOWNLOAD_FOLDER', 'downloads')
     MAX_DESCRIPTION_LENGTH = int(os.environ.get('MAX_DESCRIPTION_LENGTH', '500'))
+    # Téléchargement par segments HTTP Range parallèles
+    DOWNLOAD_SEGMENT_SIZE = int(os.environ.get('DOWNLOAD_SEGMENT_SIZE', str(4 * 1024 * 1024)))
+    DOWNLOAD_CONCURRENCY = int(os.environ.get('DOWNLOAD_CONCURRENCY', '4'))
+    DOWNLOAD_SEGMENT_RETRIES = int(os.environ.get('DOWNLOAD_SEGMENT_RETRIES', '3'))
+    # Index SQLite des vidéos déjà téléchargées
+    DOWNLOAD_INDEX_DB = os.environ.get('DOWNLOAD_INDEX_DB', 'download_index.db')
+    
+    # Cache des métadonnées vidéo (METADATA_CACHE_DIR vide = pas de cache disque)
+    METADATA_CACHE_TTL = int(os.environ.get('METADATA_CACHE_TTL', '600'))
+    METADATA_CACHE_MAX_ENTRIES = int(os.environ.get('METADATA_CACHE_MAX_ENTRIES', '1024'))
+    METADATA_CACHE_DIR = os.environ.get('METADATA_CACHE_DIR', '')
+    
+    # Configuration des jobs asynchrones
+    ASYNC_DOWNLOADS = os.environ.get('ASYNC_DOWNLOADS', 'False').lower() == 'true'
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '4'))
+    JOB_QUEUE_MAX = int(os.environ.get('JOB_QUEUE_MAX', '100'))
+    JOB_RETENTION_SECONDS = int(os.environ.get('JOB_RETENTION_SECONDS', '3600'))
+    # Base SQLite des jobs (reprise après redémarrage)
+    JOB_DB = os.environ.get('JOB_DB', 'jobs.db')
+    # Un job dont le processus ne signale plus sa présence depuis N secondes est repris par un autre
+    JOB_OWNER_LEASE_SECONDS = float(os.environ.get('JOB_OWNER_LEASE_SECONDS', '30'))
+    # Intervalle minimal entre deux publications de progression, keepalive des flux SSE
+    PROGRESS_MIN_INTERVAL = float(os.environ.get('PROGRESS_MIN_INTERVAL', '0.5'))
+    SSE_KEEPALIVE_SECONDS = float(os.environ.get('SSE_KEEPALIVE_SECONDS', '15'))
+    
+    # Serveur de production multi-processus (gunicorn -c gunicorn.conf.py wsgi:app)
+    SERVER_BIND = os.environ.get('SERVER_BIND', '0.0.0.0:5000')
+    WEB_WORKERS = int(os.environ.get('WEB_WORKERS', str(os.cpu_count() or 1)))
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', '8'))
+    # Délai laissé aux requêtes et jobs en cours lors d'un redémarrage gracieux (SIGHUP/SIGTERM)
+    WEB_GRACEFUL_TIMEOUT = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', '300'))
+    # Recyclage d'un worker après N requêtes (0 = jamais), avec une part aléatoire pour étaler les redémarrages
+    WEB_MAX_REQUESTS = int(os.environ.get('WEB_MAX_REQUESTS', '0'))
+    WEB_MAX_REQUESTS_JITTER = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', '0'))
+    # Base SQLite partagée par les workers: limite de débit, budget de relances,
+    # mutualisation et cache des métadonnées (vide = état propre à chaque processus)
+    SHARED_STATE_DB = os.environ.get('SHARED_STATE_DB', '')
+    SHARED_LEASE_SECONDS = float(os.environ.get('SHARED_LEASE_SECONDS', '30'))
+    
+    # Serveur asyncio des endpoints de métadonnées (async_server.py)
+    ASYNC_SERVER_PORT = int(os.environ.get('ASYNC_SERVER_PORT', '5001'))
+    # Threads d'analyse pytubefix (JSON, signature) et connexions aiohttp simultanées vers YouTube
+    ASYNC_PARSE_WORKERS = int(os.environ.get('ASYNC_PARSE_WORKERS', '4'))
+    ASYNC_HTTP_CONNECTIONS = int(os.environ.get('ASYNC_HTTP_CONNECTIONS', '200'))
+    
+    # Démarrage à froid: budget du temps d'import de main.py (ms), vérifié au démarrage
+    # et par benchmark_import_time.py; pytubefix est préchargé en arrière-plan une fois prêt.
+    # Médianes mesurées (Drive désactivé): flask 120-200 ms, main.py 180-300 ms selon la
+    # charge de la machine; le budget garde ~70 % de marge au-dessus du pire cas observé
+    IMPORT_TIME_BUDGET_MS = float(os.environ.get('IMPORT_TIME_BUDGET_MS', '500'))
+    PRELOAD_PYTUBEFIX = os.environ.get('PRELOAD_PYTUBEFIX', 'True').lower() == 'true'
+    
+    # Téléchargements par lot (/download/batch)
+    BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', '4'))
+    BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '100'))
+    # Nombre maximum de vidéos énumérées par playlist ou chaîne (/playlist/...)
+    PLAYLIST_MAX_VIDEOS = int(os.environ.get('PLAYLIST_MAX_VIDEOS', '200'))
     
     # Configuration Google Drive
     GOOGLE_DRIVE_ENABLED = os.environ.get('GOOGLE_DRIVE_ENABLED', 'True').lower() == 'true'
@@ -20,6 +107,22 @@ class Config:
     GOOGLE_DRIVE_CREDENTIALS_FILE = os.environ.get('GOOGLE_DRIVE_CREDENTIALS_FILE', 'credentials.json')
     GOOGLE_DRIVE_TOKEN_FILE = os.environ.get('GOOGLE_DRIVE_TOKEN_FILE', 'token.json')
     GOOGLE_DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive.file']
+    # Rafraîchissement du token en arrière-plan, N secondes avant son expiration
+    GOOGLE_DRIVE_REFRESH_MARGIN = int(os.environ.get('GOOGLE_DRIVE_REFRESH_MARGIN', '300'))
+    # Pool d'upload Drive, indépendant des workers de téléchargement
+    DRIVE_UPLOAD_WORKERS = int(os.environ.get('DRIVE_UPLOAD_WORKERS', '2'))
+    # Taille des chunks de l'upload résumable (arrondie au multiple de 256 Ko)
+    DRIVE_UPLOAD_CHUNK_SIZE = int(os.environ.get('DRIVE_UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+    # Relances d'un chunk en échec (5xx, 429, coupure réseau) via la session résumable
+    DRIVE_CHUNK_RETRIES = int(os.environ.get('DRIVE_CHUNK_RETRIES', '5'))
+    # Tampon disque quand l'upload est plus lent que le téléchargement: activation,
+    # dossier (vide = dossier temporaire système) et taille maximale par upload (0 = sans limite)
+    DRIVE_SPILL_ENABLED = os.environ.get('DRIVE_SPILL_ENABLED', 'True').lower() == 'true'
+    DRIVE_SPOOL_FOLDER = os.environ.get('DRIVE_SPOOL_FOLDER', '')
+    DRIVE_SPILL_MAX_BYTES = int(os.environ.get('DRIVE_SPILL_MAX_BYTES', str(256 * 1024 * 1024)))
+    # Index en mémoire du dossier Drive: intervalle minimal entre deux lectures du flux de changements
+    DRIVE_INDEX_SYNC_INTERVAL = float(os.environ.get('DRIVE_INDEX_SYNC_INTERVAL', '30'))
+    DRIVE_INDEX_PAGE_SIZE = int(os.environ.get('DRIVE_INDEX_PAGE_SIZE', '1000'))
     
     # Headers pour simuler un navigateur
     BROWSER_HEADERS = {
@@ -37,4 +140,15 @@ class Config:
         r"^(https?://)?(www\.)?youtube\.com/watch\?v=[\w-]+(&\S*)?$",
         r"^(https?://)?(www\.)?youtu\.be/[\w-]+(\?\S*)?$",
         r"^(https?://)?(www\.)?youtube\.com/embed/[\w-]+(\?\S*)?$"
+    ]
+    
+    # Patterns d'URL de playlists et de chaînes (/playlist/download, /playlist/info).
+    # Séparés de YOUTUBE_URL_PATTERNS: /download n'accepte que des vidéos.
+    YOUTUBE_PLAYLIST_URL_PATTERNS = [
+        r"^(https?://)?(www\.)?youtube\.com/playlist\?(\S*&)?list=[\w-]+(&\S*)?$",
+        r"^(https?://)?(www\.)?youtube\.com/watch\?v=[\w-]+&(\S*&)?list=[\w-]+(&\S*)?$"
+    ]
+    YOUTUBE_CHANNEL_URL_PATTERNS = [
+        r"^(https?://)?(www\.)?youtube\.com/@[\w.-]+(/videos)?/?$",
+        r"^(https?://)?(www\.)?youtube\.com/(channel|c|user)/[\w-]+(/videos)?/?$"
     ] 
\ No newline at end of file
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+STORAGE_LOCAL = 'local'
+STORAGE_DRIVE = 'drive'
+
+# Nom des fichiers produits par download_video: <titre>_<video_id>_<résolution>.mp4
+FILENAME_PATTERN = re.compile(r"_(?P<video_id>[0-9A-Za-z_-]{11})_(?P<resolution>\d+p)\.mp4$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    video_id TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    storage TEXT NOT NULL,
+    itag INTEGER,
+    stream_resolution TEXT,
+    title TEXT,
+    filename TEXT NOT NULL,
+    local_path TEXT,
+    drive_file_id TEXT,
+    drive_link TEXT,
+    size INTEGER,
+    sha256 TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (video_id, resolution, storage)
+)
+"""
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class HashingChunks:
+    """Itère sur des chunks en calculant au passage leur taille et leur SHA-256"""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._digest = hashlib.sha256()
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            self._digest.update(chunk)
+            self.size += len(chunk)
+            yield chunk
+
+    @property
+    def sha256(self):
+        return self._digest.hexdigest()
+
+
+class DownloadIndex:
+    """Index persistant (SQLite) des vidéos déjà téléchargées
+
+    Associe (video_id, résolution, stockage) au fichier local ou au fichier
+    Google Drive correspondant, afin d'éviter tout travail réseau pour une
+    vidéo déjà récupérée.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.created = not os.path.exists(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, video_id, resolution, storage):
+        """Retourne l'entrée indexée si elle est toujours valide, sinon None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM downloads WHERE video_id = ? AND resolution = ? AND storage = ?",
+                (video_id, resolution, storage)
+            ).fetchone()
+        entry = dict(row) if row else None
+
+        # Un fichier local supprimé ou tronqué invalide l'entrée
+        if entry and storage == STORAGE_LOCAL:
+            path = entry['local_path']
+            if not path or not os.path.isfile(path) or os.path.getsize(path) != entry['size']:
+                self.remove(video_id, resolution, storage)
+                entry = None
+
+        with self._lock:
+            if entry:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry
+
+    def record(self, video_id, resolutions, storage, filename, size, sha256=None, itag=None,
+               stream_resolution=None, title=None, local_path=None, drive_file_id=None, drive_link=None):
+        """Enregistre un téléchargement sous une ou plusieurs résolutions (demandée et réelle)"""
+        now = time.time()
+        rows = [
+            (video_id, resolution, storage, itag, stream_resolution or resolution, title, filename,
+             local_path, drive_file_id, drive_link, size, sha256, now)
+            for resolution in dict.fromkeys(resolutions)
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def remove(self, video_id, resolution, storage):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM downloads WHERE video_id = ? AND resolution = ? AND storage = ?",
+                (video_id, resolution, storage)
+            )
+
+    def rebuild_from_folder(self, folder):
+        """Reconstruit les entrées locales à partir du contenu du dossier de téléchargement"""
+        found = 0
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM downloads WHERE storage = ?", (STORAGE_LOCAL,))
+        if not os.path.isdir(folder):
+            return found
+
+        for filename in sorted(os.listdir(folder)):
+            match = FILENAME_PATTERN.search(filename)
+            path = os.path.join(folder, filename)
+            if not match or not os.path.isfile(path):
+                continue
+            self.record(
+                match.group('video_id'),
+                [match.group('resolution')],
+                STORAGE_LOCAL,
+                filename,
+                os.path.getsize(path),
+                sha256=file_sha256(path),
+                local_path=path
+            )
+            found += 1
+        return found
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT storage, COUNT(*) FROM downloads GROUP BY storage"
+            ).fetchall())
+            return {
+                'entries': counts,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
@@ -0,0 +1,311 @@
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from retry import backoff_delay
+from rate_limit import THROTTLE_STATUSES
+
+MB = 1024 * 1024
+
+
+class SegmentError(Exception):
+    """Échec définitif d'un segment après épuisement des tentatives"""
+
+
+class RangeDownloader:
+    """Téléchargeur par segments HTTP Range parallèles
+
+    googlevideo limite le débit par connexion: découper le flux en plages
+    d'octets téléchargées simultanément permet d'utiliser toute la bande
+    passante disponible. Chaque segment est retenté indépendamment.
+    """
+
+    def __init__(self, segment_size=None, concurrency=None, max_segment_retries=None, timeout=30,
+                 retry_budget=None, rate_governor=None):
+        self.segment_size = segment_size or Config.DOWNLOAD_SEGMENT_SIZE
+        self.concurrency = concurrency or Config.DOWNLOAD_CONCURRENCY
+        self.max_segment_retries = (
+            max_segment_retries if max_segment_retries is not None else Config.DOWNLOAD_SEGMENT_RETRIES
+        )
+        self.timeout = timeout
+        # Budget de relances global (optionnel), partagé avec les autres opérations
+        self.retry_budget = retry_budget
+        # Limiteur de débit sortant (optionnel): une requête Range = un jeton googlevideo
+        self.rate_governor = rate_governor
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Session HTTP partagée, créée au premier téléchargement (requests importé à ce moment)"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    session.headers['User-Agent'] = Config.BROWSER_HEADERS['User-Agent']
+                    self._session = session
+        return self._session
+
+    def segments(self, size):
+        """Découpe [0, size) en plages (début, fin incluse)"""
+        return [
+            (start, min(start + self.segment_size, size) - 1)
+            for start in range(0, size, self.segment_size)
+        ]
+
+    def download(self, url, path, size, progress_callback=None, identity=None):
+        """Télécharge `size` octets dans `path`, retourne les statistiques
+
+        Les octets sont écrits dans `path + '.part'` (préalloué), renommé en
+        `path` une fois complet. Avec `identity` (flux source: vidéo, itag,
+        taille...), les segments terminés sont notés dans un fichier annexe
+        `.part.json`: une nouvelle tentative, même après un redémarrage, ne
+        retélécharge que les segments manquants si l'identité correspond.
+        """
+        progress = _Progress(size, progress_callback)
+        partial = PartialDownload(path, size, self.segment_size, identity)
+        completed = partial.open()
+        progress.resumed(sum(end - start + 1 for start, end in self.segments(size) if start in completed))
+
+        def fetch_to_file(segment):
+            start, end = segment
+            with open(partial.part_path, 'r+b') as f:
+                def write(offset, data):
+                    f.seek(offset)
+                    f.write(data)
+                self._fetch_segment(url, start, end, write, progress)
+                # Octets sur disque avant de marquer le segment comme vérifié
+                f.flush()
+                os.fsync(f.fileno())
+            partial.mark_done(start)
+
+        segments = [segment for segment in self.segments(size) if segment[0] not in completed]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='segment') as executor:
+            list(executor.map(fetch_to_file, segments))
+        partial.finish()
+        return dict(
+            progress.summary(time.perf_counter() - started),
+            segments=len(segments),
+            resumed_segments=len(completed),
+            concurrency=self.concurrency
+        )
+
+    def iter_chunks(self, url, size, progress_callback=None):
+        """Itère sur le contenu dans l'ordre, en préchargeant `concurrency` segments en parallèle
+
+        La mémoire utilisée est bornée à `concurrency` segments.
+        """
+        progress = _Progress(size, progress_callback)
+
+        def fetch_to_memory(segment):
+            start, end = segment
+            buffer = bytearray(end - start + 1)
+
+            def write(offset, data):
+                buffer[offset - start:offset - start + len(data)] = data
+            self._fetch_segment(url, start, end, write, progress)
+            return bytes(buffer)
+
+        segments = iter(self.segments(size))
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='segment') as executor:
+            pending = [executor.submit(fetch_to_memory, segment) for segment in itertools.islice(segments, self.concurrency)]
+            try:
+                while pending:
+                    chunk = pending.pop(0).result()
+                    segment = next(segments, None)
+                    if segment:
+                        pending.append(executor.submit(fetch_to_memory, segment))
+                    yield chunk
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def relay(self, url, start, end, chunk_size=64 * 1024):
+        """Itère sur les octets [start, end] au fil de l'eau, segment par segment
+
+        Pour un proxy: le premier octet part dès la réponse du premier
+        segment et la mémoire utilisée se limite à un morceau de `chunk_size`.
+        """
+        progress = _Progress(end - start + 1, None)
+        for segment_start in range(start, end + 1, self.segment_size):
+            segment_end = min(segment_start + self.segment_size - 1, end)
+            for _, data in self._iter_segment(url, segment_start, segment_end, progress, chunk_size):
+                yield data
+
+    def _fetch_segment(self, url, start, end, write, progress):
+        """Télécharge [start, end] via `write(offset, data)`"""
+        for position, data in self._iter_segment(url, start, end, progress):
+            write(position, data)
+
+    def _iter_segment(self, url, start, end, progress, chunk_size=256 * 1024):
+        """Produit (offset, data) pour [start, end], en reprenant à l'octet près en cas de coupure"""
+        import requests
+
+        position = start
+        retries = 0
+        while True:
+            try:
+                bucket = self.rate_governor.acquire('googlevideo') if self.rate_governor else None
+                response = self.session.get(
+                    url,
+                    headers={'Range': f"bytes={position}-{end}"},
+                    stream=True,
+                    timeout=self.timeout
+                )
+                if bucket:
+                    if response.status_code in THROTTLE_STATUSES:
+                        bucket.on_throttled()
+                    elif response.status_code == 206:
+                        bucket.on_success()
+                if response.status_code in (401, 403, 404, 410):
+                    # URL expirée ou refusée: inutile de retenter ce segment
+                    response.close()
+                    response.raise_for_status()
+                if response.status_code != 206:
+                    response.close()
+                    raise SegmentError(f"Réponse inattendue {response.status_code} pour bytes={position}-{end}")
+                with response:
+                    for data in response.iter_content(chunk_size=chunk_size):
+                        data = data[:end + 1 - position]
+                        offset = position
+                        position += len(data)
+                        progress.add(len(data))
+                        yield offset, data
+                        if position > end:
+                            break
+                if position > end:
+                    return
+                raise SegmentError(f"Segment incomplet: {position - start}/{end - start + 1} octets")
+            except requests.HTTPError:
+                raise
+            except (requests.RequestException, SegmentError) as e:
+                retries += 1
+                progress.add_retry()
+                if retries > self.max_segment_retries:
+                    raise SegmentError(f"Segment bytes={start}-{end} abandonné après {retries} essais: {e}")
+                if self.retry_budget and not self.retry_budget.try_withdraw():
+                    raise SegmentError(f"Segment bytes={start}-{end} abandonné (budget de relances épuisé): {e}")
+                time.sleep(backoff_delay(retries, 0.25, 0.75, 5))
+
+
+class PartialDownload:
+    """Fichier `.part` et son annexe `.part.json` (segments vérifiés, identité du flux)"""
+
+    def __init__(self, path, size, segment_size, identity=None):
+        self.path = path
+        self.part_path = path + '.part'
+        self.state_path = path + '.part.json'
+        self.size = size
+        self.segment_size = segment_size
+        self.identity = identity
+        self.completed = set()
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Prépare le fichier `.part`, retourne les débuts des segments déjà vérifiés"""
+        self.completed = self._load_completed()
+        if not self.completed:
+            with open(self.part_path, 'wb') as f:
+                f.truncate(self.size)
+        self._save()
+        if self.completed:
+            print(f"Reprise de {os.path.basename(self.path)}: "
+                  f"{len(self.completed)} segments déjà téléchargés")
+        return set(self.completed)
+
+    def mark_done(self, start):
+        with self._lock:
+            self.completed.add(start)
+            self._save()
+
+    def finish(self):
+        os.replace(self.part_path, self.path)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def verified_offset(self):
+        """Nombre d'octets contigus vérifiés depuis le début du fichier"""
+        offset = 0
+        while offset < self.size and offset in self.completed:
+            offset += self.segment_size
+        return min(offset, self.size)
+
+    def _load_completed(self):
+        if self.identity is None:
+            return set()
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if (state.get('identity') != self.identity or state.get('size') != self.size
+                    or state.get('segment_size') != self.segment_size
+                    or os.path.getsize(self.part_path) != self.size):
+                print(f"Fichier partiel ignoré (flux différent): {self.part_path}")
+                return set()
+            return set(state.get('completed', []))
+        except (OSError, ValueError):
+            return set()
+
+    def _save(self):
+        if self.identity is None:
+            return
+        state = {
+            'identity': self.identity,
+            'size': self.size,
+            'segment_size': self.segment_size,
+            'verified_offset': self.verified_offset(),
+            'completed': sorted(self.completed),
+        }
+        # Écriture atomique: l'annexe n'est jamais à moitié écrite
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+
+class _Progress:
+    """Compteur d'octets partagé par les workers, débit agrégé"""
+
+    def __init__(self, total, callback):
+        self.total = total
+        self.callback = callback
+        self.done = 0
+        self.retries = 0
+        self.resumed_bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, count):
+        with self._lock:
+            self.done += count
+            done = self.done
+        if self.callback:
+            self.callback(done, self.total)
+
+    def resumed(self, count):
+        """Octets repris d'une tentative précédente (comptés comme faits, hors débit)"""
+        with self._lock:
+            self.done += count
+            self.resumed_bytes = count
+
+    def add_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def summary(self, seconds):
+        transferred = self.done - self.resumed_bytes
+        return {
+            'bytes': transferred,
+            'resumed_bytes': self.resumed_bytes,
+            'seconds': round(seconds, 3),
+            'throughput_mbps': round(transferred / MB / seconds, 2) if seconds else None,
+            'segment_retries': self.retries,
+        }
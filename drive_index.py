@@ -0,0 +1,187 @@
+import threading
+import time
+
+from download_index import FILENAME_PATTERN
+
+FILE_FIELDS = "id, name, mimeType, size, md5Checksum, createdTime, webViewLink, parents, trashed, appProperties"
+
+
+class DriveFolderIndex:
+    """Index en mémoire du contenu du dossier Google Drive configuré
+
+    Rempli une fois en parcourant toutes les pages de files.list, puis tenu
+    à jour par le flux de changements Drive (changes.list) toutes les
+    `sync_interval` secondes, par le thread d'arrière-plan du
+    GoogleDriveManager. `/drive/files` et la vérification « vidéo déjà
+    sur Drive ? » sont servis depuis la mémoire.
+    """
+
+    def __init__(self, service_getter, folder_id, sync_interval=30.0, page_size=1000):
+        self._service_getter = service_getter
+        self.folder_id = folder_id
+        self.sync_interval = sync_interval
+        self.page_size = page_size
+        self._files = {}
+        # (video_id, résolution) -> file_id
+        self._by_video = {}
+        self._page_token = None
+        self.loaded_at = None
+        self.synced_at = None
+        self.full_loads = 0
+        self.syncs = 0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def ensure_fresh(self):
+        """Charge l'index au premier appel, puis applique les changements s'il est périmé
+
+        Un seul thread interroge Drive à la fois; pendant une synchronisation
+        incrémentale, les autres servent l'index courant.
+        """
+        if self.loaded_at is None:
+            with self._sync_lock:
+                if self.loaded_at is None:
+                    self.load()
+            return
+        if time.monotonic() - self.synced_at < self.sync_interval:
+            return
+        if self._sync_lock.acquire(blocking=False):
+            try:
+                self.sync()
+            finally:
+                self._sync_lock.release()
+
+    def seconds_until_sync(self):
+        """Délai avant la prochaine synchronisation due (0 tant que l'index n'est pas chargé)"""
+        if self.loaded_at is None:
+            return 0
+        return max(self.sync_interval - (time.monotonic() - self.synced_at), 0)
+
+    def load(self):
+        """Liste complète du dossier, toutes pages confondues"""
+        service = self._service_getter()
+        # Jeton pris avant la liste: aucun changement survenu pendant le parcours n'est perdu
+        page_token = service.changes().getStartPageToken().execute()['startPageToken']
+        query = "trashed = false"
+        if self.folder_id:
+            query = f"'{self.folder_id}' in parents and {query}"
+
+        files = {}
+        request = service.files().list(
+            q=query,
+            pageSize=self.page_size,
+            fields=f"nextPageToken, files({FILE_FIELDS})"
+        )
+        while request is not None:
+            response = request.execute()
+            for file in response.get('files', []):
+                files[file['id']] = self._entry(file)
+            request = service.files().list_next(request, response)
+
+        with self._lock:
+            self._files = files
+            self._by_video = {}
+            for entry in files.values():
+                self._link_locked(entry)
+            self._page_token = page_token
+            self.loaded_at = self.synced_at = time.monotonic()
+            self.full_loads += 1
+        print(f"Index Google Drive chargé: {len(files)} fichiers")
+
+    def sync(self):
+        """Applique les changements Drive survenus depuis la dernière synchronisation"""
+        service = self._service_getter()
+        page_token = self._page_token
+        applied = 0
+        while page_token:
+            response = service.changes().list(
+                pageToken=page_token,
+                pageSize=self.page_size,
+                includeRemoved=True,
+                fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))"
+            ).execute()
+            with self._lock:
+                for change in response.get('changes', []):
+                    self._apply_locked(change)
+                    applied += 1
+                if 'newStartPageToken' in response:
+                    self._page_token = response['newStartPageToken']
+                    self.synced_at = time.monotonic()
+                    self.syncs += 1
+            page_token = response.get('nextPageToken')
+        return applied
+
+    def add(self, file):
+        """Ajoute un fichier uploadé par ce processus sans attendre le flux de changements"""
+        with self._lock:
+            self._unlink_locked(file['id'])
+            entry = self._entry(file)
+            self._files[file['id']] = entry
+            self._link_locked(entry)
+
+    def files(self):
+        """Fichiers indexés, les plus récents d'abord"""
+        with self._lock:
+            files = list(self._files.values())
+        files.sort(key=lambda entry: entry.get('createdTime') or '', reverse=True)
+        return files
+
+    def find(self, video_id, resolution):
+        """Fichier Drive de la vidéo dans cette résolution, ou None"""
+        with self._lock:
+            file_id = self._by_video.get((video_id, resolution))
+            return dict(self._files[file_id]) if file_id else None
+
+    def contains(self, file_id):
+        with self._lock:
+            return file_id in self._files
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': self.loaded_at is not None,
+                'files': len(self._files),
+                'videos': len(self._by_video),
+                'full_loads': self.full_loads,
+                'syncs': self.syncs,
+                'seconds_since_sync': round(time.monotonic() - self.synced_at, 1) if self.synced_at else None,
+            }
+
+    def _apply_locked(self, change):
+        file = change.get('file')
+        self._unlink_locked(change['fileId'])
+        if change.get('removed') or not file or file.get('trashed') or not self._in_folder(file):
+            self._files.pop(change['fileId'], None)
+            return
+        entry = self._entry(file)
+        self._files[file['id']] = entry
+        self._link_locked(entry)
+
+    def _in_folder(self, file):
+        return not self.folder_id or self.folder_id in file.get('parents', [])
+
+    @staticmethod
+    def _entry(file):
+        """Ressource Drive enrichie de l'identifiant vidéo (appProperties, sinon nom du fichier)"""
+        entry = {key: value for key, value in file.items() if key not in ('parents', 'trashed', 'appProperties')}
+        properties = file.get('appProperties') or {}
+        match = FILENAME_PATTERN.search(file.get('name') or '')
+        entry['video_id'] = properties.get('video_id') or (match.group('video_id') if match else None)
+        entry['resolution'] = properties.get('resolution') or (match.group('resolution') if match else None)
+        entry['requested_resolution'] = properties.get('requested_resolution')
+        return entry
+
+    def _link_locked(self, entry):
+        if not entry['video_id']:
+            return
+        for resolution in (entry['resolution'], entry['requested_resolution']):
+            if resolution:
+                self._by_video[(entry['video_id'], resolution)] = entry['id']
+
+    def _unlink_locked(self, file_id):
+        entry = self._files.get(file_id)
+        if not entry:
+            return
+        for resolution in (entry['resolution'], entry['requested_resolution']):
+            if self._by_video.get((entry['video_id'], resolution)) == file_id:
+                del self._by_video[(entry['video_id'], resolution)]
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Serveur local simulant l'API Google Drive v3 (upload résumable, liste paginée,
+flux de changements, métadonnées)
+Utilisé par les benchmarks et les tests, sans accès réseau ni credentials
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import httplib2
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import HttpRequest
+
+CONTENT_RANGE_PATTERN = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+STATUS_QUERY_PATTERN = re.compile(r"bytes \*/(\d+|\*)")
+PARENT_QUERY_PATTERN = re.compile(r"'([^']+)' in parents")
+DEFAULT_PAGE_SIZE = 100
+
+
+class FakeDriveState:
+    """Fichiers et sessions d'upload en mémoire (seuls taille et md5 sont conservés)"""
+
+    def __init__(self):
+        self.files = {}
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.bytes_received = 0
+        # Pannes simulées: les N prochains chunks reçoivent `fail_status` sans être enregistrés
+        self.fail_chunks = 0
+        self.fail_status = 503
+        self.failed_chunks = 0
+        # Pannes aléatoires par chunk: {code HTTP: probabilité}, tirées avec une graine fixe
+        self.error_rates = {}
+        self.random = random.Random(0)
+        # Flux de changements: le jeton de page est l'indice dans cette liste
+        self.changes = []
+        self.list_requests = 0
+        self.changes_requests = 0
+
+    def add_file(self, name, parents=(), size=0, app_properties=None):
+        """Crée directement un fichier (sans upload), retourne sa ressource"""
+        file_id = uuid.uuid4().hex
+        file = {
+            'id': file_id,
+            'name': name,
+            'mimeType': 'video/mp4',
+            'parents': list(parents),
+            'appProperties': dict(app_properties or {}),
+            'size': str(size),
+            'md5Checksum': hashlib.md5(b'\0' * size).hexdigest(),
+            'createdTime': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime()),
+            'webViewLink': f"https://drive.google.com/file/d/{file_id}/view",
+            'trashed': False,
+        }
+        with self.lock:
+            self.files[file_id] = file
+            self.record_change_locked(file_id)
+        return file
+
+    def record_change_locked(self, file_id, removed=False):
+        self.changes.append({'fileId': file_id, 'removed': removed})
+
+
+class FakeDriveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_empty(self, status, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _file_resource(self, file):
+        return {key: value for key, value in file.items() if not key.startswith('_')}
+
+    def do_POST(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        body = self._read_body()
+
+        if parts.path == '/upload/drive/v3/files' and query.get('uploadType') == ['resumable']:
+            metadata = json.loads(body or b'{}')
+            upload_id = uuid.uuid4().hex
+            with self.state.lock:
+                self.state.sessions[upload_id] = {
+                    'metadata': metadata,
+                    'received': 0,
+                    'md5': hashlib.md5(),
+                }
+            host = self.headers.get('Host')
+            location = f"http://{host}/upload/drive/v3/files?uploadType=resumable&upload_id={upload_id}"
+            self._send_empty(200, {'Location': location})
+            return
+
+        self._send_json(404, {'error': {'code': 404, 'message': f'Not found: {parts.path}'}})
+
+    def do_PUT(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        upload_id = (query.get('upload_id') or [None])[0]
+        body = self._read_body()
+
+        with self.state.lock:
+            session = self.state.sessions.get(upload_id)
+        if session is None:
+            self._send_json(404, {'error': {'code': 404, 'message': 'Unknown upload session'}})
+            return
+
+        content_range = self.headers.get('Content-Range', '')
+        status_query = STATUS_QUERY_PATTERN.match(content_range)
+        if status_query:
+            self._send_progress(session)
+            return
+
+        match = CONTENT_RANGE_PATTERN.match(content_range)
+        if not match:
+            self._send_json(400, {'error': {'code': 400, 'message': 'Missing Content-Range'}})
+            return
+
+        start, end, total = int(match.group(1)), int(match.group(2)), match.group(3)
+        with self.state.lock:
+            fail_status = None
+            if self.state.fail_chunks:
+                self.state.fail_chunks -= 1
+                fail_status = self.state.fail_status
+            else:
+                for code, rate in self.state.error_rates.items():
+                    if self.state.random.random() < rate:
+                        fail_status = code
+                        break
+            if fail_status:
+                self.state.failed_chunks += 1
+        if fail_status:
+            self._send_json(fail_status, {'error': {'code': fail_status, 'message': 'Simulated failure'}})
+            return
+
+        with self.state.lock:
+            if start != session['received']:
+                self._send_progress(session)
+                return
+            session['md5'].update(body)
+            session['received'] += len(body)
+            self.state.bytes_received += len(body)
+
+        if total != '*' and end + 1 >= int(total):
+            self._complete(upload_id, session)
+        else:
+            self._send_progress(session)
+
+    def _send_progress(self, session):
+        headers = {}
+        if session['received']:
+            headers['Range'] = f"bytes=0-{session['received'] - 1}"
+        self._send_empty(308, headers)
+
+    def _complete(self, upload_id, session):
+        file_id = uuid.uuid4().hex
+        metadata = session['metadata']
+        file = {
+            'id': file_id,
+            'name': metadata.get('name'),
+            'mimeType': 'video/mp4',
+            'parents': metadata.get('parents', []),
+            'appProperties': metadata.get('appProperties', {}),
+            'size': str(session['received']),
+            'md5Checksum': session['md5'].hexdigest(),
+            'createdTime': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime()),
+            'webViewLink': f"https://drive.google.com/file/d/{file_id}/view",
+            'trashed': False,
+        }
+        with self.state.lock:
+            self.state.files[file_id] = file
+            self.state.record_change_locked(file_id)
+            self.state.sessions.pop(upload_id, None)
+        self._send_json(200, self._file_resource(file))
+
+    def _page(self, items, query):
+        """Découpe `items` selon pageSize/pageToken, retourne (page, nextPageToken)"""
+        page_size = int((query.get('pageSize') or [DEFAULT_PAGE_SIZE])[0])
+        offset = int((query.get('pageToken') or ['0'])[0])
+        page = items[offset:offset + page_size]
+        next_token = str(offset + page_size) if offset + page_size < len(items) else None
+        return page, next_token
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+
+        if parts.path == '/drive/v3/files':
+            # Seuls les filtres "'<id>' in parents" et "trashed = false" sont interprétés
+            q = (query.get('q') or [''])[0]
+            parent = PARENT_QUERY_PATTERN.search(q)
+            with self.state.lock:
+                self.state.list_requests += 1
+                files = [
+                    self._file_resource(file) for file in self.state.files.values()
+                    if (not parent or parent.group(1) in file['parents'])
+                    and not ('trashed = false' in q and file['trashed'])
+                ]
+            page, next_token = self._page(files, query)
+            payload = {'files': page}
+            if next_token:
+                payload['nextPageToken'] = next_token
+            self._send_json(200, payload)
+            return
+
+        if parts.path == '/drive/v3/changes/startPageToken':
+            with self.state.lock:
+                token = str(len(self.state.changes))
+            self._send_json(200, {'startPageToken': token})
+            return
+
+        if parts.path == '/drive/v3/changes':
+            with self.state.lock:
+                self.state.changes_requests += 1
+                changes = [
+                    dict(change, file=self._file_resource(self.state.files[change['fileId']]))
+                    if not change['removed'] and change['fileId'] in self.state.files else dict(change, removed=True)
+                    for change in self.state.changes
+                ]
+            page, next_token = self._page(changes, query)
+            payload = {'changes': page}
+            if next_token:
+                payload['nextPageToken'] = next_token
+            else:
+                payload['newStartPageToken'] = str(len(changes))
+            self._send_json(200, payload)
+            return
+
+        match = re.match(r"^/drive/v3/files/([^/]+)$", parts.path)
+        if match:
+            with self.state.lock:
+                file = self.state.files.get(match.group(1))
+            if file:
+                self._send_json(200, self._file_resource(file))
+            else:
+                self._send_json(404, {'error': {'code': 404, 'message': 'File not found'}})
+            return
+
+        self._send_json(404, {'error': {'code': 404, 'message': f'Not found: {parts.path}'}})
+
+    def do_DELETE(self):
+        match = re.match(r"^/drive/v3/files/([^/]+)$", urlsplit(self.path).path)
+        with self.state.lock:
+            file = self.state.files.pop(match.group(1), None) if match else None
+            if file:
+                self.state.record_change_locked(file['id'], removed=True)
+        if file:
+            self._send_empty(204)
+        else:
+            self._send_json(404, {'error': {'code': 404, 'message': 'File not found'}})
+
+
+class FakeDriveHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # File d'attente large: uploads simultanés des benchmarks
+    request_queue_size = 1024
+
+
+class FakeDriveServer:
+    """Lance le faux serveur Drive dans un thread
+
+    Exemple:
+        with FakeDriveServer() as server:
+            service = server.build_service()
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        self.httpd = FakeDriveHTTPServer((host, port), FakeDriveHandler)
+        self.httpd.state = FakeDriveState()
+        self.httpd.latency = latency
+        self.thread = None
+
+    @property
+    def state(self):
+        return self.httpd.state
+
+    def stats(self):
+        state = self.state
+        with state.lock:
+            return {
+                'files': len(state.files),
+                'bytes_received': state.bytes_received,
+                'failed_chunks': state.failed_chunks,
+                'list_requests': state.list_requests,
+                'changes_requests': state.changes_requests,
+            }
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='fake-drive', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def build_service(self):
+        """Construit un client Drive v3 pointant vers ce serveur"""
+        return build_drive_service(self.base_url)
+
+
+def build_drive_service(base_url, timeout=30):
+    """Client Drive v3 pointant vers un faux serveur Drive (`base_url` terminée par /)
+
+    Comme GoogleDriveManager, chaque thread a son propre transport httplib2:
+    une connexion partagée entre les workers d'upload mélange les réponses
+    et bloque les threads indéfiniment.
+    """
+    def new_http():
+        http = httplib2.Http(timeout=timeout)
+        # Comme build_http(): « 308 Resume Incomplete » n'est pas une redirection
+        http.redirect_codes = http.redirect_codes - {308}
+        return http
+
+    document = json.loads(get_static_doc('drive', 'v3'))
+    document['rootUrl'] = base_url
+    document['baseUrl'] = base_url + 'drive/v3/'
+    local = threading.local()
+
+    def thread_request(http, *args, **kwargs):
+        if not hasattr(local, 'http'):
+            local.http = new_http()
+        return HttpRequest(local.http, *args, **kwargs)
+
+    return build_from_document(document, http=new_http(), requestBuilder=thread_request)
+
+
+if __name__ == '__main__':
+    server = FakeDriveServer(port=8765)
+    print(f"Faux serveur Google Drive en écoute sur {server.base_url}")
+    server.httpd.serve_forever()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Serveurs locaux simulant YouTube pour les tests et benchmarks hors ligne
+FakeGoogleVideoServer: flux média avec support Range et débit limité par connexion
+FakeInnerTubeServer: API player innertube et page watch (clients IOS, ANDROID_VR)
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RANGE_PATTERN = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+def media_bytes(size):
+    """Contenu déterministe d'une vidéo simulée (vérifiable côté client)"""
+    pattern = bytes(range(256))
+    return (pattern * (size // 256 + 1))[:size]
+
+
+def next_error(server):
+    """Code d'erreur simulé pour la requête courante, ou None
+
+    Les erreurs injectées (`inject_errors`) passent en premier, puis chaque
+    code de `error_rates` est tiré avec sa probabilité (générateur à graine
+    fixe: une même charge produit les mêmes erreurs d'un essai à l'autre).
+    """
+    with server.lock:
+        status = server.error_statuses.pop(0) if server.error_statuses else None
+        if status is None:
+            for code, rate in server.error_rates.items():
+                if server.random.random() < rate:
+                    status = code
+                    break
+        if status is not None:
+            server.errors_sent[status] = server.errors_sent.get(status, 0) + 1
+    return status
+
+
+def init_error_injection(httpd, seed=0):
+    """Attributs lus par next_error() sur le serveur HTTP"""
+    httpd.error_statuses = []
+    httpd.error_rates = {}
+    httpd.errors_sent = {}
+    httpd.random = random.Random(seed)
+
+
+class FakeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # File d'attente large: les benchmarks ouvrent des centaines de connexions simultanées
+    request_queue_size = 1024
+
+
+class GoogleVideoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        content = server.content
+        size = len(content)
+        start, end = 0, size - 1
+
+        range_header = self.headers.get('Range')
+        match = RANGE_PATTERN.match(range_header) if range_header else None
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else size - 1, size - 1)
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{size}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+        with server.lock:
+            server.requests += 1
+        error_status = next_error(server)
+        if error_status:
+            self.send_response(error_status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        self.send_response(206 if match else 200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        if match:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+        # Débit limité par connexion, comme googlevideo
+        block = 64 * 1024
+        rate = server.bytes_per_second_per_connection
+        started = time.perf_counter()
+        sent = 0
+        position = start
+        try:
+            while position <= end:
+                data = content[position:min(position + block, end + 1)]
+                self.wfile.write(data)
+                position += len(data)
+                sent += len(data)
+                if rate:
+                    delay = sent / rate - (time.perf_counter() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class FakeGoogleVideoServer:
+    """Sert un média simulé avec débit limité par connexion
+
+    Exemple:
+        with FakeGoogleVideoServer(size=64 * 1024 * 1024, bytes_per_second_per_connection=10e6) as server:
+            url = server.url
+    """
+
+    def __init__(self, size, bytes_per_second_per_connection=0, latency=0.0, host='127.0.0.1', port=0):
+        self.httpd = FakeHTTPServer((host, port), GoogleVideoHandler)
+        self.httpd.content = media_bytes(size)
+        self.httpd.bytes_per_second_per_connection = bytes_per_second_per_connection
+        self.httpd.latency = latency
+        init_error_injection(self.httpd)
+        self.httpd.requests = 0
+        self.httpd.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/videoplayback?itag=18"
+
+    def inject_errors(self, *statuses):
+        """Les prochaines requêtes répondront avec ces codes HTTP"""
+        with self.httpd.lock:
+            self.httpd.error_statuses.extend(statuses)
+
+    def set_error_rates(self, rates):
+        """Chaque requête reçoit le code `status` avec la probabilité `rates[status]`"""
+        with self.httpd.lock:
+            self.httpd.error_rates = dict(rates)
+
+    def stats(self):
+        with self.httpd.lock:
+            return {'requests': self.httpd.requests, 'errors_sent': dict(self.httpd.errors_sent)}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='fake-googlevideo', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# Formats progressifs servis par le faux innertube: (itag, qualité, largeur, hauteur)
+PROGRESSIVE_FORMATS = [(18, '360p', 640, 360), (22, '720p', 1280, 720)]
+YOUTUBE_URL_PREFIX = re.compile(r"^https://(www\.)?youtube\.com")
+
+
+def youtube_url_rewriter(base_url):
+    """Fonction redirigeant les URL https://(www.)youtube.com vers `base_url`"""
+    return lambda url: YOUTUBE_URL_PREFIX.sub(base_url, url, count=1)
+
+
+def install_youtube_redirect(base_url):
+    """Redirige les requêtes synchrones de pytubefix vers un faux innertube"""
+    from pytubefix import request
+
+    rewrite = youtube_url_rewriter(base_url)
+    original = getattr(request.urlopen, '__wrapped__', request.urlopen)
+
+    def redirected_urlopen(req, *args, **kwargs):
+        req.full_url = rewrite(req.full_url)
+        return original(req, *args, **kwargs)
+
+    redirected_urlopen.__wrapped__ = original
+    request.urlopen = redirected_urlopen
+
+
+class InnerTubeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # En-têtes et corps écrits séparément: sans TCP_NODELAY, Nagle + ACK retardé
+    # ajoutent ~40 ms par réponse sur les connexions keep-alive
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if not self.path.startswith('/youtubei/v1/player'):
+            self._send(404, 'application/json', b'{}')
+            return
+        with server.lock:
+            server.requests += 1
+            server.player_requests += 1
+        error_status = next_error(server)
+        if server.latency:
+            time.sleep(server.latency)
+        if error_status:
+            self._send(error_status, 'application/json', b'{}')
+            return
+        video_id = json.loads(body or b'{}').get('videoId', 'unknown')
+        self._send(200, 'application/json', json.dumps(server.player_response(video_id)).encode())
+
+    def do_GET(self):
+        server = self.server
+        if not self.path.startswith('/watch'):
+            self._send(404, 'text/html', b'')
+            return
+        with server.lock:
+            server.requests += 1
+            server.watch_requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+        html = (
+            '<html><head>'
+            '<meta itemprop="datePublished" content="2024-01-15T08:00:00-07:00">'
+            '</head><body></body></html>'
+        )
+        self._send(200, 'text/html; charset=utf-8', html.encode())
+
+    def _send(self, status, content_type, content):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeInnerTubeServer:
+    """Simule l'API innertube (/youtubei/v1/player) et la page watch
+
+    Les réponses player contiennent des URL de flux directes (sans
+    signature à déchiffrer), ce qui suffit aux clients sans base.js ni
+    PO token (IOS, ANDROID_VR). `media_url` pointe vers un
+    FakeGoogleVideoServer si les téléchargements doivent aussi être simulés.
+    """
+
+    def __init__(self, latency=0.0, media_url='http://127.0.0.1:9/videoplayback', media_size=1024 * 1024,
+                 host='127.0.0.1', port=0):
+        self.httpd = FakeHTTPServer((host, port), InnerTubeHandler)
+        self.httpd.latency = latency
+        init_error_injection(self.httpd)
+        self.httpd.requests = 0
+        self.httpd.player_requests = 0
+        self.httpd.watch_requests = 0
+        self.httpd.lock = threading.Lock()
+        self.httpd.player_response = self.player_response
+        self.media_url = media_url
+        self.media_size = media_size
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def player_response(self, video_id):
+        formats = [
+            {
+                'itag': itag,
+                'url': f"{self.media_url.split('?')[0]}?itag={itag}&id={video_id}",
+                'mimeType': 'video/mp4; codecs="avc1.42001E, mp4a.40.2"',
+                'bitrate': 500000,
+                'width': width,
+                'height': height,
+                'contentLength': str(self.media_size),
+                'lastModified': '1700000000000000',
+                'quality': 'medium',
+                'qualityLabel': label,
+                'fps': 30,
+                'approxDurationMs': '60000',
+                'audioQuality': 'AUDIO_QUALITY_LOW',
+            }
+            for itag, label, width, height in PROGRESSIVE_FORMATS
+        ]
+        return {
+            'responseContext': {'visitorData': 'CgtGYWtlVmlzaXRvcg%3D%3D'},
+            'playabilityStatus': {'status': 'OK'},
+            'videoDetails': {
+                'videoId': video_id,
+                'title': f"Vidéo simulée {video_id}",
+                'author': 'Chaîne simulée',
+                'lengthSeconds': '60',
+                'viewCount': '1234',
+                'shortDescription': 'Description simulée',
+                'thumbnail': {'thumbnails': [{'url': f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"}]},
+            },
+            'playerConfig': {'mediaCommonConfig': {'mediaUstreamerRequestConfig': {'videoPlaybackUstreamerConfig': ''}}},
+            'streamingData': {'expiresInSeconds': '21540', 'formats': formats, 'adaptiveFormats': []},
+        }
+
+    def inject_errors(self, *statuses):
+        """Les prochaines requêtes player répondront avec ces codes HTTP"""
+        with self.httpd.lock:
+            self.httpd.error_statuses.extend(statuses)
+
+    def set_error_rates(self, rates):
+        """Chaque requête player reçoit le code `status` avec la probabilité `rates[status]`"""
+        with self.httpd.lock:
+            self.httpd.error_rates = dict(rates)
+
+    def stats(self):
+        with self.httpd.lock:
+            return {
+                'requests': self.httpd.requests,
+                'player_requests': self.httpd.player_requests,
+                'watch_requests': self.httpd.watch_requests,
+                'errors_sent': dict(self.httpd.errors_sent),
+            }
+
+    def url_rewriter(self):
+        return youtube_url_rewriter(self.base_url)
+
+    def install_redirect(self):
+        install_youtube_redirect(self.base_url)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='fake-innertube', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -1,58 +1,407 @@
 import os
 import io
+import collections
+import datetime
+import http.client
+import threading
+import time
+import httplib2
+from concurrent.futures import ThreadPoolExecutor
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
+from googleapiclient.http import HttpRequest, MediaIoBaseUpload, MediaUpload, build_http
 from googleapiclient.errors import HttpError
 from config import Config
+from drive_index import DriveFolderIndex, FILE_FIELDS
+from retry import backoff_delay
 import tempfile
 
+# Les chunks de l'upload résumable doivent être un multiple de 256 Ko
+UPLOAD_CHUNK_ALIGNMENT = 256 * 1024
+UPLOAD_CHUNK_SIZE = max(1, -(-Config.DRIVE_UPLOAD_CHUNK_SIZE // UPLOAD_CHUNK_ALIGNMENT)) * UPLOAD_CHUNK_ALIGNMENT
+# Quantité maximale de données en attente en mémoire entre le téléchargement et l'upload
+PIPE_MAX_BYTES = 16 * 1024 * 1024
+# Échecs transitoires d'un chunk, relancés via l'URI de la session résumable
+RETRYABLE_UPLOAD_STATUSES = (429, 500, 502, 503, 504)
+RETRYABLE_UPLOAD_ERRORS = (ConnectionError, TimeoutError, http.client.HTTPException, httplib2.HttpLib2Error)
+
+
+class PipeAborted(Exception):
+    """Levée côté producteur quand le consommateur a abandonné l'upload"""
+
+
+class ChunkPipe:
+    """Tampon borné entre le téléchargement (producteur) et l'upload (consommateur)
+
+    Avec `spill=True`, au-delà de `max_bytes` en mémoire, les chunks sont
+    écrits dans un fichier temporaire relu dans l'ordre par le consommateur:
+    le téléchargement avance à pleine vitesse pendant que l'upload se vide.
+    Le fichier est borné par `spill_max_bytes` (None = sans limite); une fois
+    atteint, le producteur est bloqué jusqu'à ce que l'upload l'ait relu.
+    """
+
+    def __init__(self, max_bytes=PIPE_MAX_BYTES, spill=False, spill_folder=None, spill_max_bytes=None):
+        self.max_bytes = max_bytes
+        self.spill = spill
+        self.spill_folder = spill_folder
+        self.spill_max_bytes = spill_max_bytes
+        self.peak_bytes = 0
+        self.spilled_bytes = 0
+        self._chunks = collections.deque()
+        self._size = 0
+        self._spool = None
+        self._spool_written = 0
+        self._spool_read = 0
+        self._closed = False
+        self._aborted = False
+        self._error = None
+        self._cond = threading.Condition()
+
+    @property
+    def error(self):
+        """Erreur du producteur (téléchargement), ou None"""
+        return self._error
+
+    def write(self, chunk):
+        """Ajoute un chunk, bloque tant que le tampon (mémoire, puis disque en mode spill) est plein"""
+        with self._cond:
+            while True:
+                if self._aborted:
+                    raise PipeAborted("Upload interrompu par le consommateur")
+                # Un chunk plus gros que le tampon est accepté quand celui-ci est vide
+                memory_full = self._size and self._size + len(chunk) > self.max_bytes
+                # Une fois le débordement commencé, l'ordre impose de passer par le disque
+                if self.spill and (self._spool_written > self._spool_read or memory_full):
+                    # Le fichier n'est vidé qu'une fois entièrement relu: sa taille est _spool_written
+                    if not (self.spill_max_bytes and self._spool_written
+                            and self._spool_written + len(chunk) > self.spill_max_bytes):
+                        self._spill_locked(chunk)
+                        return
+                elif not memory_full:
+                    break
+                self._cond.wait()
+            self._chunks.append(memoryview(chunk))
+            self._size += len(chunk)
+            self.peak_bytes = max(self.peak_bytes, self._size)
+            self._cond.notify_all()
+
+    def _spill_locked(self, chunk):
+        if self._spool is None:
+            self._spool = tempfile.TemporaryFile(dir=self.spill_folder or None)
+        os.pwrite(self._spool.fileno(), chunk, self._spool_written)
+        self._spool_written += len(chunk)
+        self.spilled_bytes += len(chunk)
+        self._cond.notify_all()
+
+    def close(self, error=None):
+        """Signale la fin du flux (ou son échec si `error` est fourni)"""
+        with self._cond:
+            self._closed = True
+            self._error = error
+            self._cond.notify_all()
+
+    def abort(self):
+        """Débloque et interrompt le producteur, libère le tampon disque"""
+        with self._cond:
+            self._aborted = True
+            self._chunks.clear()
+            self._size = 0
+            self._close_spool_locked()
+            self._cond.notify_all()
+
+    def _close_spool_locked(self):
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        self._spool_written = self._spool_read = 0
+
+    def read(self, size):
+        """Lit exactement `size` octets, ou moins si le flux est terminé"""
+        parts = []
+        remaining = size
+        with self._cond:
+            while remaining > 0:
+                while not self._chunks and self._spool_read == self._spool_written and not self._closed:
+                    self._cond.wait()
+                if self._chunks:
+                    chunk = self._chunks.popleft()
+                    if len(chunk) > remaining:
+                        self._chunks.appendleft(chunk[remaining:])
+                        chunk = chunk[:remaining]
+                    self._size -= len(chunk)
+                elif self._spool_read < self._spool_written:
+                    chunk = os.pread(
+                        self._spool.fileno(), min(remaining, self._spool_written - self._spool_read), self._spool_read
+                    )
+                    self._spool_read += len(chunk)
+                    if self._spool_read == self._spool_written:
+                        # Débordement résorbé: retour au tampon mémoire
+                        self._close_spool_locked()
+                else:
+                    if self._error:
+                        raise self._error
+                    break
+                parts.append(chunk)
+                remaining -= len(chunk)
+                self._cond.notify_all()
+        return b''.join(parts)
+
+
+class PipeMediaUpload(MediaUpload):
+    """MediaUpload résumable alimenté par un ChunkPipe
+
+    Seul le chunk en cours d'envoi est conservé en mémoire, afin de pouvoir
+    le renvoyer si Drive n'en confirme qu'une partie.
+    """
+
+    def __init__(self, pipe, size=None, mimetype='video/mp4', chunksize=UPLOAD_CHUNK_SIZE):
+        super().__init__()
+        self._pipe = pipe
+        self._size = size
+        self._mimetype = mimetype
+        self._chunksize = chunksize
+        self._buffer = b''
+        self._buffer_start = 0
+
+    def chunksize(self):
+        return self._chunksize
+
+    def mimetype(self):
+        return self._mimetype
+
+    def size(self):
+        return self._size
+
+    def resumable(self):
+        return True
+
+    def has_stream(self):
+        return False
+
+    def getbytes(self, begin, length):
+        if begin < self._buffer_start:
+            raise ValueError(f"Position {begin} déjà libérée (début du tampon: {self._buffer_start})")
+
+        # Libérer les octets déjà confirmés par Drive
+        skip = begin - self._buffer_start
+        if skip > len(self._buffer):
+            self._pipe.read(skip - len(self._buffer))
+            skip = len(self._buffer)
+        self._buffer = self._buffer[skip:]
+        self._buffer_start = begin
+
+        if len(self._buffer) < length:
+            self._buffer += self._pipe.read(length - len(self._buffer))
+        return self._buffer[:length]
+
+
 class GoogleDriveManager:
     def __init__(self):
         self.creds = None
         self.service = None
         self.folder_id = Config.GOOGLE_DRIVE_FOLDER_ID
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._persisted_token = None
+        self._refresher = None
+        self._refresher_lock = threading.Lock()
+        self._stop_refresh = threading.Event()
+        # Pool d'upload borné: ses threads durent, chacun garde son transport
+        # HTTP (et sa connexion keep-alive) d'un upload à l'autre
+        self.upload_workers = Config.DRIVE_UPLOAD_WORKERS
+        self._upload_pool = ThreadPoolExecutor(max_workers=self.upload_workers, thread_name_prefix='drive-upload')
+        self._stats_lock = threading.Lock()
+        self._uploads_queued = 0
+        self._uploads_active = 0
+        self.chunk_retries = 0
+        self.spilled_bytes = 0
+        self.folder_index = DriveFolderIndex(
+            self._require_service, self.folder_id,
+            Config.DRIVE_INDEX_SYNC_INTERVAL, Config.DRIVE_INDEX_PAGE_SIZE
+        )
         
     def authenticate(self):
-        """Authentification avec Google Drive API"""
-        try:
-            # Vérifier si le fichier de token existe
-            if os.path.exists(Config.GOOGLE_DRIVE_TOKEN_FILE):
-                self.creds = Credentials.from_authorized_user_file(
-                    Config.GOOGLE_DRIVE_TOKEN_FILE, 
-                    Config.GOOGLE_DRIVE_SCOPES
-                )
-            
-            # Si pas de credentials valides ou expirés, demander une nouvelle authentification
-            if not self.creds or not self.creds.valid:
-                if self.creds and self.creds.expired and self.creds.refresh_token:
-                    self.creds.refresh(Request())
-                else:
-                    if not os.path.exists(Config.GOOGLE_DRIVE_CREDENTIALS_FILE):
-                        raise FileNotFoundError(
-                            f"Fichier de credentials Google Drive non trouvé: {Config.GOOGLE_DRIVE_CREDENTIALS_FILE}\n"
-                            "Veuillez télécharger le fichier credentials.json depuis Google Cloud Console"
+        """Authentification avec Google Drive API
+
+        Les credentials et le service sont conservés pour toute la durée du
+        processus: les appels suivants ne relisent pas token.json.
+        """
+        with self._lock:
+            if self.service and self.creds and self.creds.valid:
+                return True
+            try:
+                # Vérifier si le fichier de token existe
+                if not self.creds and os.path.exists(Config.GOOGLE_DRIVE_TOKEN_FILE):
+                    self.creds = Credentials.from_authorized_user_file(
+                        Config.GOOGLE_DRIVE_TOKEN_FILE, 
+                        Config.GOOGLE_DRIVE_SCOPES
+                    )
+                    self._persisted_token = self.creds.to_json()
+                
+                # Si pas de credentials valides ou expirés, demander une nouvelle authentification
+                if not self.creds or not self.creds.valid:
+                    if self.creds and self.creds.expired and self.creds.refresh_token:
+                        self.creds.refresh(Request())
+                    else:
+                        if not os.path.exists(Config.GOOGLE_DRIVE_CREDENTIALS_FILE):
+                            raise FileNotFoundError(
+                                f"Fichier de credentials Google Drive non trouvé: {Config.GOOGLE_DRIVE_CREDENTIALS_FILE}\n"
+                                "Veuillez télécharger le fichier credentials.json depuis Google Cloud Console"
+                            )
+                        
+                        flow = InstalledAppFlow.from_client_secrets_file(
+                            Config.GOOGLE_DRIVE_CREDENTIALS_FILE, 
+                            Config.GOOGLE_DRIVE_SCOPES
                         )
+                        self.creds = flow.run_local_server(port=0)
+                        # Les transports existants référencent les anciens credentials
+                        self._local = threading.local()
                     
-                    flow = InstalledAppFlow.from_client_secrets_file(
-                        Config.GOOGLE_DRIVE_CREDENTIALS_FILE, 
-                        Config.GOOGLE_DRIVE_SCOPES
+                    # Sauvegarder les credentials pour la prochaine utilisation
+                    self._persist_token_locked()
+                
+                # Construire le service Google Drive une seule fois (analyse du document de discovery)
+                if not self.service:
+                    self.service = build(
+                        'drive', 'v3',
+                        http=self._thread_http(),
+                        requestBuilder=self._build_request,
+                        cache_discovery=False
                     )
-                    self.creds = flow.run_local_server(port=0)
+                self._start_refresher()
+                return True
                 
-                # Sauvegarder les credentials pour la prochaine utilisation
-                with open(Config.GOOGLE_DRIVE_TOKEN_FILE, 'w') as token:
-                    token.write(self.creds.to_json())
-            
-            # Construire le service Google Drive
-            self.service = build('drive', 'v3', credentials=self.creds)
-            return True
-            
-        except Exception as e:
-            print(f"Erreur d'authentification Google Drive: {e}")
-            return False
+            except Exception as e:
+                print(f"Erreur d'authentification Google Drive: {e}")
+                return False
+    
+    def _require_service(self):
+        """Service Drive authentifié, ou exception"""
+        if not self.service and not self.authenticate():
+            raise RuntimeError("Échec de l'authentification Google Drive")
+        return self.service
+    
+    def _thread_http(self):
+        """Transport HTTP propre au thread courant (httplib2 n'est pas thread-safe)
+
+        build_http() retire 308 des redirections suivies par httplib2: Drive
+        répond « 308 Resume Incomplete » sans Location entre deux chunks.
+        """
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = AuthorizedHttp(self.creds, http=build_http())
+            self._local.http = http
+        return http
+    
+    def _build_request(self, http, *args, **kwargs):
+        """requestBuilder du service: chaque requête utilise le transport du thread appelant"""
+        return HttpRequest(self._thread_http(), *args, **kwargs)
+    
+    def _persist_token_locked(self):
+        """Écrit token.json uniquement si son contenu a changé"""
+        token_json = self.creds.to_json()
+        if token_json == self._persisted_token:
+            return
+        temp_path = f"{Config.GOOGLE_DRIVE_TOKEN_FILE}.tmp"
+        with open(temp_path, 'w') as token:
+            token.write(token_json)
+        os.replace(temp_path, Config.GOOGLE_DRIVE_TOKEN_FILE)
+        self._persisted_token = token_json
+    
+    def _seconds_until_refresh(self):
+        expiry = self.creds.expiry if self.creds else None
+        if not expiry:
+            return Config.GOOGLE_DRIVE_REFRESH_MARGIN
+        remaining = (expiry - datetime.datetime.utcnow()).total_seconds()
+        return max(remaining - Config.GOOGLE_DRIVE_REFRESH_MARGIN, 1)
+    
+    def _start_refresher(self):
+        with self._refresher_lock:
+            if self._refresher and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, name='drive-refresh', daemon=True)
+            self._refresher.start()
+    
+    def warm_up(self):
+        """Démarre le rafraîchissement en arrière-plan: l'index du dossier est chargé sans attendre une requête"""
+        self._start_refresher()
+    
+    def _next_refresh(self):
+        delay = self.folder_index.seconds_until_sync()
+        if self.creds and self.creds.refresh_token:
+            delay = min(delay, self._seconds_until_refresh())
+        # Plancher: un intervalle de synchronisation nul ne fait pas tourner le thread à vide
+        return max(delay, 0.1)
+    
+    def _refresh_loop(self):
+        """Rafraîchit en arrière-plan le token avant son expiration et l'index du dossier Drive
+
+        Seul ce thread interroge Drive pour l'index: les recherches des
+        requêtes (find_video) ne lisent que la mémoire.
+        """
+        while not self._stop_refresh.wait(self._next_refresh()):
+            try:
+                with self._lock:
+                    if self.creds and self.creds.refresh_token and self._seconds_until_refresh() <= 1:
+                        self.creds.refresh(Request())
+                        self._persist_token_locked()
+                        print("Token Google Drive rafraîchi en arrière-plan")
+            except Exception as e:
+                print(f"Échec du rafraîchissement du token Google Drive: {e}")
+                self._stop_refresh.wait(60)
+                continue
+            try:
+                self.folder_index.ensure_fresh()
+            except Exception as e:
+                print(f"Échec de la synchronisation de l'index Google Drive: {e}")
+                self._stop_refresh.wait(60)
+    
+    def stop(self):
+        """Arrête le rafraîchissement en arrière-plan et le pool d'upload"""
+        self._stop_refresh.set()
+        self._upload_pool.shutdown(wait=False, cancel_futures=True)
+    
+    def upload_stats(self):
+        """État du pool d'upload, exposé dans /health"""
+        with self._stats_lock:
+            return {
+                'workers': self.upload_workers,
+                'active': self._uploads_active,
+                'queued': self._uploads_queued,
+                'chunk_size': UPLOAD_CHUNK_SIZE,
+                'chunk_retries': self.chunk_retries,
+                'spilled_bytes': self.spilled_bytes,
+            }
+    
+    def _next_chunk(self, upload_request, pipe=None):
+        """next_chunk() relancé sur les échecs transitoires (5xx, 429, réseau)
+
+        Après une erreur, googleapiclient interroge d'abord l'URI de la
+        session résumable pour connaître les octets reçus: seul le chunk en
+        échec est renvoyé, pas le fichier entier.
+        """
+        failures = 0
+        while True:
+            try:
+                return upload_request.next_chunk()
+            except Exception as e:
+                if isinstance(e, HttpError):
+                    retryable = e.resp.status in RETRYABLE_UPLOAD_STATUSES
+                else:
+                    retryable = isinstance(e, RETRYABLE_UPLOAD_ERRORS)
+                # Une erreur du téléchargement (producteur) n'est pas relancée ici
+                if not retryable or failures >= Config.DRIVE_CHUNK_RETRIES or (pipe and pipe.error is not None):
+                    raise
+                failures += 1
+                with self._stats_lock:
+                    self.chunk_retries += 1
+                delay = backoff_delay(failures, Config.RETRY_DELAY_MIN, Config.RETRY_DELAY_MAX, Config.RETRY_BACKOFF_MAX)
+                print(f"Chunk Drive en échec ({e}), reprise de la session dans {delay:.1f}s "
+                      f"(tentative {failures}/{Config.DRIVE_CHUNK_RETRIES})")
+                time.sleep(delay)
     
     def upload_video(self, video_data, filename, mime_type='video/mp4'):
         """Upload une vidéo sur Google Drive"""
@@ -71,15 +420,19 @@ class GoogleDriveManager:
             media = MediaIoBaseUpload(
                 io.BytesIO(video_data),
                 mimetype=mime_type,
+                chunksize=UPLOAD_CHUNK_SIZE,
                 resumable=True
             )
             
-            # Upload du fichier
-            file = self.service.files().create(
+            # Upload du fichier, chunk par chunk
+            upload_request = self.service.files().create(
                 body=file_metadata,
                 media_body=media,
                 fields='id,name,webViewLink'
-            ).execute()
+            )
+            file = None
+            while file is None:
+                _, file = self._next_chunk(upload_request)
             
             file_id = file.get('id')
             web_view_link = file.get('webViewLink')
@@ -100,28 +453,156 @@ class GoogleDriveManager:
             print(error_details)
             return False, error_details
     
-    def list_files(self, folder_id=None):
-        """Lister les fichiers dans un dossier Google Drive"""
+    def upload_stream(self, chunks, filename, size=None, mime_type='video/mp4', progress_callback=None,
+                      app_properties=None):
+        """Upload en flux sur Google Drive sans matérialiser le fichier
+
+        L'upload s'exécute dans le pool d'upload (DRIVE_UPLOAD_WORKERS) pendant
+        que le thread appelant consomme les chunks. Un Drive lent ou un pool
+        saturé ne freine pas le téléchargement: le surplus déborde du tampon
+        mémoire vers un fichier temporaire. `app_properties` (video_id,
+        résolution) permet de retrouver la vidéo dans l'index du dossier.
+
+        Une erreur levée par `chunks` (téléchargement YouTube) est relancée
+        telle quelle pour que l'appelant puisse retenter le transfert; seules
+        les erreurs côté Drive sont retournées sous forme (False, message).
+        """
+        producer_error = None
         try:
             if not self.service:
                 if not self.authenticate():
                     return False, "Échec de l'authentification Google Drive"
             
-            folder_id = folder_id or self.folder_id
-            query = f"'{folder_id}' in parents" if folder_id else ""
+            pipe = ChunkPipe(
+                spill=Config.DRIVE_SPILL_ENABLED, spill_folder=Config.DRIVE_SPOOL_FOLDER,
+                spill_max_bytes=Config.DRIVE_SPILL_MAX_BYTES or None
+            )
+            with self._stats_lock:
+                self._uploads_queued += 1
+            future = self._upload_pool.submit(
+                self._upload_pipe, pipe, filename, size, mime_type, progress_callback, app_properties
+            )
             
-            results = self.service.files().list(
-                q=query,
-                pageSize=10,
-                fields="nextPageToken, files(id, name, mimeType, createdTime, webViewLink)"
-            ).execute()
+            try:
+                for chunk in chunks:
+                    pipe.write(chunk)
+            except PipeAborted:
+                # L'upload s'est arrêté: son erreur est remontée par future.result()
+                pass
+            except Exception as e:
+                producer_error = e
+                pipe.close(error=e)
+                if future.cancel():
+                    # L'upload attendait encore une place dans le pool
+                    with self._stats_lock:
+                        self._uploads_queued -= 1
+                    pipe.abort()
+                    raise
+            else:
+                pipe.close()
             
-            files = results.get('files', [])
+            try:
+                file = future.result()
+            except Exception:
+                # L'upload s'est arrêté faute de données: l'erreur utile est celle du téléchargement
+                if producer_error is not None:
+                    raise producer_error
+                raise
+            self.folder_index.add(file)
+            return True, {
+                'file_id': file.get('id'),
+                'filename': filename,
+                'web_view_link': file.get('webViewLink'),
+                'message': f'Vidéo uploadée avec succès sur Google Drive: {filename}'
+            }
+            
+        except HttpError as error:
+            if error is producer_error:
+                raise
+            error_details = f"Erreur Google Drive API: {error}"
+            print(error_details)
+            return False, error_details
+        except Exception as e:
+            if e is producer_error:
+                raise
+            error_details = f"Erreur lors de l'upload Google Drive: {e}"
+            print(error_details)
+            return False, error_details
+    
+    def _upload_pipe(self, pipe, filename, size, mime_type, progress_callback, app_properties=None):
+        """Exécuté dans le pool d'upload: envoie le contenu du pipe, retourne le fichier créé"""
+        with self._stats_lock:
+            self._uploads_queued -= 1
+            self._uploads_active += 1
+        try:
+            file_metadata = {
+                'name': filename,
+                'parents': [self.folder_id] if self.folder_id else []
+            }
+            if app_properties:
+                file_metadata['appProperties'] = app_properties
+            media = PipeMediaUpload(pipe, size=size, mimetype=mime_type)
+            upload_request = self.service.files().create(
+                body=file_metadata,
+                media_body=media,
+                fields=FILE_FIELDS
+            )
+            file = None
+            while file is None:
+                status, file = self._next_chunk(upload_request, pipe)
+                if status and progress_callback:
+                    progress_callback(status.resumable_progress, size)
+            return file
+        finally:
+            # Débloque le producteur si l'upload s'est arrêté en cours de route
+            pipe.abort()
+            with self._stats_lock:
+                self._uploads_active -= 1
+                self.spilled_bytes += pipe.spilled_bytes
+    
+    def list_files(self, folder_id=None):
+        """Lister les fichiers d'un dossier Google Drive
+
+        Le dossier configuré est servi par l'index en mémoire (tenu à jour
+        par le flux de changements); un autre dossier est listé en direct,
+        toutes pages confondues.
+        """
+        try:
+            if not self.service:
+                if not self.authenticate():
+                    return False, "Échec de l'authentification Google Drive"
+            
+            if not folder_id or folder_id == self.folder_id:
+                self.folder_index.ensure_fresh()
+                return True, self.folder_index.files()
+            
+            files = []
+            request = self.service.files().list(
+                q=f"'{folder_id}' in parents and trashed = false",
+                pageSize=Config.DRIVE_INDEX_PAGE_SIZE,
+                fields="nextPageToken, files(id, name, mimeType, size, createdTime, webViewLink)"
+            )
+            while request is not None:
+                results = request.execute()
+                files.extend(results.get('files', []))
+                request = self.service.files().list_next(request, results)
             return True, files
             
         except Exception as e:
             return False, f"Erreur lors de la liste des fichiers: {e}"
     
+    def find_video(self, video_id, resolution):
+        """Fichier Drive déjà uploadé pour cette vidéo et cette résolution, via l'index
+
+        Aucune requête réseau: l'index est chargé puis synchronisé par le
+        thread d'arrière-plan. Retourne (success, fichier ou None); tant que
+        le premier chargement n'est pas terminé, (False, message).
+        """
+        if self.folder_index.loaded_at is None:
+            self._start_refresher()
+            return False, "Index Google Drive en cours de chargement"
+        return True, self.folder_index.find(video_id, resolution)
+    
     def get_folder_info(self):
         """Obtenir les informations du dossier de destination"""
         try:
@@ -141,3 +622,16 @@ class GoogleDriveManager:
             
         except Exception as e:
             return False, f"Erreur lors de la récupération des infos du dossier: {e}"
+
+
+_drive_manager = None
+_drive_manager_lock = threading.Lock()
+
+
+def get_drive_manager():
+    """Retourne le GoogleDriveManager partagé par tout le processus"""
+    global _drive_manager
+    with _drive_manager_lock:
+        if _drive_manager is None:
+            _drive_manager = GoogleDriveManager()
+        return _drive_manager
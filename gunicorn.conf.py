@@ -0,0 +1,52 @@
+"""
+Configuration gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
+
+Redémarrage gracieux: kill -HUP <pid du maître> (nouveaux workers, les
+anciens terminent leurs requêtes et jobs en cours pendant graceful_timeout).
+"""
+
+import glob
+import os
+import tempfile
+
+# Lu par config.py dans chaque worker: les workers héritent de l'environnement du maître
+os.environ.setdefault('SHARED_STATE_DB', 'shared_state.db')
+# Mode multi-processus de prometheus_client: /metrics agrège les valeurs de tous les workers
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'ytapi-prometheus'))
+
+from config import Config
+# Importé au chargement: un import dans child_exit (gestionnaire de SIGCHLD) peut être réentrant
+from prometheus_client import multiprocess
+
+bind = Config.SERVER_BIND
+workers = Config.WEB_WORKERS
+# Threads par worker: les téléchargements et flux SSE sont de longues requêtes bloquantes
+worker_class = 'gthread'
+threads = Config.WEB_THREADS
+graceful_timeout = Config.WEB_GRACEFUL_TIMEOUT
+max_requests = Config.WEB_MAX_REQUESTS
+max_requests_jitter = Config.WEB_MAX_REQUESTS_JITTER
+# L'application est importée après le fork: SQLite et les threads ne survivent pas à un fork
+preload_app = False
+
+
+def on_starting(server):
+    """Démarrage du maître: dossier des métriques créé, valeurs d'une exécution précédente effacées"""
+    folder = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(folder, exist_ok=True)
+    for path in glob.glob(os.path.join(folder, '*.db')):
+        os.remove(path)
+
+
+def worker_exit(server, worker):
+    """Fin d'un worker: jobs en cours terminés, jobs en file et baux rendus aux autres workers"""
+    import main
+    main.job_manager.stop()
+    if main.shared_state:
+        main.shared_state.release_all()
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def child_exit(server, worker):
+    """Worker terminé, y compris tué sans passer par worker_exit: ses jauges « live » sont retirées"""
+    multiprocess.mark_process_dead(worker.pid)
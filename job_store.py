@@ -0,0 +1,159 @@
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    state TEXT NOT NULL,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    retries INTEGER NOT NULL DEFAULT 0,
+    interruptions INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT
+)
+"""
+
+# Processus propriétaires de jobs: un job dont le propriétaire ne signale plus sa présence est repris
+OWNERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_owners (
+    owner TEXT PRIMARY KEY,
+    heartbeat_at REAL NOT NULL
+)
+"""
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS jobs_state_created ON jobs (state, created_at)",
+    "CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at) WHERE finished_at IS NOT NULL",
+)
+
+COLUMNS = ('id', 'kind', 'params', 'state', 'progress', 'result', 'error', 'retries',
+           'interruptions', 'created_at', 'started_at', 'finished_at', 'owner')
+JSON_COLUMNS = ('params', 'progress', 'result')
+
+
+class JobStore:
+    """Persistance des jobs dans SQLite (mode WAL)
+
+    Seules les transitions d'état sont écrites (quelques écritures par
+    job), la progression fine reste en mémoire. En WAL avec
+    synchronous=NORMAL, un commit ne coûte pas de fsync: plusieurs milliers
+    de jobs par minute restent loin de la limite.
+
+    Chaque job appartient au processus qui l'exécute (`owner`), ce qui
+    permet à plusieurs workers de partager la même base.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(SCHEMA)
+            self._conn.execute(OWNERS_SCHEMA)
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if 'owner' not in columns:
+                # Base créée avant l'attribution des jobs à un processus
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            for statement in INDEXES:
+                self._conn.execute(statement)
+
+    def save(self, record):
+        """Insère ou remplace un job (dictionnaire aux clés COLUMNS)"""
+        values = tuple(
+            json.dumps(record.get(column)) if column in JSON_COLUMNS else record.get(column)
+            for column in COLUMNS
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                values
+            )
+
+    def load(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def list(self, state=None, limit=50, before=None):
+        """Jobs les plus récents d'abord, filtrés par état; `before` = created_at de pagination"""
+        query = "SELECT * FROM jobs"
+        conditions, params = [], []
+        if state:
+            conditions.append("state = ?")
+            params.append(state)
+        if before is not None:
+            conditions.append("created_at < ?")
+            params.append(before)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def heartbeat(self, owner):
+        """Signale que `owner` est vivant"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_owners (owner, heartbeat_at) VALUES (?, ?)",
+                (owner, time.time())
+            )
+
+    def remove_owner(self, owner):
+        """Arrêt propre de `owner`: ses jobs inachevés deviennent immédiatement reprenables"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM job_owners WHERE owner = ?", (owner,))
+
+    def orphaned(self, states, stale_before):
+        """Jobs dans l'un des `states` dont le propriétaire n'a pas signalé sa présence depuis `stale_before`"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE state IN ({', '.join('?' * len(states))}) "
+                "AND (owner IS NULL OR owner NOT IN (SELECT owner FROM job_owners WHERE heartbeat_at >= ?)) "
+                "ORDER BY created_at",
+                tuple(states) + (stale_before,)
+            ).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def claim(self, job_id, owner, previous_owner):
+        """Attribue le job à `owner` s'il appartient toujours à `previous_owner`; True si obtenu
+
+        Deux workers qui voient le même job orphelin ne peuvent pas le prendre tous les deux.
+        """
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE jobs SET owner = ? WHERE id = ? AND owner IS ?",
+                (owner, job_id, previous_owner)
+            ).rowcount == 1
+
+    def counts(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    def purge(self, finished_before):
+        """Supprime les jobs terminés avant `finished_before`, retourne leur nombre"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (finished_before,)
+            ).rowcount
+
+    @staticmethod
+    def _decode(row):
+        record = dict(row)
+        for column in JSON_COLUMNS:
+            if record[column] is not None:
+                record[column] = json.loads(record[column])
+        return record
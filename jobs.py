@@ -0,0 +1,383 @@
+import json
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from progress import TransferProgress
+from retry import RetryLater, RetryScheduler, RetryState
+from shared_state import process_owner
+
+# États possibles d'un job
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+class JobQueueFull(Exception):
+    """Levée quand la file de jobs a atteint sa capacité maximale"""
+
+
+class Job:
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.state = JOB_QUEUED
+        self.progress = {'phase': JOB_QUEUED}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Incrémenté à chaque changement, réveille les flux SSE en attente
+        self.version = 0
+        self._transfer = None
+        # Tentatives par phase, conservées quand le job est replanifié
+        self.retry_state = RetryState()
+        self.retries = 0
+        # Nombre de redémarrages du service pendant l'exécution du job
+        self.interruptions = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def update_progress(self, phase, **fields):
+        """Met à jour la progression du job (appelé depuis le worker)
+
+        Les mises à jour d'octets (`bytes_done`, `bytes_total`) sont enrichies
+        du débit et de l'ETA, et publiées au plus toutes les
+        PROGRESS_MIN_INTERVAL secondes.
+        """
+        if 'bytes_done' in fields:
+            now = time.monotonic()
+            transfer = self._transfer
+            if transfer is not None and transfer.phase == phase and not transfer.due(now, fields['bytes_done'], fields.get('bytes_total')):
+                return
+        with self._lock:
+            if 'bytes_done' in fields:
+                if self._transfer is None or self._transfer.phase != phase:
+                    self._transfer = TransferProgress(phase, Config.PROGRESS_MIN_INTERVAL)
+                fields.update(self._transfer.update(now, fields['bytes_done'], fields.get('bytes_total')))
+            self.progress = dict(fields, phase=phase)
+            self._touch_locked()
+
+    def wait_for_change(self, version, timeout):
+        """Attend une version différente de `version` (ou la fin du job), retourne la version courante"""
+        with self._changed:
+            self._changed.wait_for(
+                lambda: self.version != version or self.state in FINISHED_STATES,
+                timeout
+            )
+            return self.version
+
+    def _touch_locked(self):
+        self.version += 1
+        self._changed.notify_all()
+
+    @classmethod
+    def from_record(cls, record):
+        """Reconstruit un job depuis sa ligne dans le JobStore"""
+        job = cls(record['kind'], record['params'])
+        job.id = record['id']
+        job.state = record['state']
+        job.progress = record['progress'] or {'phase': record['state']}
+        job.result = record['result']
+        job.error = record['error']
+        job.retries = record['retries']
+        job.interruptions = record['interruptions']
+        job.created_at = record['created_at']
+        job.started_at = record['started_at']
+        job.finished_at = record['finished_at']
+        return job
+
+    def to_record(self):
+        """Ligne à persister dans le JobStore"""
+        with self._lock:
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'params': self.params,
+                'state': self.state,
+                'progress': dict(self.progress),
+                'result': self.result,
+                'error': self.error,
+                'retries': self.retries,
+                'interruptions': self.interruptions,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+            }
+
+    def to_dict(self):
+        """Représentation JSON du job"""
+        with self._lock:
+            now = time.time()
+            timings = {
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'queued_seconds': round((self.started_at or now) - self.created_at, 3),
+                'running_seconds': (
+                    round((self.finished_at or now) - self.started_at, 3) if self.started_at else None
+                ),
+            }
+            return {
+                'job_id': self.id,
+                'kind': self.kind,
+                'params': self.params,
+                'state': self.state,
+                'progress': dict(self.progress),
+                'timings': timings,
+                'result': self.result,
+                'error': self.error,
+                'retries': self.retries,
+                'interruptions': self.interruptions,
+                'version': self.version,
+            }
+
+
+class JobManager:
+    """File de jobs exécutés par un pool borné de workers
+
+    Chaque type de job est associé à une fonction (`register`) appelée avec
+    les paramètres du job; elle suit la convention du projet et retourne un
+    tuple (success, result). Avec un `store`, les transitions d'état sont
+    persistées et les jobs interrompus par un redémarrage sont repris
+    (`reclaim`).
+
+    Plusieurs processus workers peuvent partager le même store: chaque job
+    appartient au processus qui l'exécute, qui signale sa présence toutes
+    les `lease_seconds / 3` secondes (`start`). Seuls les jobs d'un
+    processus arrêté ou silencieux depuis `lease_seconds` sont repris, par
+    un seul des processus restants.
+    """
+
+    # Fréquence maximale de purge des jobs expirés dans le store
+    PURGE_INTERVAL = 60
+    # Intervalle de relecture d'un job exécuté par un autre processus (flux SSE)
+    REMOTE_POLL_INTERVAL = 1.0
+
+    def __init__(self, max_workers=None, max_pending=None, retention=None, store=None, lease_seconds=None):
+        self.max_workers = max_workers or Config.JOB_WORKERS
+        self.max_pending = max_pending or Config.JOB_QUEUE_MAX
+        self.retention = retention if retention is not None else Config.JOB_RETENTION_SECONDS
+        self.lease_seconds = lease_seconds or Config.JOB_OWNER_LEASE_SECONDS
+        self.owner = process_owner()
+        self._heartbeat = None
+        self._stopping = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+        # Les relances attendent sur un minuteur, pas dans un worker
+        self._scheduler = RetryScheduler('job-retry')
+        self.store = store
+        self._handlers = {}
+        self._jobs = {}
+        self._last_store_purge = 0.0
+        self._lock = threading.Lock()
+
+    def register(self, kind, func):
+        """Associe un type de job à la fonction qui l'exécute"""
+        self._handlers[kind] = func
+
+    def submit(self, kind, params):
+        """Crée un job et le place dans la file d'exécution
+
+        La fonction enregistrée pour `kind` est appelée avec `**params` et deux
+        arguments supplémentaires: `progress_callback` permettant de rapporter
+        sa progression, et `retry_state`. Si elle lève RetryLater, le job est
+        remis en file après le délai demandé.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Type de job inconnu: {kind}")
+        with self._lock:
+            self._purge_locked()
+            pending = sum(1 for job in self._jobs.values() if job.state not in FINISHED_STATES)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"File de jobs pleine ({pending}/{self.max_pending})")
+            job = Job(kind, params)
+            self._jobs[job.id] = job
+
+        self._persist(job)
+        self._executor.submit(self._run, job)
+        return job
+
+    def start(self):
+        """Signale ce processus comme vivant, reprend les jobs orphelins puis surveille ceux des autres"""
+        if not self.store or self._heartbeat is not None:
+            return
+        self.store.heartbeat(self.owner)
+        self.reclaim()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name='job-heartbeat', daemon=True)
+        self._heartbeat.start()
+
+    def stop(self):
+        """Arrêt propre: termine les jobs en cours puis rend les jobs en file reprenables par les autres processus"""
+        self._stopping.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self.store:
+            self.store.remove_owner(self.owner)
+
+    def is_local(self, job_id):
+        """Vrai si le job est exécuté (ou suivi) par ce processus"""
+        with self._lock:
+            return job_id in self._jobs
+
+    def reclaim(self):
+        """Reprend les jobs en file ou en cours d'un processus arrêté, retourne leur nombre"""
+        if not self.store:
+            return 0
+        reclaimed = 0
+        for record in self.store.orphaned((JOB_QUEUED, JOB_RUNNING), time.time() - self.lease_seconds):
+            if not self.store.claim(record['id'], self.owner, record['owner']):
+                # Repris entre-temps par un autre processus
+                continue
+            job = Job.from_record(record)
+            if job.state == JOB_RUNNING:
+                job.interruptions += 1
+            if job.kind not in self._handlers:
+                job.state = JOB_FAILED
+                job.error = f"Type de job inconnu: {job.kind}"
+                job.finished_at = time.time()
+                self._persist(job)
+                continue
+            job.state = JOB_QUEUED
+            job.progress = {'phase': 'reclaimed'}
+            with self._lock:
+                self._jobs[job.id] = job
+            self._persist(job)
+            self._executor.submit(self._run, job)
+            reclaimed += 1
+        if reclaimed:
+            print(f"{reclaimed} jobs interrompus repris")
+        return reclaimed
+
+    def get(self, job_id):
+        """Job en mémoire, sinon relu depuis le store (jobs d'un démarrage précédent)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store:
+            record = self.store.load(job_id)
+            if record:
+                job = Job.from_record(record)
+        return job
+
+    def wait_for_change(self, job, version, timeout):
+        """Attend un changement du job, retourne (job, version courante)
+
+        Un job exécuté par un autre processus est relu depuis le store: seules
+        les transitions persistées (état, phase) sont alors visibles.
+        """
+        if not self.store or self.is_local(job.id):
+            return job, job.wait_for_change(version, timeout)
+        deadline = time.monotonic() + timeout
+        while True:
+            record = self.store.load(job.id)
+            if record:
+                job = Job.from_record(record)
+                job.version = zlib.crc32(json.dumps(
+                    [record['state'], record['progress'], record['retries']], sort_keys=True
+                ).encode('utf-8'))
+            remaining = deadline - time.monotonic()
+            if job.version != version or job.state in FINISHED_STATES or remaining <= 0:
+                return job, job.version
+            time.sleep(min(self.REMOTE_POLL_INTERVAL, remaining))
+
+    def list(self, state=None, limit=50, before=None):
+        """Jobs les plus récents d'abord, filtrés par état"""
+        if self.store:
+            return [Job.from_record(record).to_dict() for record in self.store.list(state, limit, before)]
+        with self._lock:
+            jobs = [
+                job for job in self._jobs.values()
+                if (not state or job.state == state) and (before is None or job.created_at < before)
+            ]
+        jobs.sort(key=lambda job: job.created_at, reverse=True)
+        return [job.to_dict() for job in jobs[:limit]]
+
+    def stats(self):
+        """Compteurs par état, exposés dans /health"""
+        counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_SUCCEEDED: 0, JOB_FAILED: 0}
+        if self.store:
+            counts.update(self.store.counts())
+        else:
+            with self._lock:
+                for job in self._jobs.values():
+                    counts[job.state] += 1
+        return {
+            'workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'counts': counts,
+            'scheduled_retries': self._scheduler.pending(),
+        }
+
+    def _run(self, job):
+        func = self._handlers[job.kind]
+        with job._lock:
+            job.state = JOB_RUNNING
+            job.started_at = time.time()
+            job.progress = {'phase': JOB_RUNNING}
+            job._touch_locked()
+        self._persist(job)
+
+        try:
+            success, result = func(**job.params, progress_callback=job.update_progress, retry_state=job.retry_state)
+        except RetryLater as e:
+            with job._lock:
+                job.state = JOB_QUEUED
+                job.retries += 1
+                job.progress = {'phase': 'retry_wait', 'retry_phase': e.phase, 'retry_in': round(e.delay, 1), 'error': str(e.error)}
+                job._touch_locked()
+            self._persist(job)
+            self._scheduler.schedule(e.delay, lambda: self._resubmit(job))
+            return
+        except Exception as e:
+            success, result = False, f"Erreur inattendue: {e}"
+
+        with job._lock:
+            job.finished_at = time.time()
+            if success:
+                job.state = JOB_SUCCEEDED
+                job.result = result if isinstance(result, dict) else {'message': result}
+            else:
+                job.state = JOB_FAILED
+                job.error = result
+            job.progress = dict(job.progress, phase=job.state)
+            job._touch_locked()
+        self._persist(job)
+
+    def _resubmit(self, job):
+        # Après stop(), le job reste en file dans le store: un autre processus le reprendra
+        if not self._stopping.is_set():
+            self._executor.submit(self._run, job)
+
+    def _heartbeat_loop(self):
+        while not self._stopping.wait(self.lease_seconds / 3):
+            try:
+                self.store.heartbeat(self.owner)
+                self.reclaim()
+            except Exception as e:
+                print(f"Signal de présence des jobs en échec: {e}")
+
+    def _persist(self, job):
+        if self.store:
+            try:
+                self.store.save(dict(job.to_record(), owner=self.owner))
+            except Exception as e:
+                # La persistance ne doit jamais faire échouer le job lui-même
+                print(f"Échec de l'enregistrement du job {job.id}: {e}")
+
+    def _purge_locked(self):
+        """Supprime les jobs terminés depuis plus de `retention` secondes"""
+        limit = time.time() - self.retention
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.state in FINISHED_STATES and job.finished_at and job.finished_at < limit
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if self.store and time.time() - self._last_store_purge >= self.PURGE_INTERVAL:
+            self._last_store_purge = time.time()
+            self.store.purge(limit)
@@ -1,16 +1,66 @@
-from flask import Flask, request, jsonify
-from pytubefix import YouTube
+# Premier import: référence du temps de démarrage (startup.report)
+import startup
+from flask import Flask, request, jsonify, Response
 import re
 import time
+import itertools
 import random
 import os
-import requests
 import json
+import signal
+import threading
+from urllib.parse import parse_qs, urlsplit
 from config import Config
-from google_drive import GoogleDriveManager
+from jobs import JobManager, JobQueueFull, FINISHED_STATES, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED
+from job_store import JobStore
+from cache import TTLCache
+from po_token import PoTokenStore
+from client_strategy import ClientSelector
+from singleflight import SingleFlight
+from download_index import DownloadIndex, HashingChunks, file_sha256, STORAGE_DRIVE, STORAGE_LOCAL
+from downloader import RangeDownloader
+from batch import run_bounded
+from progress import StreamProgressDispatcher
+from rate_limit import RateGovernor, RateLimitTimeout, install_pytubefix_hook
+from retry import RetryBudget, RetryLater, RetryPolicy, RetryState, call_with_retry
+from shared_state import SharedState
+import metrics
+
+startup.report.mark('imports')
 
 app = Flask(__name__)
 app.config.from_object(Config)
+metrics.instrument_app(app)
+
+# État partagé par les processus workers (gunicorn): sans lui, chaque worker aurait
+# sa propre limite de débit et N workers multiplieraient le trafic vers YouTube
+shared_state = SharedState(Config.SHARED_STATE_DB, lease_ttl=Config.SHARED_LEASE_SECONDS) if Config.SHARED_STATE_DB else None
+
+# Pool borné de workers pour les téléchargements en mode job, état persisté dans SQLite
+job_manager = JobManager(store=JobStore(Config.JOB_DB))
+metrics.track_jobs(job_manager)
+
+# Cache des métadonnées partagé par /video_info, /available_resolutions et /download.
+# Les objets YouTube (streams déjà résolus) restent en mémoire, les infos JSON
+# peuvent aussi être conservées sur disque.
+youtube_cache = TTLCache(Config.METADATA_CACHE_MAX_ENTRIES, Config.METADATA_CACHE_TTL, name='youtube')
+video_info_cache = TTLCache(
+    Config.METADATA_CACHE_MAX_ENTRIES,
+    Config.METADATA_CACHE_TTL,
+    disk_folder=Config.METADATA_CACHE_DIR,
+    name='video_info',
+    shared=shared_state
+)
+
+# Déduplication des requêtes identiques simultanées (vidéo virale: un seul téléchargement),
+# entre les workers aussi quand l'état partagé est activé
+download_flights = SingleFlight('download', shared=shared_state)
+video_info_flights = SingleFlight('video_info', shared=shared_state)
+
+# Index persistant des vidéos déjà téléchargées (local ou Google Drive). Une base
+# neuve est reconstruite depuis le dossier par start_background_tasks(), pas à l'import
+download_index = DownloadIndex(Config.DOWNLOAD_INDEX_DB)
+
 
 def get_working_user_agent():
     """Retourne un User-Agent qui fonctionne actuellement"""
@@ -25,74 +75,379 @@ def get_working_user_agent():
 
 TOKEN_FILE = os.path.join(os.getcwd(), 'token_youtube.json')
 
+# PO token en mémoire, rechargé à chaud quand renew_token.sh réécrit le fichier;
+# un rechargement explicite est propagé aux autres workers par l'état partagé
+po_token_store = PoTokenStore(TOKEN_FILE, check_interval=Config.PO_TOKEN_CHECK_INTERVAL, shared=shared_state)
+
 def load_po_token():
-    """Charge visitorData et poToken depuis token_youtube.json"""
-    if not os.path.exists(TOKEN_FILE):
-        raise RuntimeError("token_youtube.json introuvable. Lancez renew_token.sh d'abord.")
-    with open(TOKEN_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    visitor_data = data.get('visitorData')
-    po_token = data.get('poToken') or data.get('po_token')
-    if not visitor_data or not po_token:
-        raise RuntimeError("token_youtube.json invalide (manque visitorData ou poToken)")
-    return visitor_data, po_token
+    """Retourne visitorData et poToken (token_youtube.json, gardé en mémoire)"""
+    return po_token_store.get()
 
-def create_youtube_with_headers(url):
-    """Crée un objet YouTube en utilisant visitorData/poToken depuis token_youtube.json si présent.
+def reload_po_token_on_signal(signum, frame):
+    """SIGHUP: recharge token_youtube.json sans redémarrer l'API"""
+    # Hors du handler pour ne pas bloquer sur le verrou du store
+    threading.Thread(target=po_token_store.reload, name='po-token-reload', daemon=True).start()
 
-    Priorité: WEB + use_po_token=True avec visitor_data ; fallback: ANDROID.
-    """
-    last_error = None
-    # Tente d'utiliser token_youtube.json
+try:
+    signal.signal(signal.SIGHUP, reload_po_token_on_signal)
+except (AttributeError, ValueError):
+    # SIGHUP indisponible (Windows) ou import hors du thread principal
+    pass
+
+# pytubefix (et aiohttp, qu'il importe) n'est chargé qu'au premier usage ou par le
+# préchargement lancé une fois l'application prête: un worker démarre sans l'attendre
+_pytubefix = None
+_pytubefix_lock = threading.Lock()
+
+def load_pytubefix():
+    """Importe pytubefix au premier appel et y installe le hook de limite de débit"""
+    global _pytubefix
+    if _pytubefix is not None:
+        return _pytubefix
+    with _pytubefix_lock:
+        if _pytubefix is None:
+            started = time.perf_counter()
+            import pytubefix
+            import pytubefix.exceptions
+            import pytubefix.extract
+            install_pytubefix_hook(rate_governor)
+            startup.report.record_import('pytubefix', time.perf_counter() - started)
+            _pytubefix = pytubefix
+    return _pytubefix
+
+def preload_pytubefix():
+    """Charge pytubefix en arrière-plan: la première requête ne paie pas l'import"""
+    if Config.PRELOAD_PYTUBEFIX and _pytubefix is None:
+        threading.Thread(target=load_pytubefix, name='pytubefix-preload', daemon=True).start()
+
+def rebuild_download_index_from_folder():
+    """Reconstruit l'index local depuis le dossier de téléchargement (hache chaque fichier)"""
+    started = time.perf_counter()
     try:
+        found = download_index.rebuild_from_folder(Config.DOWNLOAD_FOLDER)
+    except Exception as e:
+        print(f"Reconstruction de l'index des téléchargements impossible: {e}")
+        return
+    print(f"Index des téléchargements reconstruit: {found} fichiers en {time.perf_counter() - started:.1f}s")
+
+_background_started = False
+
+def start_background_tasks():
+    """Travaux lancés une fois le processus prêt, hors du chemin de démarrage
+
+    Reconstruction de l'index si sa base vient d'être créée, chargement de
+    l'index du dossier Drive, puis préchargement de pytubefix. Appelé une
+    seule fois par processus.
+    """
+    global _background_started
+    if _background_started:
+        return
+    _background_started = True
+    if download_index.created:
+        threading.Thread(target=rebuild_download_index_from_folder, name='download-index-rebuild', daemon=True).start()
+    if Config.GOOGLE_DRIVE_ENABLED:
+        # google_drive est long à importer: import et démarrage hors du thread principal
+        threading.Thread(target=lambda: get_drive_manager().warm_up(), name='drive-warm-up', daemon=True).start()
+    preload_pytubefix()
+
+def content_errors():
+    """Erreurs liées à la vidéo elle-même: aucun autre client ne ferait mieux"""
+    exceptions = load_pytubefix().exceptions
+    return (
+        exceptions.VideoPrivate,
+        exceptions.MembersOnly,
+        exceptions.VideoRegionBlocked,
+        exceptions.RecordingUnavailable,
+        exceptions.LiveStreamError,
+        exceptions.LiveStreamOffline,
+    )
+
+def non_retryable_errors():
+    """Erreurs qu'aucune relance ne corrigera"""
+    return content_errors() + (load_pytubefix().exceptions.RegexMatchError,)
+
+def get_drive_manager():
+    """GoogleDriveManager partagé; google_drive (googleapiclient, oauthlib) n'est importé qu'ici"""
+    from google_drive import get_drive_manager as shared_drive_manager
+    return shared_drive_manager()
+
+# Progression des téléchargements pytubefix, redistribuée au job qui suit chaque stream
+stream_progress = StreamProgressDispatcher()
+
+# Budget de relances partagé: une panne YouTube ne multiplie pas le trafic par MAX_RETRIES
+retry_budget = RetryBudget(
+    ratio=Config.RETRY_BUDGET_RATIO,
+    min_per_second=Config.RETRY_BUDGET_MIN_PER_SECOND,
+    window=Config.RETRY_BUDGET_WINDOW,
+    shared=shared_state
+)
+
+# Limite de débit sortante vers YouTube: toutes les requêtes pytubefix et Range passent par un seau
+rate_governor = RateGovernor(
+    Config.RATE_LIMITS,
+    burst_seconds=Config.RATE_LIMIT_BURST_SECONDS,
+    min_fraction=Config.RATE_LIMIT_MIN_FRACTION,
+    max_wait=Config.RATE_LIMIT_MAX_WAIT,
+    enabled=Config.RATE_LIMIT_ENABLED,
+    shared=shared_state
+)
+
+# Téléchargement par segments parallèles (googlevideo limite le débit par connexion)
+range_downloader = RangeDownloader(retry_budget=retry_budget, rate_governor=rate_governor)
+
+# Ordre des clients choisi selon leurs succès/latences récents, avec circuit breaker
+# (circuits communs aux workers quand l'état partagé est activé)
+client_selector = ClientSelector(
+    Config.YOUTUBE_CLIENTS,
+    window=Config.CLIENT_STATS_WINDOW,
+    failure_threshold=Config.CLIENT_BREAKER_FAILURES,
+    cooldown=Config.CLIENT_BREAKER_COOLDOWN,
+    shared=shared_state
+)
+
+def build_youtube(url, client):
+    """Crée l'objet YouTube pour un type de client donné
+
+    WEB utilise visitorData/poToken depuis token_youtube.json, les autres
+    clients fonctionnent sans po_token.
+    """
+    if client == "WEB":
         visitor_data, po_token = load_po_token()
-        yt = YouTube(
+        return load_pytubefix().YouTube(
             url,
             client="WEB",
             use_po_token=True,
             visitor_data=visitor_data,
             use_oauth=False,
             allow_oauth_cache=False,
-            on_progress_callback=lambda s, c, b: None
+            on_progress_callback=stream_progress
         )
-        return yt
-    except Exception as e:
-        last_error = e
-        print(f"Echec YouTube(client=WEB avec token_youtube.json): {e}")
+    return load_pytubefix().YouTube(
+        url,
+        client=client,
+        use_po_token=False,
+        use_oauth=False,
+        allow_oauth_cache=False,
+        on_progress_callback=stream_progress
+    )
 
-    # Fallback ANDROID sans po_token
-    try:
-        yt = YouTube(
-            url,
-            client="ANDROID",
-            use_po_token=False,
-            use_oauth=False,
-            allow_oauth_cache=False,
-            on_progress_callback=lambda s, c, b: None
-        )
+def create_youtube_with_headers(url):
+    """Crée un objet YouTube dont les streams sont déjà résolus.
+
+    Les clients (WEB avec token_youtube.json, ANDROID, ...) sont essayés dans
+    l'ordre fourni par client_selector ; un client en échec répété est
+    temporairement écarté.
+    """
+    last_error = None
+    for client in client_selector.ordering():
+        started = time.monotonic()
+        try:
+            with metrics.phase_timer(metrics.PHASE_YOUTUBE_INIT):
+                yt = build_youtube(url, client)
+                # Forcer la requête player pour juger réellement le client
+                yt.streams
+        except content_errors():
+            client_selector.release(client)
+            metrics.YOUTUBE_CLIENT_ATTEMPTS.labels(client, 'content_error').inc()
+            raise
+        except RateLimitTimeout:
+            # Attente refusée par notre propre limiteur: rien à reprocher au client YouTube
+            client_selector.release(client)
+            metrics.YOUTUBE_CLIENT_ATTEMPTS.labels(client, 'rate_limited').inc()
+            raise
+        except Exception as e:
+            client_selector.record(client, False, time.monotonic() - started)
+            metrics.YOUTUBE_CLIENT_ATTEMPTS.labels(client, 'failure').inc()
+            last_error = e
+            print(f"Echec YouTube(client={client}): {e}")
+            continue
+        client_selector.record(client, True, time.monotonic() - started)
+        metrics.YOUTUBE_CLIENT_ATTEMPTS.labels(client, 'success').inc()
         return yt
-    except Exception as e:
-        last_error = e
-        print(f"Echec YouTube(client=ANDROID): {e}")
 
     # Si tous les essais échouent, lever la dernière erreur
     raise last_error if last_error else RuntimeError("Impossible de créer l'objet YouTube")
 
-def download_video(url, resolution, max_retries=None):
-    if max_retries is None:
-        max_retries = Config.MAX_RETRIES
-        
-    for attempt in range(max_retries):
+def canonical_video_id(url):
+    """Identifiant canonique de la vidéo, utilisé comme clé de cache"""
+    try:
+        return load_pytubefix().extract.video_id(url)
+    except load_pytubefix().exceptions.RegexMatchError:
+        return url
+
+def get_cached_youtube(url, video_id):
+    """Retourne l'objet YouTube en cache, ou en crée un nouveau"""
+    yt = youtube_cache.get(video_id)
+    if yt is None:
+        yt = create_youtube_with_headers(url)
+    return yt
+
+def build_video_info(yt):
+    """Construit le dictionnaire d'informations exposé par /video_info"""
+    # Obtenir les streams disponibles
+    streams = yt.streams.filter(progressive=True, file_extension='mp4')
+    available_resolutions = [stream.resolution for stream in streams if stream.resolution]
+    
+    # Tronquer la description si elle est trop longue
+    description = yt.description or ""
+    if len(description) > Config.MAX_DESCRIPTION_LENGTH:
+        description = description[:Config.MAX_DESCRIPTION_LENGTH] + "..."
+    
+    return {
+        "title": yt.title,
+        "author": yt.author,
+        "length": yt.length,
+        "views": yt.views,
+        "description": description,
+        "publish_date": str(yt.publish_date) if yt.publish_date else None,
+        "available_resolutions": list(set(available_resolutions)),
+        "thumbnail_url": yt.thumbnail_url,
+        "video_id": yt.video_id,
+    }
+
+def report_progress(progress_callback, phase, **fields):
+    """Transmet la progression au job appelant s'il y en a un"""
+    if progress_callback:
+        progress_callback(phase, **fields)
+
+def indexed_download_result(entry):
+    """Réponse de download_video pour une vidéo déjà présente dans l'index"""
+    if entry['storage'] == STORAGE_DRIVE:
+        return {
+            'message': f"Vidéo déjà présente sur Google Drive: {entry['filename']}",
+            'filename': entry['filename'],
+            'drive_info': {
+                'file_id': entry['drive_file_id'],
+                'filename': entry['filename'],
+                'web_view_link': entry['drive_link']
+            },
+            'resolution': entry['stream_resolution'],
+            'cached': True
+        }
+    return {
+        'message': f"Video already downloaded locally with resolution {entry['stream_resolution']} as {entry['filename']}",
+        'filename': entry['filename'],
+        'resolution': entry['stream_resolution'],
+        'file_path': entry['local_path'],
+        'cached': True
+    }
+
+def check_drive_entry(video_id, resolution, entry):
+    """Confronte l'index des téléchargements au contenu réel du dossier Drive
+
+    Un fichier supprimé de Drive invalide l'entrée; un fichier présent sur
+    Drive mais absent de l'index (autre instance, index recréé) y est ajouté.
+    Seule la copie en mémoire du dossier Drive est consultée; tant qu'elle
+    n'est pas chargée, l'entrée est conservée telle quelle.
+    """
+    drive_manager = get_drive_manager()
+    success, file = drive_manager.find_video(video_id, resolution)
+    if not success:
+        print(file)
+        return entry
+    if entry:
+        if drive_manager.folder_index.contains(entry['drive_file_id']):
+            return entry
+        print(f"Fichier Drive supprimé, entrée retirée de l'index: {entry['filename']}")
+        download_index.remove(video_id, resolution, STORAGE_DRIVE)
+    if not file:
+        return None
+    download_index.record(
+        video_id, [resolution, file['resolution']], STORAGE_DRIVE, file['name'],
+        int(file.get('size') or 0), stream_resolution=file['resolution'] or resolution,
+        drive_file_id=file['id'], drive_link=file.get('webViewLink')
+    )
+    return download_index.lookup(video_id, resolution, STORAGE_DRIVE)
+
+def already_downloaded(video_id, resolution):
+    """Résultat (True, infos) si la vidéo est déjà dans l'index des téléchargements, sinon None"""
+    storage = STORAGE_DRIVE if Config.GOOGLE_DRIVE_ENABLED else STORAGE_LOCAL
+    entry = download_index.lookup(video_id, resolution, storage)
+    if storage == STORAGE_DRIVE:
+        entry = check_drive_entry(video_id, resolution, entry)
+    return (True, indexed_download_result(entry)) if entry else None
+
+def download_video(url, resolution, max_retries=None, progress_callback=None, retry_state=None):
+    """Télécharge la vidéo, en partageant le travail avec un téléchargement identique en cours
+
+    Avec `retry_state` (mode job), les relances ne bloquent pas le worker:
+    RetryLater est levée et le gestionnaire de jobs replanifie l'appel.
+    """
+    video_id = canonical_video_id(url)
+    
+    # Vidéo déjà récupérée: aucune requête réseau
+    indexed = already_downloaded(video_id, resolution)
+    if indexed:
+        report_progress(progress_callback, 'already_downloaded')
+        metrics.OPERATIONS.labels('download', 'already_downloaded').inc()
+        return indexed
+    
+    while True:
         try:
-            # Ajouter un délai aléatoire entre les tentatives
-            if attempt > 0:
-                time.sleep(random.uniform(Config.RETRY_DELAY_MIN, Config.RETRY_DELAY_MAX))
-            
-            print(f"Tentative {attempt + 1}/{max_retries} pour télécharger: {url}")
-            
-            # Créer l'objet YouTube avec pytubefix
-            yt = create_youtube_with_headers(url)
-            
+            with metrics.IN_PROGRESS.labels('download').track_inprogress():
+                (success, result), shared = download_flights.do(
+                    (video_id, resolution),
+                    lambda: _download_video(url, video_id, resolution, max_retries, progress_callback, retry_state),
+                    on_follow=lambda: report_progress(progress_callback, 'waiting_for_identical_download'),
+                    # Téléchargement terminé par un autre worker: il est dans l'index partagé
+                    recheck=lambda: already_downloaded(video_id, resolution)
+                )
+            break
+        except RetryLater as e:
+            # Le leader (un job) a replanifié sa relance: un appelant synchrone attend et réessaie
+            if retry_state is not None:
+                raise
+            time.sleep(e.delay)
+    if shared:
+        print(f"Téléchargement mutualisé avec une requête identique: {video_id} ({resolution})")
+    metrics.OPERATIONS.labels('download', 'coalesced' if shared else ('success' if success else 'failure')).inc()
+    return success, result
+
+def log_error_advice(error_msg):
+    """Analyser l'erreur pour donner des conseils"""
+    if "403" in error_msg or "Forbidden" in error_msg:
+        print("   Erreur 403 détectée - YouTube bloque temporairement les requêtes")
+        print("   Conseils: Attendez quelques minutes ou essayez une vidéo différente")
+    elif "400" in error_msg or "Bad Request" in error_msg:
+        print("   Erreur 400 détectée - Problème avec la requête YouTube")
+        print("   Conseils: Vérifiez l'URL ou attendez un moment")
+    elif "429" in error_msg or "Too Many Requests" in error_msg:
+        print("   Erreur 429 détectée - Trop de requêtes")
+        print("   Conseils: Attendez plus longtemps avant de réessayer")
+
+def retry_policy(max_retries=None):
+    """Politique de relance commune: backoff exponentiel, Retry-After, budget global"""
+    return RetryPolicy(
+        max_retries if max_retries is not None else Config.MAX_RETRIES,
+        Config.RETRY_DELAY_MIN,
+        Config.RETRY_DELAY_MAX,
+        Config.RETRY_BACKOFF_MAX,
+        Config.RETRY_AFTER_MAX,
+        budget=retry_budget,
+        non_retryable=non_retryable_errors()
+    )
+
+def retry_logger(operation, progress_callback=None):
+    """Callback on_retry: logs, métriques et progression du job"""
+    def on_retry(phase, attempt, delay, error):
+        error_msg = str(error)
+        print(f"Tentative {attempt} ({phase}) échouée: {error_msg} - nouvelle tentative dans {delay:.1f}s")
+        log_error_advice(error_msg)
+        metrics.ERRORS.labels(operation, metrics.classify_error(error_msg)).inc()
+        metrics.RETRIES.labels(operation, phase).inc()
+        report_progress(progress_callback, 'retry_wait', retry_phase=phase, attempt=attempt + 1, retry_in=round(delay, 1))
+    return on_retry
+
+def select_stream(url, video_id, resolution):
+    """Objet YouTube (en cache si possible) et stream mp4 progressif pour la résolution demandée
+
+    Retourne (yt, stream, résolution du stream); stream vaut None si aucun ne convient.
+    """
+    try:
+        # Réutiliser l'objet YouTube en cache (ex: /video_info appelé juste avant)
+        yt = get_cached_youtube(url, video_id)
+        
+        with metrics.phase_timer(metrics.PHASE_STREAM_SELECT):
             # Essayer d'abord la résolution demandée
             stream = yt.streams.filter(progressive=True, file_extension='mp4', resolution=resolution).first()
             
@@ -103,147 +458,261 @@ def download_video(url, resolution, max_retries=None):
                     stream = available_streams[0]
                     resolution = stream.resolution
                     print(f"Résolution demandée non disponible, utilisation de: {resolution}")
-            
-            if stream:
-                # Nettoyer le nom de fichier pour éviter les caractères problématiques
-                safe_title = "".join(c for c in yt.title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                filename = f"{safe_title}_{resolution}.mp4"
-                
-                print(f"Téléchargement en cours: {filename}")
-                
-                if Config.GOOGLE_DRIVE_ENABLED:
-                    print(f"Upload sur Google Drive en cours: {filename}")
-                    
-                    # Initialiser Google Drive Manager
-                    drive_manager = GoogleDriveManager()
-                    
-                    # Télécharger temporairement pour l'upload
-                    temp_file_path = os.path.join(Config.DOWNLOAD_FOLDER, filename)
-                    os.makedirs(Config.DOWNLOAD_FOLDER, exist_ok=True)
-                    
-                    # Télécharger le fichier temporairement
-                    stream.download(output_path=Config.DOWNLOAD_FOLDER, filename=filename)
-                    
-                    # Lire le fichier pour l'upload
-                    with open(temp_file_path, 'rb') as f:
-                        video_data = f.read()
-                    
-                    # Upload sur Google Drive
-                    success, result = drive_manager.upload_video(video_data, filename)
-                    
-                    # Supprimer le fichier temporaire
-                    try:
-                        os.remove(temp_file_path)
-                    except:
-                        pass
-                    
-                    if success:
-                        return True, {
-                            'message': f'Vidéo téléchargée et uploadée sur Google Drive avec succès: {filename}',
-                            'filename': filename,
-                            'drive_info': result,
-                            'resolution': resolution
-                        }
-                    else:
-                        return False, f"Échec de l'upload Google Drive: {result}"
-                else:
-                    # Fallback vers téléchargement local si Google Drive est désactivé
-                    os.makedirs(Config.DOWNLOAD_FOLDER, exist_ok=True)
-                    file_path = os.path.join(Config.DOWNLOAD_FOLDER, filename)
-                    
-                    # Télécharger directement dans le dossier
-                    stream.download(output_path=Config.DOWNLOAD_FOLDER, filename=filename)
-                    
-                    return True, {
-                        'message': f'Video downloaded locally with resolution {resolution} as {filename}',
-                        'filename': filename,
-                        'resolution': resolution,
-                        'file_path': file_path
-                    }
-            else:
-                return False, "No suitable video stream found."
-                
+    except Exception:
+        youtube_cache.invalidate(video_id)
+        raise
+    youtube_cache.set(video_id, yt)
+    return yt, stream, resolution
+
+def _download_video(url, video_id, resolution, max_retries=None, progress_callback=None, retry_state=None):
+    policy = retry_policy(max_retries)
+    state = retry_state or RetryState()
+    blocking = retry_state is None
+    on_retry = retry_logger('download', progress_callback)
+    requested_resolution = resolution
+    
+    def resolve_stream():
+        """Phase metadata: objet YouTube (en cache si possible) et choix du stream"""
+        print(f"Récupération des métadonnées pour: {url}")
+        report_progress(progress_callback, 'fetching_metadata', attempt=state.attempts.get('metadata', 0) + 1)
+        return select_stream(url, video_id, requested_resolution)
+    
+    target = {}
+    
+    def transfer():
+        """Phase transfer: seule cette phase est relancée si le transfert échoue"""
+        if not target:
+            # URL de stream expirée lors d'un essai précédent: nouvelle résolution
+            target['yt'], target['stream'], target['resolution'] = resolve_stream()
+        try:
+            return transfer_stream(
+                target['yt'], target['stream'], video_id, requested_resolution, target['resolution'],
+                state.attempts.get('transfer', 0) + 1, progress_callback
+            )
         except Exception as e:
-            error_msg = str(e)
-            print(f"Tentative {attempt + 1} échouée: {error_msg}")
-            
-            # Analyser l'erreur pour donner des conseils
-            if "403" in error_msg or "Forbidden" in error_msg:
-                print("   Erreur 403 détectée - YouTube bloque temporairement les requêtes")
-                print("   Conseils: Attendez quelques minutes ou essayez une vidéo différente")
-            elif "400" in error_msg or "Bad Request" in error_msg:
-                print("   Erreur 400 détectée - Problème avec la requête YouTube")
-                print("   Conseils: Vérifiez l'URL ou attendez un moment")
-            elif "429" in error_msg or "Too Many Requests" in error_msg:
-                print("   Erreur 429 détectée - Trop de requêtes")
-                print("   Conseils: Attendez plus longtemps avant de réessayer")
-            
-            # Si c'est la dernière tentative, retourner l'erreur
-            if attempt == max_retries - 1:
-                return False, f"Failed after {max_retries} attempts. Last error: {error_msg}"
-            
-            # Continuer avec la prochaine tentative
-            continue
+            if metrics.classify_error(str(e)) in ('403', '400') or '410' in str(e):
+                youtube_cache.invalidate(video_id)
+                target.clear()
+            raise
     
-    return False, "Unexpected error occurred"
+    try:
+        target['yt'], target['stream'], target['resolution'] = call_with_retry(
+            'metadata', resolve_stream, policy, state, blocking, on_retry
+        )
+        if not target['stream']:
+            return False, "No suitable video stream found."
+        return call_with_retry('transfer', transfer, policy, state, blocking, on_retry)
+    except RetryLater:
+        raise
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Téléchargement abandonné après {state.total()} tentatives: {error_msg}")
+        log_error_advice(error_msg)
+        metrics.ERRORS.labels('download', metrics.classify_error(error_msg)).inc()
+        return False, f"Failed after {state.total()} attempts. Last error: {error_msg}"
 
-def get_video_info(url, max_retries=None):
-    if max_retries is None:
-        max_retries = Config.MAX_RETRIES
+def stream_identity(stream, video_id):
+    """Identité d'un flux, stable d'une URL signée à l'autre (lmt = version de l'encodage)"""
+    query = parse_qs(urlsplit(stream.url).query)
+    return {
+        'video_id': video_id,
+        'itag': stream.itag,
+        'size': stream.filesize,
+        'lmt': query.get('lmt', [None])[0],
+    }
+
+def transfer_stream(yt, stream, video_id, requested_resolution, resolution, attempt, progress_callback=None):
+    """Transfère le stream vers Google Drive ou le dossier local, retourne (success, result)"""
+    # Nettoyer le nom de fichier pour éviter les caractères problématiques
+    # L'identifiant de la vidéo dans le nom permet de reconstruire l'index depuis le dossier
+    safe_title = "".join(c for c in yt.title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    filename = f"{safe_title}_{video_id}_{resolution}.mp4"
+    
+    print(f"Téléchargement en cours: {filename} (tentative {attempt})")
+    report_progress(progress_callback, 'downloading', attempt=attempt, filename=filename)
+    
+    if Config.GOOGLE_DRIVE_ENABLED:
+        print(f"Upload sur Google Drive en cours: {filename}")
         
-    for attempt in range(max_retries):
-        try:
-            if attempt > 0:
-                time.sleep(random.uniform(Config.RETRY_DELAY_MIN, Config.RETRY_DELAY_MAX))
-            
-            print(f"Tentative {attempt + 1}/{max_retries} pour récupérer les infos: {url}")
-            
-            # Créer l'objet YouTube avec pytubefix
-            yt = create_youtube_with_headers(url)
-            
-            # Obtenir les streams disponibles
-            streams = yt.streams.filter(progressive=True, file_extension='mp4')
-            available_resolutions = [stream.resolution for stream in streams if stream.resolution]
-            
-            # Tronquer la description si elle est trop longue
-            description = yt.description
-            if len(description) > Config.MAX_DESCRIPTION_LENGTH:
-                description = description[:Config.MAX_DESCRIPTION_LENGTH] + "..."
-            
-            video_info = {
-                "title": yt.title,
-                "author": yt.author,
-                "length": yt.length,
-                "views": yt.views,
-                "description": description,
-                "publish_date": str(yt.publish_date) if yt.publish_date else None,
-                "available_resolutions": list(set(available_resolutions)),
-                "thumbnail_url": yt.thumbnail_url,
-                "video_id": yt.video_id,
+        # Gestionnaire Google Drive partagé (credentials et service réutilisés)
+        drive_manager = get_drive_manager()
+        
+        def on_upload_progress(bytes_done, bytes_total):
+            report_progress(
+                progress_callback, 'uploading', attempt=attempt, filename=filename,
+                bytes_done=bytes_done, bytes_total=bytes_total
+            )
+        
+        # Le flux YouTube alimente l'upload résumable Drive, exécuté dans le
+        # pool d'upload; si Drive est plus lent, le surplus déborde sur disque
+        report_progress(progress_callback, 'uploading', attempt=attempt, filename=filename)
+        if stream.is_sabr or not stream.filesize:
+            source_chunks = stream.iter_chunks()
+        else:
+            # Segments téléchargés en parallèle, restitués dans l'ordre
+            source_chunks = range_downloader.iter_chunks(stream.url, stream.filesize)
+        chunks = HashingChunks(source_chunks)
+        with metrics.phase_timer(metrics.PHASE_DRIVE_UPLOAD):
+            success, result = drive_manager.upload_stream(
+                chunks,
+                filename,
+                size=stream.filesize,
+                progress_callback=on_upload_progress,
+                app_properties={
+                    'video_id': video_id,
+                    'resolution': resolution,
+                    'requested_resolution': requested_resolution
+                }
+            )
+        metrics.BYTES_TRANSFERRED.labels('download').inc(chunks.size)
+        
+        if success:
+            metrics.BYTES_TRANSFERRED.labels('upload').inc(chunks.size)
+            download_index.record(
+                video_id, [requested_resolution, resolution], STORAGE_DRIVE, filename,
+                chunks.size, sha256=chunks.sha256, itag=stream.itag, stream_resolution=resolution,
+                title=yt.title, drive_file_id=result.get('file_id'),
+                drive_link=result.get('web_view_link')
+            )
+            return True, {
+                'message': f'Vidéo téléchargée et uploadée sur Google Drive avec succès: {filename}',
+                'filename': filename,
+                'drive_info': result,
+                'resolution': resolution
             }
-            return video_info, None
-            
-        except Exception as e:
-            error_msg = str(e)
-            print(f"Tentative {attempt + 1} échouée: {error_msg}")
-            
-            # Analyser l'erreur pour donner des conseils
-            if "403" in error_msg or "Forbidden" in error_msg:
-                print("   Erreur 403 détectée - YouTube bloque temporairement les requêtes")
-            elif "400" in error_msg or "Bad Request" in error_msg:
-                print("   Erreur 400 détectée - Problème avec la requête YouTube")
-            elif "429" in error_msg or "Too Many Requests" in error_msg:
-                print("   Erreur 429 détectée - Trop de requêtes")
-            
-            if attempt == max_retries - 1:
-                return None, f"Failed after {max_retries} attempts. Last error: {error_msg}"
-            continue
+        else:
+            return False, f"Échec de l'upload Google Drive: {result}"
+    else:
+        # Fallback vers téléchargement local si Google Drive est désactivé
+        os.makedirs(Config.DOWNLOAD_FOLDER, exist_ok=True)
+        file_path = os.path.join(Config.DOWNLOAD_FOLDER, filename)
+        
+        def on_download_progress(bytes_done, bytes_total):
+            report_progress(
+                progress_callback, 'downloading', attempt=attempt, filename=filename,
+                bytes_done=bytes_done, bytes_total=bytes_total
+            )
+        
+        # Télécharger directement dans le dossier, par segments parallèles si possible
+        with metrics.phase_timer(metrics.PHASE_DOWNLOAD):
+            if stream.is_sabr or not stream.filesize:
+                with stream_progress.listen(stream, on_download_progress):
+                    stream.download(output_path=Config.DOWNLOAD_FOLDER, filename=filename)
+            else:
+                # Fichier .part repris à l'octet près si le même flux a déjà été partiellement téléchargé
+                transfer = range_downloader.download(
+                    stream.url, file_path, stream.filesize, progress_callback=on_download_progress,
+                    identity=stream_identity(stream, video_id)
+                )
+                print(f"Téléchargement terminé: {transfer['throughput_mbps']} Mo/s "
+                      f"({transfer['segments']} segments, {transfer['segment_retries']} reprises, "
+                      f"{transfer['resumed_bytes']} octets repris)")
+        metrics.BYTES_TRANSFERRED.labels('download').inc(os.path.getsize(file_path))
+        
+        download_index.record(
+            video_id, [requested_resolution, resolution], STORAGE_LOCAL, filename,
+            os.path.getsize(file_path), sha256=file_sha256(file_path), itag=stream.itag,
+            stream_resolution=resolution, title=yt.title, local_path=file_path
+        )
+        
+        return True, {
+            'message': f'Video downloaded locally with resolution {resolution} as {filename}',
+            'filename': filename,
+            'resolution': resolution,
+            'file_path': file_path
+        }
+
+def cached_video_info(video_id):
+    """(infos, None) si les infos de la vidéo sont en cache, sinon None"""
+    info = video_info_cache.get(video_id)
+    return (info, None) if info is not None else None
+
+def get_video_info(url, max_retries=None):
+    video_id = canonical_video_id(url)
+    
+    cached = cached_video_info(video_id)
+    if cached:
+        metrics.OPERATIONS.labels('video_info', 'cached').inc()
+        return cached
+    
+    # Une seule récupération réseau par vidéo, même si plusieurs requêtes arrivent en même temps
+    with metrics.IN_PROGRESS.labels('video_info').track_inprogress():
+        result, shared = video_info_flights.do(
+            video_id,
+            lambda: _fetch_video_info(url, video_id, max_retries),
+            # Infos obtenues par un autre worker: elles sont dans le cache partagé
+            recheck=lambda: cached_video_info(video_id)
+        )
+    metrics.OPERATIONS.labels('video_info', 'coalesced' if shared else ('success' if result[0] else 'failure')).inc()
+    return result
+
+def _fetch_video_info(url, video_id, max_retries=None):
+    state = RetryState()
+    
+    def fetch():
+        print(f"Récupération des infos: {url}")
+        try:
+            # Réutiliser l'objet YouTube en cache s'il existe
+            yt = get_cached_youtube(url, video_id)
+            with metrics.phase_timer(metrics.PHASE_VIDEO_INFO):
+                video_info = build_video_info(yt)
+        except Exception:
+            youtube_cache.invalidate(video_id)
+            raise
+        youtube_cache.set(video_id, yt)
+        video_info_cache.set(video_id, video_info)
+        return video_info
     
-    return None, "Unexpected error occurred"
+    try:
+        return call_with_retry('metadata', fetch, retry_policy(max_retries), state, on_retry=retry_logger('video_info')), None
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Récupération des infos abandonnée après {state.total()} tentatives: {error_msg}")
+        log_error_advice(error_msg)
+        metrics.ERRORS.labels('video_info', metrics.classify_error(error_msg)).inc()
+        return None, f"Failed after {state.total()} attempts. Last error: {error_msg}"
 
 def is_valid_youtube_url(url):
     return any(re.match(pattern, url) for pattern in Config.YOUTUBE_URL_PATTERNS)
 
+def is_channel_url(url):
+    return any(re.match(pattern, url) for pattern in Config.YOUTUBE_CHANNEL_URL_PATTERNS)
+
+def is_valid_playlist_url(url):
+    return is_channel_url(url) or any(re.match(pattern, url) for pattern in Config.YOUTUBE_PLAYLIST_URL_PATTERNS)
+
+def enumerate_playlist(url, limit=None):
+    """Retourne (type, titre, URLs des vidéos) d'une playlist ou d'une chaîne"""
+    if limit is None:
+        limit = Config.PLAYLIST_MAX_VIDEOS
+    if is_channel_url(url):
+        kind, collection = 'channel', load_pytubefix().Channel(url)
+    else:
+        kind, collection = 'playlist', load_pytubefix().Playlist(url)
+    
+    # Pagination paresseuse: on s'arrête dès que `limit` vidéos sont connues
+    video_urls = list(itertools.islice(collection.url_generator(), limit))
+    try:
+        title = collection.channel_name if kind == 'channel' else collection.title
+    except Exception:
+        title = None
+    return kind, title, video_urls
+
+def ndjson_response(records, make_summary):
+    """Réponse NDJSON: un enregistrement par ligne dès qu'il est prêt, puis le résumé"""
+    def generate():
+        finished = []
+        for record in records:
+            if 'index' in record:
+                finished.append(record)
+            yield json.dumps(record) + "\n"
+        yield json.dumps({"summary": make_summary(finished)}) + "\n"
+    return Response(generate(), mimetype='application/x-ndjson')
+
+# Fonctions exécutées par les jobs; les jobs interrompus par un redémarrage sont
+# repris au lancement du serveur (pas au simple import, cf. async_server.py)
+job_manager.register('download', download_video)
+
 @app.route('/download/<resolution>', methods=['POST'])
 def download_by_resolution(resolution):
     try:
@@ -259,6 +728,21 @@ def download_by_resolution(resolution):
         if not is_valid_youtube_url(url):
             return jsonify({"error": "Invalid YouTube URL."}), 400
         
+        # Mode job: réponse 202 immédiate, le téléchargement s'exécute dans le pool de workers
+        if data.get('async', Config.ASYNC_DOWNLOADS):
+            try:
+                job = job_manager.submit('download', {'url': url, 'resolution': resolution})
+            except JobQueueFull as e:
+                return jsonify({"error": str(e)}), 503
+            
+            response = jsonify({
+                "job_id": job.id,
+                "state": job.state,
+                "status_url": f"/jobs/{job.id}"
+            })
+            response.headers['Location'] = f"/jobs/{job.id}"
+            return response, 202
+        
         success, result = download_video(url, resolution)
         
         if success:
@@ -275,6 +759,334 @@ def download_by_resolution(resolution):
         print(f"Unexpected error in download endpoint: {str(e)}")
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
+def validate_batch_item(item, default_resolution):
+    """Retourne (url, resolution, erreur) pour un élément de /download/batch"""
+    if isinstance(item, str):
+        item = {'url': item}
+    if not isinstance(item, dict):
+        return None, None, "Each item must be a URL string or an object with 'url'."
+    url = item.get('url')
+    resolution = item.get('resolution') or default_resolution
+    if not url:
+        return url, resolution, "Missing 'url' parameter."
+    if not is_valid_youtube_url(url):
+        return url, resolution, "Invalid YouTube URL."
+    if not resolution:
+        return url, resolution, "Missing 'resolution' parameter."
+    return url, resolution, None
+
+def batch_item_result(index, url, resolution, outcome, seconds):
+    """Résultat d'un élément du lot, au format commun JSON/NDJSON"""
+    if isinstance(outcome, Exception):
+        success, result = False, f"Internal server error: {str(outcome)}"
+    else:
+        success, result = outcome
+    item = {
+        "index": index,
+        "url": url,
+        "resolution": resolution,
+        "success": success,
+        "duration_seconds": round(seconds, 3)
+    }
+    if success:
+        item["result"] = result if isinstance(result, dict) else {"message": result}
+    else:
+        item["error"] = result
+    return item
+
+@app.route('/download/batch', methods=['POST'])
+def download_batch():
+    """Télécharge plusieurs vidéos avec une concurrence bornée, résultat par élément
+
+    Body: {"items": [{"url": ..., "resolution": "720p"}, "https://..."],
+           "resolution": "720p", "concurrency": 4, "stream": false}
+    Avec "stream": true, chaque résultat est renvoyé en NDJSON dès qu'il est prêt.
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Request body must be valid JSON"}), 400
+    
+    items = data.get('items') or data.get('urls')
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Missing 'items' list in the request body."}), 400
+    if len(items) > Config.BATCH_MAX_ITEMS:
+        return jsonify({"error": f"Too many items: {len(items)} (max {Config.BATCH_MAX_ITEMS})"}), 400
+    
+    try:
+        concurrency = int(data.get('concurrency') or Config.BATCH_CONCURRENCY)
+    except (TypeError, ValueError):
+        return jsonify({"error": "'concurrency' must be an integer."}), 400
+    concurrency = max(1, min(concurrency, Config.BATCH_CONCURRENCY))
+    
+    # Validation en amont: un élément invalide échoue tout de suite sans occuper de worker
+    results = []
+    pending = []
+    for index, item in enumerate(items):
+        url, resolution, error = validate_batch_item(item, data.get('resolution'))
+        if error:
+            results.append(batch_item_result(index, url, resolution, (False, error), 0.0))
+        else:
+            pending.append((index, url, resolution))
+    
+    started = time.perf_counter()
+    
+    def execute():
+        for result in results:
+            yield result
+        completed = run_bounded(pending, lambda item: download_video(item[1], item[2]), concurrency)
+        for _, (index, url, resolution), outcome, seconds in completed:
+            yield batch_item_result(index, url, resolution, outcome, seconds)
+    
+    def summary(finished):
+        succeeded = sum(1 for item in finished if item['success'])
+        return {
+            "total": len(items),
+            "succeeded": succeeded,
+            "failed": len(finished) - succeeded,
+            "invalid": len(items) - len(pending),
+            "concurrency": concurrency,
+            "duration_seconds": round(time.perf_counter() - started, 3)
+        }
+    
+    if data.get('stream'):
+        return ndjson_response(execute(), summary)
+    
+    finished = sorted(execute(), key=lambda item: item['index'])
+    return jsonify({"results": finished, "summary": summary(finished)}), 200
+
+def playlist_request():
+    """Valide le body d'un endpoint /playlist/..., retourne (data, erreur JSON)"""
+    data = request.get_json(silent=True)
+    if not data:
+        return None, (jsonify({"error": "Request body must be valid JSON"}), 400)
+    url = data.get('url')
+    if not url:
+        return None, (jsonify({"error": "Missing 'url' parameter in the request body."}), 400)
+    if not is_valid_playlist_url(url):
+        return None, (jsonify({"error": "Invalid YouTube playlist or channel URL."}), 400)
+    try:
+        data['limit'] = min(int(data.get('limit') or Config.PLAYLIST_MAX_VIDEOS), Config.PLAYLIST_MAX_VIDEOS)
+        data['concurrency'] = max(1, min(int(data.get('concurrency') or Config.BATCH_CONCURRENCY), Config.BATCH_CONCURRENCY))
+    except (TypeError, ValueError):
+        return None, (jsonify({"error": "'limit' and 'concurrency' must be integers."}), 400)
+    return data, None
+
+def stream_playlist(data, func, to_record):
+    """Énumère la playlist puis exécute `func(url)` pour chaque vidéo, en NDJSON"""
+    try:
+        kind, title, video_urls = enumerate_playlist(data['url'], data['limit'])
+    except Exception as e:
+        print(f"Échec de l'énumération de la playlist: {str(e)}")
+        return jsonify({"error": f"Failed to enumerate playlist: {str(e)}"}), 500
+    
+    started = time.perf_counter()
+    
+    def records():
+        yield {"playlist": {"type": kind, "title": title, "url": data['url'], "video_count": len(video_urls)}}
+        for index, url, outcome, seconds in run_bounded(video_urls, func, data['concurrency']):
+            yield to_record(index, url, outcome, seconds)
+    
+    def summary(finished):
+        succeeded = sum(1 for record in finished if record['success'])
+        return {
+            "total": len(video_urls),
+            "succeeded": succeeded,
+            "failed": len(finished) - succeeded,
+            "concurrency": data['concurrency'],
+            "duration_seconds": round(time.perf_counter() - started, 3)
+        }
+    
+    return ndjson_response(records(), summary)
+
+@app.route('/playlist/download', methods=['POST'])
+def download_playlist():
+    """Télécharge toutes les vidéos d'une playlist ou d'une chaîne, progression en NDJSON
+
+    Body: {"url": ..., "resolution": "720p", "concurrency": 4, "limit": 200}
+    """
+    data, error = playlist_request()
+    if error:
+        return error
+    resolution = data.get('resolution')
+    if not resolution:
+        return jsonify({"error": "Missing 'resolution' parameter in the request body."}), 400
+    
+    return stream_playlist(
+        data,
+        lambda url: download_video(url, resolution),
+        lambda index, url, outcome, seconds: batch_item_result(index, url, resolution, outcome, seconds)
+    )
+
+@app.route('/playlist/info', methods=['POST'])
+def playlist_info():
+    """Informations de chaque vidéo d'une playlist ou d'une chaîne, en NDJSON"""
+    data, error = playlist_request()
+    if error:
+        return error
+    
+    def to_record(index, url, outcome, seconds):
+        if isinstance(outcome, Exception):
+            outcome = (None, f"Internal server error: {str(outcome)}")
+        info, error_message = outcome
+        record = {"index": index, "url": url, "success": info is not None, "duration_seconds": round(seconds, 3)}
+        if info is not None:
+            record["video_info"] = info
+        else:
+            record["error"] = error_message
+        return record
+    
+    return stream_playlist(data, get_video_info, to_record)
+
+VIDEO_ID_PATTERN = re.compile(r"^[0-9A-Za-z_-]{11}$")
+
+def parse_range_header(header, size):
+    """Plage demandée (début, fin incluse), None sans en-tête Range
+
+    Une seule plage est gérée; ValueError si elle n'est pas satisfiable.
+    """
+    if not header:
+        return None
+    match = re.match(r"^bytes=(\d*)-(\d*)$", header.strip())
+    if not match or match.group(1) == match.group(2) == '':
+        # Plages multiples ou syntaxe inconnue: on sert le fichier complet
+        return None
+    if match.group(1) == '':
+        start, end = max(size - int(match.group(2)), 0), size - 1
+    else:
+        start = int(match.group(1))
+        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+    if start >= size or start > end:
+        raise ValueError(f"Plage non satisfiable: {header}")
+    return start, end
+
+@app.route('/stream/<video_id>/<resolution>', methods=['GET'])
+def stream_video(video_id, resolution):
+    """Relaie les octets du stream googlevideo au client, sans rien écrire sur disque
+
+    L'en-tête Range du client est transmis (lecture progressive, reprise),
+    la mémoire utilisée reste constante quelle que soit la taille du fichier.
+    """
+    if not VIDEO_ID_PATTERN.match(video_id):
+        return jsonify({"error": "Invalid YouTube video id."}), 400
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    
+    try:
+        _, stream, stream_resolution = call_with_retry(
+            'metadata', lambda: select_stream(url, video_id, resolution),
+            retry_policy(), RetryState(), on_retry=retry_logger('stream')
+        )
+    except Exception as e:
+        print(f"Échec de la résolution du stream {video_id}: {str(e)}")
+        return jsonify({"error": f"Failed to resolve stream: {str(e)}"}), 502
+    if not stream:
+        return jsonify({"error": "No suitable video stream found."}), 404
+    
+    headers = {
+        'Content-Disposition': f'inline; filename="{video_id}_{stream_resolution}.mp4"',
+        'X-Stream-Resolution': stream_resolution,
+    }
+    
+    def relay(chunks):
+        for chunk in chunks:
+            metrics.BYTES_TRANSFERRED.labels('proxy').inc(len(chunk))
+            yield chunk
+    
+    size = None if stream.is_sabr else stream.filesize
+    if not size:
+        # Taille inconnue (SABR): flux complet, sans prise en charge de Range
+        return Response(relay(stream.iter_chunks()), mimetype=stream.mime_type, headers=headers)
+    
+    try:
+        byte_range = parse_range_header(request.headers.get('Range'), size)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 416, {'Content-Range': f"bytes */{size}"}
+    
+    headers['Accept-Ranges'] = 'bytes'
+    start, end = byte_range or (0, size - 1)
+    headers['Content-Length'] = str(end - start + 1)
+    status = 200
+    if byte_range:
+        headers['Content-Range'] = f"bytes {start}-{end}/{size}"
+        status = 206
+    
+    chunks = range_downloader.relay(stream.url, start, end)
+    return Response(relay(chunks), status=status, mimetype=stream.mime_type, headers=headers)
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Liste les jobs (plus récents d'abord), filtrables par état: /jobs?state=failed&limit=50"""
+    state = request.args.get('state')
+    if state and state not in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED):
+        return jsonify({"error": f"État inconnu: {state}"}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), 500))
+        before = float(request.args['before']) if 'before' in request.args else None
+    except ValueError:
+        return jsonify({"error": "'limit' and 'before' must be numbers."}), 400
+    
+    jobs = job_manager.list(state, limit, before)
+    response = {"jobs": jobs, "count": len(jobs)}
+    if len(jobs) == limit:
+        # Curseur de pagination: created_at du dernier job renvoyé
+        response["next_before"] = jobs[-1]['timings']['created_at']
+    return jsonify(response), 200
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Retourne l'état, la progression, les timings et le résultat d'un job"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({"error": f"Job introuvable: {job_id}"}), 404
+    return jsonify(job.to_dict()), 200
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Flux Server-Sent Events de la progression d'un job, jusqu'à sa fin"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({"error": f"Job introuvable: {job_id}"}), 404
+    
+    def generate(job=job):
+        version = None
+        while True:
+            # Job d'un autre worker: relu depuis le store partagé
+            job, current = job_manager.wait_for_change(job, version, Config.SSE_KEEPALIVE_SECONDS)
+            if current == version and job.state not in FINISHED_STATES:
+                # Commentaire SSE pour garder la connexion ouverte à travers les proxies
+                yield ": keepalive\n\n"
+                continue
+            version = current
+            snapshot = job.to_dict()
+            if snapshot['state'] in FINISHED_STATES:
+                yield f"id: {snapshot['version']}\nevent: {snapshot['state']}\ndata: {json.dumps(snapshot)}\n\n"
+                return
+            yield f"id: {snapshot['version']}\nevent: progress\ndata: {json.dumps(snapshot['progress'])}\n\n"
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/index/rebuild', methods=['POST'])
+def rebuild_download_index():
+    """Reconstruit l'index des téléchargements locaux depuis le dossier de téléchargement"""
+    try:
+        count = download_index.rebuild_from_folder(Config.DOWNLOAD_FOLDER)
+        return jsonify({
+            "message": f"Index reconstruit: {count} fichiers",
+            "download_index": download_index.stats()
+        }), 200
+    except Exception as e:
+        return jsonify({"error": f"Erreur lors de la reconstruction de l'index: {str(e)}"}), 500
+
+@app.route('/token/reload', methods=['POST'])
+def reload_token():
+    """Recharge token_youtube.json à chaud (appelé par renew_token.sh)"""
+    success, message = po_token_store.reload()
+    if success:
+        return jsonify({"message": message, "po_token": po_token_store.status()}), 200
+    return jsonify({"error": message, "po_token": po_token_store.status()}), 500
+
 @app.route('/video_info', methods=['POST'])
 def video_info():
     try:
@@ -301,9 +1113,15 @@ def video_info():
         print(f"Unexpected error in video_info endpoint: {str(e)}")
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    return jsonify({
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Métriques au format Prometheus (compteurs, erreurs, histogrammes par phase)"""
+    body, content_type = metrics.render()
+    return body, 200, {'Content-Type': content_type}
+
+def health_payload():
+    """Corps de /health (partagé avec le serveur asyncio)"""
+    return {
         "status": "healthy", 
         "message": "YouTube Download API is running (pytubefix + Google Drive)",
         "config": {
@@ -313,12 +1131,39 @@ def health_check():
             "library": "pytubefix 9.4.1",
             "token_youtube_present": os.path.exists(TOKEN_FILE),
             "token_youtube_mtime": (os.path.getmtime(TOKEN_FILE) if os.path.exists(TOKEN_FILE) else None),
+            "po_token": po_token_store.status(),
+            "youtube_clients": client_selector.snapshot(),
+            "download_index": download_index.stats(),
+            "retry_budget": retry_budget.stats(),
+            "rate_limits": rate_governor.snapshot(),
+            "coalescing": {
+                "download": download_flights.stats(),
+                "video_info": video_info_flights.stats()
+            },
             "google_drive": {
                 "enabled": Config.GOOGLE_DRIVE_ENABLED,
-                "folder_id": Config.GOOGLE_DRIVE_FOLDER_ID if Config.GOOGLE_DRIVE_FOLDER_ID else "Non configuré"
+                "folder_id": Config.GOOGLE_DRIVE_FOLDER_ID if Config.GOOGLE_DRIVE_FOLDER_ID else "Non configuré",
+                # Sans Drive, google_drive n'est jamais importé
+                "uploads": get_drive_manager().upload_stats() if Config.GOOGLE_DRIVE_ENABLED else None,
+                "folder_index": get_drive_manager().folder_index.stats() if Config.GOOGLE_DRIVE_ENABLED else None
+            },
+            "startup": startup.report.stats(),
+            "jobs": job_manager.stats(),
+            "process": {
+                "pid": os.getpid(),
+                "job_owner": job_manager.owner,
+                "shared_state": shared_state.stats() if shared_state else None
+            },
+            "metadata_cache": {
+                "youtube": youtube_cache.stats(),
+                "video_info": video_info_cache.stats()
             }
         }
-    }), 200
+    }
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    return jsonify(health_payload()), 200
 
 @app.route('/available_resolutions/<video_id>', methods=['GET'])
 def get_available_resolutions(video_id):
@@ -367,14 +1212,14 @@ def troubleshoot():
                 "description": "Trop de requêtes envoyées",
                 "solutions": [
                     "Attendez 15-30 minutes avant de réessayer",
-                    "Réduisez la fréquence des requêtes",
-                    "Utilisez l'endpoint /health pour vérifier le statut"
+                    "Réduisez la fréquence des requêtes (RATE_LIMITS)",
+                    "Utilisez l'endpoint /health pour vérifier le statut (rate_limits: débit courant et attentes)"
                 ]
             }
         },
         "tips": [
             "L'API utilise maintenant pytubefix (plus robuste que pytube)",
-            "Retry logic avec délais aléatoires",
+            "Relances avec backoff exponentiel, Retry-After et budget global",
             "Les erreurs 403/400 sont souvent temporaires",
             "Essayez différentes résolutions si une échoue",
             "Vérifiez les logs de l'API pour plus de détails"
@@ -405,7 +1250,7 @@ def drive_status():
                 "message": "Google Drive est désactivé dans la configuration"
             }), 200
         
-        drive_manager = GoogleDriveManager()
+        drive_manager = get_drive_manager()
         auth_result = drive_manager.authenticate()
         
         if auth_result:
@@ -446,7 +1291,7 @@ def list_drive_files():
         if not Config.GOOGLE_DRIVE_ENABLED:
             return jsonify({"error": "Google Drive est désactivé"}), 400
         
-        drive_manager = GoogleDriveManager()
+        drive_manager = get_drive_manager()
         files_result = drive_manager.list_files()
         
         if files_result[0]:  # files_result est un tuple (success, data)
@@ -454,6 +1299,7 @@ def list_drive_files():
             return jsonify({
                 "files": files,
                 "count": len(files),
+                "index": drive_manager.folder_index.stats(),
                 "message": "Fichiers récupérés avec succès"
             }), 200
         else:
@@ -479,4 +1325,13 @@ if __name__ == '__main__':
     print(f"Library: pytubefix 9.4.1")
     print(f"User-Agent: {get_working_user_agent()}")
     
-    app.run(debug=Config.DEBUG, host='0.0.0.0', port=5000)
+    # Avec le reloader (debug), seul le processus enfant exécute les jobs
+    if not Config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        job_manager.start()
+        startup.report.ready("API Flask", Config.IMPORT_TIME_BUDGET_MS)
+        start_background_tasks()
+    # Serveur de développement mono-processus; en production: gunicorn -c gunicorn.conf.py wsgi:app
+    try:
+        app.run(debug=Config.DEBUG, host='0.0.0.0', port=5000)
+    finally:
+        job_manager.stop()
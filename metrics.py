@@ -0,0 +1,128 @@
+import os
+import time
+
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, CONTENT_TYPE_LATEST, generate_latest
+
+# Mode multi-processus de prometheus_client (workers gunicorn): chaque worker écrit ses
+# valeurs dans ce dossier, /metrics agrège tous les workers
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+# Bornes adaptées aux durées observées: de la requête innertube (~0.1 s)
+# au transfert complet d'une longue vidéo (plusieurs minutes)
+PHASE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+HTTP_REQUESTS = Counter(
+    'ytapi_http_requests_total',
+    "Requêtes HTTP reçues par l'API",
+    ['endpoint', 'method', 'status']
+)
+HTTP_LATENCY = Histogram(
+    'ytapi_http_request_duration_seconds',
+    'Durée de traitement des requêtes HTTP',
+    ['endpoint'],
+    buckets=PHASE_BUCKETS
+)
+
+PHASE_DURATION = Histogram(
+    'ytapi_phase_duration_seconds',
+    "Durée de chaque phase d'un téléchargement ou d'une récupération d'infos",
+    ['phase'],
+    buckets=PHASE_BUCKETS
+)
+OPERATIONS = Counter(
+    'ytapi_operations_total',
+    'Téléchargements et récupérations d\'infos terminés, par résultat',
+    ['operation', 'outcome']
+)
+ERRORS = Counter(
+    'ytapi_errors_total',
+    'Tentatives échouées, par classe d\'erreur (403, 400, 429, other)',
+    ['operation', 'error_class']
+)
+RETRIES = Counter(
+    'ytapi_retries_total',
+    'Nouvelles tentatives après un échec, par phase relancée',
+    ['operation', 'phase']
+)
+YOUTUBE_CLIENT_ATTEMPTS = Counter(
+    'ytapi_youtube_client_attempts_total',
+    'Créations d\'objet YouTube par type de client et résultat',
+    ['client', 'outcome']
+)
+BYTES_TRANSFERRED = Counter(
+    'ytapi_bytes_transferred_total',
+    'Octets téléchargés depuis YouTube ou uploadés sur Google Drive',
+    ['direction']
+)
+IN_PROGRESS = Gauge(
+    'ytapi_in_progress',
+    'Opérations en cours (synchrones ou en job)',
+    ['operation'],
+    multiprocess_mode='livesum'
+)
+JOBS = Gauge(
+    'ytapi_jobs',
+    'Jobs connus du gestionnaire, par état',
+    ['state']
+)
+
+# Phases mesurées
+PHASE_YOUTUBE_INIT = 'youtube_init'        # création de l'objet YouTube + requête player
+PHASE_STREAM_SELECT = 'stream_select'      # yt.streams.filter / choix de la résolution
+PHASE_DOWNLOAD = 'download'                # transfert des octets vers le disque local
+PHASE_DRIVE_UPLOAD = 'drive_upload'        # transfert YouTube -> Drive en flux
+PHASE_VIDEO_INFO = 'video_info'            # construction du dictionnaire /video_info
+
+
+def classify_error(error_msg):
+    """Classe d'erreur utilisée comme label (mêmes règles que les conseils affichés)"""
+    if "403" in error_msg or "Forbidden" in error_msg:
+        return '403'
+    if "400" in error_msg or "Bad Request" in error_msg:
+        return '400'
+    if "429" in error_msg or "Too Many Requests" in error_msg:
+        return '429'
+    return 'other'
+
+
+def phase_timer(phase):
+    """Context manager mesurant la durée d'une phase"""
+    return PHASE_DURATION.labels(phase).time()
+
+
+def track_jobs(job_manager):
+    """Expose les compteurs de job_manager.stats() sous forme de jauges"""
+    if MULTIPROCESS:
+        # Jauges calculées non supportées en multi-processus: compteurs dans /health
+        return
+    for state in job_manager.stats()['counts']:
+        JOBS.labels(state).set_function(lambda state=state: job_manager.stats()['counts'][state])
+
+
+def instrument_app(app):
+    """Compte et chronomètre chaque requête HTTP de l'application Flask"""
+    from flask import request, g
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        # Gabarit de la route (/jobs/<job_id>) pour borner la cardinalité des labels
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            HTTP_LATENCY.labels(endpoint).observe(time.perf_counter() - started)
+        return response
+
+
+def render():
+    """Corps et Content-Type de la réponse /metrics"""
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+import time
+
+
+class PoTokenStore:
+    """visitorData/poToken gardés en mémoire et rechargés à chaud
+
+    Le fichier n'est relu que lorsque sa date de modification change
+    (vérifiée au plus toutes les `check_interval` secondes), ou sur demande
+    via `reload()`. Un fichier invalide ne remplace jamais un token valide.
+
+    Avec `shared` (SharedState), `reload()` incrémente un compteur de
+    génération commun: les autres workers relisent le fichier dès leur
+    prochain `get()`, sans attendre leur propre vérification périodique.
+    """
+
+    # Compteur de génération dans SharedState
+    GENERATION = 'po_token'
+
+    def __init__(self, path, check_interval=5.0, shared=None):
+        self.path = path
+        self.check_interval = check_interval
+        self.shared = shared
+        self._generation = None
+        self._token = None
+        self._mtime = None
+        self._next_check = 0.0
+        self._loaded_at = None
+        self._reloads = 0
+        self._last_error = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Retourne le tuple (visitor_data, po_token) courant"""
+        now = time.monotonic()
+        generation = self.shared.generation(self.GENERATION) if self.shared else None
+        if generation != self._generation:
+            # Rechargement demandé à un autre worker (POST /token/reload)
+            with self._lock:
+                if generation != self._generation:
+                    self._generation = generation
+                    self._next_check = now + self.check_interval
+                    self._reload_locked()
+        elif now >= self._next_check:
+            with self._lock:
+                if now >= self._next_check:
+                    self._next_check = now + self.check_interval
+                    self._reload_if_changed_locked()
+
+        token = self._token
+        if token is None:
+            if self._last_error:
+                raise RuntimeError(self._last_error)
+            raise RuntimeError("token_youtube.json introuvable. Lancez renew_token.sh d'abord.")
+        return token
+
+    def reload(self):
+        """Force la relecture du fichier (dans tous les workers si partagé), retourne (success, message)"""
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            success, message = self._reload_locked()
+            if success and self.shared:
+                self._generation = self.shared.bump_generation(self.GENERATION)
+            return success, message
+
+    def status(self):
+        """État exposé dans /health"""
+        with self._lock:
+            return {
+                'loaded': self._token is not None,
+                'file_mtime': self._mtime,
+                'loaded_at': self._loaded_at,
+                'reloads': self._reloads,
+                'last_error': self._last_error,
+                'shared_generation': self._generation,
+            }
+
+    def _reload_locked(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._last_error = "token_youtube.json introuvable. Lancez renew_token.sh d'abord."
+            return False, self._last_error
+        return self._load_locked(mtime)
+
+    def _reload_if_changed_locked(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            if self._token is None:
+                self._last_error = "token_youtube.json introuvable. Lancez renew_token.sh d'abord."
+            return
+        if mtime != self._mtime:
+            self._load_locked(mtime)
+
+    def _load_locked(self, mtime):
+        # Lecture et validation avant remplacement du token courant
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            visitor_data = data.get('visitorData')
+            po_token = data.get('poToken') or data.get('po_token')
+            if not visitor_data or not po_token:
+                raise ValueError("token_youtube.json invalide (manque visitorData ou poToken)")
+        except (OSError, ValueError, AttributeError) as e:
+            # On retente à la prochaine vérification (le fichier était peut-être en cours d'écriture)
+            self._last_error = f"Rechargement du PO token ignoré: {e}"
+            print(self._last_error)
+            return False, self._last_error
+
+        self._token = (visitor_data, po_token)
+        self._mtime = mtime
+        self._loaded_at = time.time()
+        self._reloads += 1
+        self._last_error = None
+        print(f"PO token chargé depuis {self.path}")
+        return True, "PO token rechargé"
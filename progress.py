@@ -0,0 +1,87 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TransferProgress:
+    """Débit instantané/moyen et ETA d'un transfert, avec publication limitée
+
+    `due()` est volontairement sans verrou ni allocation: il est appelé à
+    chaque chunk reçu et doit rester négligeable sur un lien rapide.
+    """
+
+    def __init__(self, phase, min_interval=0.5, smoothing=0.3):
+        self.phase = phase
+        self.min_interval = min_interval
+        self.smoothing = smoothing
+        self.started = time.monotonic()
+        self.last_emit = 0.0
+        self.last_time = self.started
+        self.last_bytes = 0
+        self.rate = None
+
+    def due(self, now, bytes_done, bytes_total):
+        """Vrai si une nouvelle publication est justifiée (intervalle écoulé ou fin)"""
+        return now - self.last_emit >= self.min_interval or (bytes_total is not None and bytes_done >= bytes_total)
+
+    def update(self, now, bytes_done, bytes_total):
+        """Retourne les champs de progression enrichis (débits en octets/s, ETA en s)"""
+        elapsed = now - self.last_time
+        if elapsed > 0 and bytes_done >= self.last_bytes:
+            instant = (bytes_done - self.last_bytes) / elapsed
+            # Moyenne mobile exponentielle pour lisser le débit instantané
+            self.rate = instant if self.rate is None else self.smoothing * instant + (1 - self.smoothing) * self.rate
+        self.last_time = now
+        self.last_bytes = bytes_done
+        self.last_emit = now
+
+        total_elapsed = now - self.started
+        average = bytes_done / total_elapsed if total_elapsed > 0 else None
+        fields = {
+            'bytes_done': bytes_done,
+            'bytes_total': bytes_total,
+            'percent': round(100.0 * bytes_done / bytes_total, 1) if bytes_total else None,
+            'throughput_bps': round(self.rate) if self.rate is not None else None,
+            'average_bps': round(average) if average is not None else None,
+            'eta_seconds': None,
+        }
+        if bytes_total and self.rate:
+            fields['eta_seconds'] = round(max(bytes_total - bytes_done, 0) / self.rate, 1)
+        return fields
+
+
+class StreamProgressDispatcher:
+    """Callback `on_progress_callback` unique partagé par les objets YouTube
+
+    Les objets YouTube sont mis en cache et partagés entre requêtes: au lieu
+    d'y installer un callback par requête, chaque téléchargement s'abonne
+    aux notifications de son stream le temps du transfert.
+    """
+
+    def __init__(self):
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, stream, chunk, bytes_remaining):
+        listeners = self._listeners.get(id(stream))
+        if not listeners:
+            return
+        total = stream.filesize
+        for callback in listeners:
+            callback(total - bytes_remaining, total)
+
+    @contextmanager
+    def listen(self, stream, callback):
+        """Appelle `callback(bytes_done, bytes_total)` pour chaque chunk de `stream`"""
+        key = id(stream)
+        with self._lock:
+            self._listeners[key] = self._listeners.get(key, ()) + (callback,)
+        try:
+            yield
+        finally:
+            with self._lock:
+                remaining = tuple(cb for cb in self._listeners.get(key, ()) if cb is not callback)
+                if remaining:
+                    self._listeners[key] = remaining
+                else:
+                    self._listeners.pop(key, None)
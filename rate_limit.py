@@ -0,0 +1,322 @@
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+
+# Réponses qui signalent que YouTube nous trouve trop rapides
+THROTTLE_STATUSES = (403, 429)
+
+
+class RateLimitTimeout(Exception):
+    """Levée quand l'attente d'un jeton dépasserait le délai maximal"""
+
+
+class TokenBucket:
+    """Seau à jetons à débit adaptatif (AIMD)
+
+    Un appel sans jeton disponible réserve le prochain jeton et attend son
+    tour (file FIFO implicite) au lieu de partir immédiatement. Chaque
+    réponse 429/403 divise le débit par deux (au plus une fois par seconde),
+    chaque succès le fait remonter progressivement vers `max_rate`.
+    """
+
+    def __init__(self, name, max_rate, burst, min_rate, recovery_step=0.05):
+        self.name = name
+        self.max_rate = max_rate
+        self.rate = max_rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.recovery_step = recovery_step
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.last_decrease = 0.0
+        self.waiting = 0
+        self.acquired = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait=None):
+        """Réserve un jeton, retourne l'attente avant de pouvoir l'utiliser
+
+        Une attente non nulle doit être suivie de `done_waiting()`.
+        """
+        with self._lock:
+            self._refill_locked()
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                raise RateLimitTimeout(f"Limite de débit {self.name}: attente de {wait:.1f}s refusée")
+            self.tokens -= 1
+            self.acquired += 1
+            self.wait_seconds += wait
+            if wait:
+                self.waiting += 1
+        return wait
+
+    def done_waiting(self):
+        with self._lock:
+            self.waiting -= 1
+
+    def acquire(self, max_wait=None):
+        """Prend un jeton, en attendant si nécessaire; retourne le temps attendu"""
+        wait = self.reserve(max_wait)
+        if wait:
+            time.sleep(wait)
+            self.done_waiting()
+        return wait
+
+    def on_throttled(self):
+        """Réponse 429/403: réduction multiplicative du débit"""
+        with self._lock:
+            self.throttled += 1
+            now = time.monotonic()
+            if now - self.last_decrease < 1.0:
+                return
+            self._refill_locked()
+            self.last_decrease = now
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+            print(f"Limite de débit {self.name} réduite à {self.rate:.2f} req/s")
+
+    def on_success(self):
+        """Réponse correcte: augmentation additive du débit"""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self._refill_locked()
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery_step)
+
+    def to_dict(self):
+        with self._lock:
+            self._refill_locked()
+            return {
+                'rate': round(self.rate, 3),
+                'max_rate': self.max_rate,
+                'burst': self.burst,
+                'tokens': round(self.tokens, 2),
+                'waiting': self.waiting,
+                'acquired': self.acquired,
+                'throttled_responses': self.throttled,
+                'total_wait_seconds': round(self.wait_seconds, 3),
+            }
+
+    def _refill_locked(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class SharedTokenBucket(TokenBucket):
+    """TokenBucket dont l'état (jetons, débit courant) vit dans SharedState
+
+    Tous les workers d'une machine puisent dans le même seau: lancer N
+    processus ne multiplie pas le trafic sortant vers YouTube. Les
+    horodatages sont en temps réel (time.time), communs aux processus.
+    """
+
+    def __init__(self, name, max_rate, burst, min_rate, shared, recovery_step=0.05):
+        super().__init__(name, max_rate, burst, min_rate, recovery_step)
+        self.shared = shared
+
+    def _initial(self):
+        return {
+            'tokens': self.burst, 'updated': time.time(), 'rate': self.max_rate,
+            'last_decrease': 0.0, 'acquired': 0, 'throttled': 0, 'wait_seconds': 0.0,
+        }
+
+    def _refill(self, state, now):
+        state['tokens'] = min(self.burst, state['tokens'] + max(0.0, now - state['updated']) * state['rate'])
+        state['updated'] = now
+
+    def reserve(self, max_wait=None):
+        def update(state):
+            self._refill(state, time.time())
+            wait = 0.0 if state['tokens'] >= 1 else (1 - state['tokens']) / state['rate']
+            if max_wait is not None and wait > max_wait:
+                return state, wait
+            state['tokens'] -= 1
+            state['acquired'] += 1
+            state['wait_seconds'] += wait
+            return state, wait
+
+        wait = self.shared.bucket_update(self.name, update, self._initial())
+        if max_wait is not None and wait > max_wait:
+            raise RateLimitTimeout(f"Limite de débit {self.name}: attente de {wait:.1f}s refusée")
+        with self._lock:
+            self.acquired += 1
+            self.wait_seconds += wait
+            if wait:
+                self.waiting += 1
+        return wait
+
+    def on_throttled(self):
+        def update(state):
+            now = time.time()
+            state['throttled'] += 1
+            if now - state['last_decrease'] < 1.0:
+                return state, None
+            self._refill(state, now)
+            state['last_decrease'] = now
+            state['rate'] = max(self.min_rate, state['rate'] / 2)
+            state['tokens'] = min(state['tokens'], 0)
+            return state, state['rate']
+
+        with self._lock:
+            self.throttled += 1
+        rate = self.shared.bucket_update(self.name, update, self._initial())
+        if rate is not None:
+            self.rate = rate
+            print(f"Limite de débit {self.name} réduite à {rate:.2f} req/s (tous workers)")
+
+    def on_success(self):
+        # Lecture sans verrou du débit vu lors de la dernière mise à jour: évite une écriture par succès
+        if self.rate >= self.max_rate:
+            return
+
+        def update(state):
+            self._refill(state, time.time())
+            state['rate'] = min(self.max_rate, state['rate'] + self.max_rate * self.recovery_step)
+            return state, state['rate']
+
+        self.rate = self.shared.bucket_update(self.name, update, self._initial())
+
+    def to_dict(self):
+        state = self.shared.bucket_update(self.name, lambda state: (state, dict(state)), self._initial())
+        self._refill(state, time.time())
+        self.rate = state['rate']
+        with self._lock:
+            local = {'waiting': self.waiting, 'acquired': self.acquired, 'throttled_responses': self.throttled}
+        return {
+            'rate': round(state['rate'], 3),
+            'max_rate': self.max_rate,
+            'burst': self.burst,
+            'tokens': round(state['tokens'], 2),
+            'waiting': local['waiting'],
+            'acquired': local['acquired'],
+            'throttled_responses': local['throttled_responses'],
+            'total_wait_seconds': round(self.wait_seconds, 3),
+            'shared': {
+                'acquired': state['acquired'],
+                'throttled_responses': state['throttled'],
+                'total_wait_seconds': round(state['wait_seconds'], 3),
+            },
+        }
+
+
+class RateGovernor:
+    """Un seau par destination: innertube par type de client, googlevideo
+
+    `rates` associe un nom de seau (WEB, ANDROID, googlevideo, default...) à
+    un débit maximal en requêtes par seconde. Avec `shared` (SharedState),
+    les seaux sont communs à tous les processus workers.
+    """
+
+    def __init__(self, rates, burst_seconds=2.0, min_fraction=0.1, max_wait=60.0, enabled=True, shared=None):
+        self.rates = rates
+        self.shared = shared
+        self.burst_seconds = burst_seconds
+        self.min_fraction = min_fraction
+        self.max_wait = max_wait
+        self.enabled = enabled
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, name):
+        with self._lock:
+            bucket = self._buckets.get(name)
+            if bucket is None:
+                rate = self.rates.get(name, self.rates.get('default', 2.0))
+                burst = max(1.0, rate * self.burst_seconds)
+                if self.shared:
+                    bucket = SharedTokenBucket(name, rate, burst, rate * self.min_fraction, self.shared)
+                else:
+                    bucket = TokenBucket(name, rate, burst, rate * self.min_fraction)
+                self._buckets[name] = bucket
+            return bucket
+
+    def acquire(self, name):
+        if not self.enabled:
+            return None
+        bucket = self.bucket(name)
+        bucket.acquire(self.max_wait)
+        return bucket
+
+    async def acquire_async(self, name):
+        """Variante asyncio de `acquire`: l'attente ne bloque pas la boucle d'événements"""
+        import asyncio
+
+        if not self.enabled:
+            return None
+        bucket = self.bucket(name)
+        wait = bucket.reserve(self.max_wait)
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                bucket.done_waiting()
+        return bucket
+
+    def snapshot(self):
+        """État exposé dans /health"""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {
+            'enabled': self.enabled,
+            'shared': bool(self.shared),
+            'buckets': {name: bucket.to_dict() for name, bucket in buckets.items()},
+        }
+
+
+def bucket_for_request(url, headers=None, data=None, client_names=None):
+    """Seau correspondant à une requête pytubefix"""
+    host = urlsplit(url).hostname or ''
+    if host.endswith('googlevideo.com'):
+        return 'googlevideo'
+    if isinstance(data, dict):
+        client = data.get('context', {}).get('client', {}).get('clientName')
+        if client:
+            return client
+    client_id = (headers or {}).get('X-Youtube-Client-Name')
+    if client_id and client_names:
+        return client_names.get(str(client_id), 'default')
+    return 'default'
+
+
+def pytubefix_client_names():
+    """Identifiant numérique (X-Youtube-Client-Name) -> nom du client innertube"""
+    from pytubefix import innertube
+
+    client_names = {}
+    for name, client in innertube._default_clients.items():
+        client_id = client.get('header', {}).get('X-Youtube-Client-Name')
+        if client_id:
+            client_names.setdefault(str(client_id), client['innertube_context']['context']['client']['clientName'])
+    return client_names
+
+
+def install_pytubefix_hook(governor):
+    """Fait passer toutes les requêtes HTTP synchrones de pytubefix par le gouverneur
+
+    innertube appelle `request._execute_request` et les fonctions de
+    `pytubefix.request` appellent la globale du module: remplacer l'attribut
+    du module suffit pour couvrir player, watch page et googlevideo.
+    """
+    from pytubefix import request
+
+    original = getattr(request._execute_request, '__wrapped__', request._execute_request)
+    client_names = pytubefix_client_names()
+
+    def governed_execute_request(url, method=None, headers=None, data=None, *args, **kwargs):
+        bucket = governor.acquire(bucket_for_request(url, headers, data, client_names))
+        try:
+            response = original(url, method, headers, data, *args, **kwargs)
+        except HTTPError as e:
+            if bucket and e.code in THROTTLE_STATUSES:
+                bucket.on_throttled()
+            raise
+        if bucket:
+            bucket.on_success()
+        return response
+
+    governed_execute_request.__wrapped__ = original
+    request._execute_request = governed_execute_request
@@ -4,24 +4,29 @@ set -e
 # Determine le repertoire du projet automatiquement (repertoire ou se trouve ce script)
 PROJECT_DIR="$(cd "$(dirname "$0")" && pwd)"
 TOKEN_FILE="$PROJECT_DIR/token_youtube.json"
+TMP_FILE="$TOKEN_FILE.tmp"
+API_URL="${API_URL:-http://localhost:5000}"
 
 echo "[$(date)] : Generation d'un nouveau PO token..."
 
-# Generation et ecriture dans token_youtube.json
-youtube-po-token-generator > "$TOKEN_FILE"
+# Generation dans un fichier temporaire (l'API ne doit jamais lire un fichier partiel)
+youtube-po-token-generator > "$TMP_FILE"
 
 # Verification du contenu
-if grep -q '"poToken":' "$TOKEN_FILE"; then
+if grep -q '"poToken":' "$TMP_FILE"; then
+  # Remplacement atomique du token
+  mv -f "$TMP_FILE" "$TOKEN_FILE"
   echo "[$(date)] : PO token genere avec succes et enregistre dans $TOKEN_FILE"
 else
+  rm -f "$TMP_FILE"
   echo "[$(date)] : echec de la generation du PO token !" >&2
   exit 1
 fi
 
-# (Optionnel) Redemarrage automatique de l'API si elle tourne via systemd
-if command -v systemctl >/dev/null 2>&1 && systemctl is-active --quiet youtube-api; then
-  echo "[$(date)] : Redemarrage de l'API..."
-  systemctl restart youtube-api
+# Rechargement a chaud du token par l'API (plus de redemarrage, les telechargements en cours continuent).
+# Sans reponse de l'API, le changement du fichier est de toute facon detecte automatiquement.
+if command -v curl >/dev/null 2>&1 && curl -fsS -X POST "$API_URL/token/reload" >/dev/null 2>&1; then
+  echo "[$(date)] : PO token recharge par l'API"
+else
+  echo "[$(date)] : API injoignable, le token sera pris en compte a la prochaine verification"
 fi
-
-
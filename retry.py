@@ -0,0 +1,253 @@
+import heapq
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+
+class RetryLater(Exception):
+    """Demande de nouvelle tentative différée, sans bloquer le thread courant
+
+    Levée par `call_with_retry(..., blocking=False)`: l'appelant (le
+    gestionnaire de jobs) replanifie l'opération dans `delay` secondes.
+    """
+
+    def __init__(self, delay, phase, error):
+        super().__init__(f"Nouvelle tentative ({phase}) dans {delay:.1f}s: {error}")
+        self.delay = delay
+        self.phase = phase
+        self.error = error
+
+
+def retry_after_seconds(error):
+    """Délai imposé par le serveur (en-tête Retry-After), ou None"""
+    headers = getattr(error, 'headers', None)
+    response = getattr(error, 'response', None)
+    if headers is None and response is not None:
+        headers = getattr(response, 'headers', None)
+    value = headers.get('Retry-After') if headers is not None else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, delay_min, delay_max, max_delay):
+    """Backoff exponentiel avec jitter: [min, max] pour la 1re relance, doublé ensuite"""
+    factor = 2 ** max(attempt - 1, 0)
+    return min(random.uniform(delay_min, delay_max) * factor, max_delay)
+
+
+class RetryBudget:
+    """Budget de relances partagé par toutes les opérations
+
+    Sur une fenêtre glissante de `window` secondes, les relances sont limitées
+    à `ratio` fois le nombre d'opérations, plus une réserve de
+    `min_per_second` relances par seconde. Une panne de YouTube ne multiplie
+    donc pas le trafic sortant par MAX_RETRIES. Avec `shared` (SharedState),
+    opérations et relances sont comptées sur l'ensemble des processus workers.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=0.5, window=10.0, shared=None):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self.shared = shared
+        self._requests = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+        self.denied = 0
+
+    def _allowed(self, requests):
+        return self.ratio * requests + self.min_per_second * self.window
+
+    def deposit(self):
+        """Enregistre une nouvelle opération (première tentative)"""
+        if self.shared:
+            self.shared.record_event('request', self.window)
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._purge_locked(now)
+            self._requests.append(now)
+
+    def try_withdraw(self):
+        """Réserve une relance, retourne False si le budget est épuisé"""
+        if self.shared:
+            withdrawn = self.shared.try_record_event(
+                'retry', self.window,
+                lambda counts: counts.get('retry', 0) < self._allowed(counts.get('request', 0))
+            )
+            if not withdrawn:
+                with self._lock:
+                    self.denied += 1
+            return withdrawn
+        with self._lock:
+            now = time.monotonic()
+            self._purge_locked(now)
+            allowed = self._allowed(len(self._requests))
+            if len(self._retries) >= allowed:
+                self.denied += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def stats(self):
+        if self.shared:
+            counts = self.shared.count_events(self.window)
+            requests, retries = counts.get('request', 0), counts.get('retry', 0)
+        else:
+            with self._lock:
+                self._purge_locked(time.monotonic())
+                requests, retries = len(self._requests), len(self._retries)
+        return {
+            'window_seconds': self.window,
+            'requests': requests,
+            'retries': retries,
+            'allowed_retries': round(self._allowed(requests), 1),
+            'denied': self.denied,
+            'shared': bool(self.shared),
+        }
+
+    def _purge_locked(self, now):
+        limit = now - self.window
+        for timestamps in (self._requests, self._retries):
+            while timestamps and timestamps[0] < limit:
+                timestamps.popleft()
+
+
+class RetryState:
+    """Tentatives d'une opération, par phase (conservé entre replanifications)"""
+
+    def __init__(self):
+        self.attempts = {}
+        self.deposited = False
+        self.last_error = None
+
+    def total(self):
+        return sum(self.attempts.values())
+
+
+class RetryPolicy:
+    """Décide si et quand relancer une phase qui a échoué"""
+
+    def __init__(self, max_attempts, delay_min, delay_max, max_delay, max_retry_after, budget=None, non_retryable=()):
+        self.max_attempts = max_attempts
+        self.delay_min = delay_min
+        self.delay_max = delay_max
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.budget = budget
+        self.non_retryable = tuple(non_retryable)
+
+    def begin(self, state):
+        """Compte l'opération dans le budget global (une seule fois)"""
+        if self.budget and not state.deposited:
+            self.budget.deposit()
+            state.deposited = True
+
+    def next_delay(self, state, phase, error):
+        """Délai avant la prochaine tentative de `phase`, ou None pour abandonner"""
+        state.last_error = error
+        attempts = state.attempts[phase] = state.attempts.get(phase, 0) + 1
+        if isinstance(error, self.non_retryable) or attempts >= self.max_attempts:
+            return None
+
+        delay = backoff_delay(attempts, self.delay_min, self.delay_max, self.max_delay)
+        hint = retry_after_seconds(error)
+        if hint is not None:
+            if hint > self.max_retry_after:
+                # Attente demandée trop longue: inutile d'occuper la file
+                return None
+            delay = max(delay, hint)
+
+        if self.budget and not self.budget.try_withdraw():
+            print(f"Budget de relances épuisé, abandon de la phase {phase}")
+            return None
+        return delay
+
+
+def call_with_retry(phase, func, policy, state, blocking=True, on_retry=None):
+    """Exécute `func()` et relance uniquement cette phase en cas d'échec
+
+    En mode bloquant, l'attente se fait dans le thread courant; sinon
+    RetryLater est levée pour que l'appelant replanifie l'opération.
+    """
+    policy.begin(state)
+    while True:
+        try:
+            return func()
+        except RetryLater:
+            raise
+        except Exception as e:
+            delay = policy.next_delay(state, phase, e)
+            if delay is None:
+                raise
+            if on_retry:
+                on_retry(phase, state.attempts[phase], delay, e)
+            if not blocking:
+                raise RetryLater(delay, phase, e) from e
+            time.sleep(delay)
+
+
+async def call_with_retry_async(phase, func, policy, state, on_retry=None):
+    """Variante asyncio de `call_with_retry`: `func()` retourne une coroutine
+
+    L'attente entre deux tentatives ne bloque pas la boucle d'événements.
+    """
+    # asyncio importé ici: seul le serveur asyncio en a besoin (démarrage à froid de main.py)
+    import asyncio
+
+    policy.begin(state)
+    while True:
+        try:
+            return await func()
+        except Exception as e:
+            delay = policy.next_delay(state, phase, e)
+            if delay is None:
+                raise
+            if on_retry:
+                on_retry(phase, state.attempts[phase], delay, e)
+            await asyncio.sleep(delay)
+
+
+class RetryScheduler:
+    """Exécute des callbacks après un délai, depuis un unique thread minuteur"""
+
+    def __init__(self, name='retry-scheduler'):
+        self.name = name
+        self._heap = []
+        self._counter = 0
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def schedule(self, delay, func):
+        with self._condition:
+            self._counter += 1
+            heapq.heappush(self._heap, (time.monotonic() + delay, self._counter, func))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def pending(self):
+        with self._condition:
+            return len(self._heap)
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._condition.wait(timeout)
+                _, _, func = heapq.heappop(self._heap)
+            try:
+                func()
+            except Exception as e:
+                print(f"Erreur dans une tâche planifiée: {e}")
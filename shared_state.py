@@ -0,0 +1,340 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS buckets (
+        name TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated REAL NOT NULL,
+        rate REAL NOT NULL,
+        last_decrease REAL NOT NULL DEFAULT 0,
+        acquired INTEGER NOT NULL DEFAULT 0,
+        throttled INTEGER NOT NULL DEFAULT 0,
+        wait_seconds REAL NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS retry_events (
+        kind TEXT NOT NULL,
+        at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS retry_events_kind_at ON retry_events (kind, at)",
+    """
+    CREATE TABLE IF NOT EXISTS leases (
+        name TEXT NOT NULL,
+        key TEXT NOT NULL,
+        owner TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (name, key)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS cache (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (namespace, key)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at)",
+    """
+    CREATE TABLE IF NOT EXISTS breakers (
+        name TEXT PRIMARY KEY,
+        state TEXT NOT NULL,
+        consecutive_failures INTEGER NOT NULL DEFAULT 0,
+        opened_at REAL,
+        last_attempt_at REAL,
+        probe_owner TEXT,
+        probe_expires REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS generations (
+        name TEXT PRIMARY KEY,
+        generation INTEGER NOT NULL
+    )
+    """,
+)
+
+BREAKER_COLUMNS = ('state', 'consecutive_failures', 'opened_at', 'last_attempt_at', 'probe_owner', 'probe_expires')
+
+
+def process_owner():
+    """Identifiant unique du processus courant (hôte, pid, nonce)"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class SharedState:
+    """État partagé entre les processus workers d'une même machine (SQLite, mode WAL)
+
+    Regroupe ce qui ne doit pas être multiplié par le nombre de workers:
+    seaux de la limite de débit, budget de relances, baux de mutualisation
+    des requêtes identiques, cache des métadonnées, circuits des clients
+    YouTube et compteurs de génération (rechargements à propager). Les
+    opérations lecture-modification-écriture passent par une transaction
+    `BEGIN IMMEDIATE`: un seul processus à la fois modifie une ligne.
+
+    Les baux (`leases`) expirent après `lease_ttl` secondes; un thread les
+    renouvelle tant que le processus qui les détient est vivant, un worker
+    tué libère donc les siens en moins de `lease_ttl` secondes.
+    """
+
+    # Fréquence maximale de purge des entrées expirées
+    PURGE_INTERVAL = 60
+
+    def __init__(self, path, lease_ttl=30.0):
+        self.path = path
+        self.lease_ttl = lease_ttl
+        self.owner = process_owner()
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._last_purge = 0.0
+        self._stop = threading.Event()
+        self._renewer = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            conn.execute(statement)
+        return conn
+
+    def _check_fork(self):
+        if os.getpid() != self._pid:
+            # Connexion héritée d'un fork: SQLite interdit de la réutiliser
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            self._conn = self._connect()
+            self.owner = process_owner()
+            self._renewer = None
+
+    def transaction(self):
+        """Context manager: connexion du processus dans une transaction exclusive en écriture"""
+        return _Transaction(self)
+
+    # Seaux de la limite de débit
+
+    def bucket_update(self, name, update, initial):
+        """Applique `update(state) -> (state, retour)` à la ligne du seau `name`, atomiquement
+
+        `state` est un dictionnaire aux colonnes de la table buckets;
+        `initial` est l'état d'un seau encore inconnu.
+        """
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT tokens, updated, rate, last_decrease, acquired, throttled, wait_seconds "
+                "FROM buckets WHERE name = ?", (name,)
+            ).fetchone()
+            if row:
+                state = dict(zip(('tokens', 'updated', 'rate', 'last_decrease', 'acquired', 'throttled', 'wait_seconds'), row))
+            else:
+                state = dict(initial)
+            state, result = update(state)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated, rate, last_decrease, acquired, throttled, wait_seconds) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, state['tokens'], state['updated'], state['rate'], state['last_decrease'],
+                 state['acquired'], state['throttled'], state['wait_seconds'])
+            )
+        return result
+
+    # Budget de relances
+
+    def record_event(self, kind, window):
+        with self.transaction() as conn:
+            now = time.time()
+            conn.execute("DELETE FROM retry_events WHERE at < ?", (now - window,))
+            conn.execute("INSERT INTO retry_events (kind, at) VALUES (?, ?)", (kind, now))
+
+    def count_events(self, window):
+        """Nombre d'événements par type sur les `window` dernières secondes"""
+        self._check_fork()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, COUNT(*) FROM retry_events WHERE at >= ? GROUP BY kind",
+                (time.time() - window,)
+            ).fetchall()
+        return dict(rows)
+
+    def try_record_event(self, kind, window, allowed):
+        """Enregistre l'événement si `allowed(comptes)` l'autorise, dans la même transaction"""
+        with self.transaction() as conn:
+            now = time.time()
+            conn.execute("DELETE FROM retry_events WHERE at < ?", (now - window,))
+            counts = dict(conn.execute("SELECT kind, COUNT(*) FROM retry_events GROUP BY kind").fetchall())
+            if not allowed(counts):
+                return False
+            conn.execute("INSERT INTO retry_events (kind, at) VALUES (?, ?)", (kind, now))
+            return True
+
+    # Baux de mutualisation
+
+    def try_lease(self, name, key):
+        """Prend le bail (name, key) s'il est libre ou expiré; retourne True si obtenu"""
+        with self.transaction() as conn:
+            now = time.time()
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ? AND key = ?", (name, key)).fetchone()
+            if row and row[0] != self.owner and row[1] > now:
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (name, key, owner, expires_at) VALUES (?, ?, ?, ?)",
+                (name, key, self.owner, now + self.lease_ttl)
+            )
+        self._ensure_renewer()
+        return True
+
+    def lease_held(self, name, key):
+        """Vrai si un autre processus vivant détient le bail"""
+        self._check_fork()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT owner, expires_at FROM leases WHERE name = ? AND key = ?", (name, key)
+            ).fetchone()
+        return bool(row) and row[0] != self.owner and row[1] > time.time()
+
+    def release_lease(self, name, key):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND key = ? AND owner = ?", (name, key, self.owner))
+
+    def release_all(self):
+        """Libère les baux de ce processus (arrêt propre)"""
+        self._stop.set()
+        try:
+            with self.transaction() as conn:
+                conn.execute("DELETE FROM leases WHERE owner = ?", (self.owner,))
+        except sqlite3.Error as e:
+            print(f"Impossible de libérer les baux partagés: {e}")
+
+    def _ensure_renewer(self):
+        if self._renewer is not None and self._renewer.is_alive():
+            return
+        with self._lock:
+            if self._renewer is not None and self._renewer.is_alive():
+                return
+            self._renewer = threading.Thread(target=self._renew_loop, name='shared-state-leases', daemon=True)
+            self._renewer.start()
+
+    def _renew_loop(self):
+        while not self._stop.wait(self.lease_ttl / 3):
+            try:
+                with self.transaction() as conn:
+                    conn.execute(
+                        "UPDATE leases SET expires_at = ? WHERE owner = ?",
+                        (time.time() + self.lease_ttl, self.owner)
+                    )
+            except sqlite3.Error as e:
+                print(f"Renouvellement des baux partagés en échec: {e}")
+
+    # Cache des métadonnées
+
+    def cache_get(self, namespace, key):
+        """Retourne (valeur, expires_at), ou (None, None) si absente ou expirée"""
+        self._check_fork()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, time.time())
+            ).fetchone()
+        if not row:
+            return None, None
+        return json.loads(row[0]), row[1]
+
+    def cache_set(self, namespace, key, value, expires_at):
+        data = json.dumps(value)
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, data, expires_at)
+            )
+            now = time.time()
+            if now - self._last_purge >= self.PURGE_INTERVAL:
+                self._last_purge = now
+                conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+    def cache_delete(self, namespace, key):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+
+    # Circuits des clients YouTube
+
+    def breakers_update(self, update):
+        """Applique `update(lignes) -> (lignes, retour)` à l'état de tous les circuits, atomiquement
+
+        `lignes` associe le nom d'un client à un dictionnaire aux colonnes
+        de la table breakers; seuls les clients déjà enregistrés y figurent.
+        """
+        with self.transaction() as conn:
+            rows = {
+                row[0]: dict(zip(BREAKER_COLUMNS, row[1:]))
+                for row in conn.execute(f"SELECT name, {', '.join(BREAKER_COLUMNS)} FROM breakers")
+            }
+            rows, result = update(rows)
+            conn.executemany(
+                f"INSERT OR REPLACE INTO breakers (name, {', '.join(BREAKER_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' * len(BREAKER_COLUMNS))})",
+                [(name,) + tuple(values[column] for column in BREAKER_COLUMNS) for name, values in rows.items()]
+            )
+        return result
+
+    # Compteurs de génération
+
+    def bump_generation(self, name):
+        """Incrémente le compteur `name` (ex: PO token rechargé), retourne sa nouvelle valeur"""
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO generations (name, generation) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET generation = generation + 1", (name,)
+            )
+            return conn.execute("SELECT generation FROM generations WHERE name = ?", (name,)).fetchone()[0]
+
+    def generation(self, name):
+        self._check_fork()
+        with self._lock:
+            row = self._conn.execute("SELECT generation FROM generations WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def stats(self):
+        self._check_fork()
+        with self._lock:
+            now = time.time()
+            leases = self._conn.execute("SELECT COUNT(*) FROM leases WHERE expires_at > ?", (now,)).fetchone()[0]
+            cached = self._conn.execute("SELECT COUNT(*) FROM cache WHERE expires_at > ?", (now,)).fetchone()[0]
+        return {
+            'path': self.path,
+            'owner': self.owner,
+            'active_leases': leases,
+            'cache_entries': cached,
+        }
+
+
+class _Transaction:
+    def __init__(self, state):
+        self.state = state
+
+    def __enter__(self):
+        state = self.state
+        state._check_fork()
+        state._lock.acquire()
+        try:
+            state._conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            state._lock.release()
+            raise
+        return state._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        conn = self.state._conn
+        try:
+            conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.state._lock.release()
@@ -0,0 +1,148 @@
+import threading
+import time
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.shared = False
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Déduplique les appels concurrents identiques
+
+    Pour une même clé, seul le premier appelant (le leader) exécute la
+    fonction; les appelants suivants attendent et reçoivent son résultat.
+
+    Avec `shared` (SharedState), le leader prend en plus un bail
+    inter-processus: si un autre worker traite déjà la même clé, il attend
+    la fin de ce traitement puis consulte `recheck()` (cache, index) avant
+    de faire lui-même l'appel.
+    """
+
+    def __init__(self, name, shared=None, poll_interval=0.25):
+        self.name = name
+        self.shared = shared
+        self.poll_interval = poll_interval
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.coalesced_remote = 0
+
+    def do(self, key, func, on_follow=None, recheck=None):
+        """Exécute `func()` ou attend l'appel identique déjà en cours
+
+        Retourne (result, shared) où `shared` indique que le résultat
+        provient d'un autre appelant. `recheck()` retourne le résultat
+        produit par un autre processus, ou None s'il faut appeler `func()`.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+                leader = True
+            else:
+                call.followers += 1
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            if on_follow:
+                on_follow()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result, call.shared = self._lead(key, func, on_follow, recheck)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, call.shared
+
+    def _lead(self, key, func, on_follow, recheck):
+        """Appel du leader de ce processus, après le bail inter-processus s'il y en a un"""
+        if not self.shared:
+            return func(), False
+        lease_key = repr(key)
+        followed = False
+        while not self.shared.try_lease(self.name, lease_key):
+            if not followed:
+                followed = True
+                with self._lock:
+                    self.coalesced_remote += 1
+                if on_follow:
+                    on_follow()
+            while self.shared.lease_held(self.name, lease_key):
+                time.sleep(self.poll_interval)
+            result = recheck() if recheck else None
+            if result is not None:
+                return result, True
+        try:
+            return func(), False
+        finally:
+            self.shared.release_lease(self.name, lease_key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'waiting_followers': sum(call.followers for call in self._calls.values()),
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'coalesced_remote': self.coalesced_remote,
+            }
+
+
+class AsyncSingleFlight:
+    """Variante asyncio de SingleFlight, pour les coroutines d'une même boucle"""
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._followers = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key, func):
+        """Exécute la coroutine `func()` ou attend celle déjà en cours pour `key`
+
+        Retourne (result, shared), comme SingleFlight.do.
+        """
+        import asyncio
+
+        task = self._calls.get(key)
+        if task is not None:
+            self._followers[key] = self._followers.get(key, 0) + 1
+            self.coalesced += 1
+            # shield: l'annulation d'un appelant n'annule pas l'appel partagé
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(func())
+        self._calls[key] = task
+        self.leaders += 1
+
+        def forget(_):
+            self._calls.pop(key, None)
+            self._followers.pop(key, None)
+        task.add_done_callback(forget)
+        return await asyncio.shield(task), False
+
+    def stats(self):
+        return {
+            'in_flight': len(self._calls),
+            'waiting_followers': sum(self._followers.values()),
+            'leaders': self.leaders,
+            'coalesced': self.coalesced,
+        }
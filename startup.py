@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+
+# Premier import de l'application (en tête de main.py): référence des jalons
+IMPORTED_AT = time.perf_counter()
+
+
+def process_age():
+    """Secondes écoulées depuis le lancement du processus (Linux), ou None"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Le nom du programme (2e champ) peut contenir des espaces
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupReport:
+    """Jalons du démarrage à froid d'un processus
+
+    Les durées sont mesurées depuis le premier import de l'application;
+    `before_import_ms` ajoute le temps passé avant (interpréteur, serveur
+    WSGI), lu dans /proc quand il est disponible.
+    """
+
+    def __init__(self, started=IMPORTED_AT):
+        self.started = started
+        age = process_age()
+        self.before_import = max(0.0, age - (time.perf_counter() - started)) if age is not None else None
+        self.milestones = {}
+        self.imports = {}
+        self.ready_ms = None
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self):
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    def mark(self, name):
+        """Enregistre un jalon (la première occurrence seulement)"""
+        with self._lock:
+            self.milestones.setdefault(name, self.elapsed_ms())
+
+    def record_import(self, name, seconds):
+        """Import différé d'une dépendance lourde (au premier usage ou au préchargement)"""
+        with self._lock:
+            self.imports[name] = round(seconds * 1000, 1)
+
+    def ready(self, label, import_budget_ms=None):
+        """Signale que le processus sert les requêtes et affiche le bilan (une seule fois)"""
+        with self._lock:
+            if self.ready_ms is not None:
+                return
+            self.ready_ms = self.elapsed_ms()
+        imports_ms = self.milestones.get('imports')
+        before_ms = (self.before_import or 0) * 1000
+        details = f"avant l'application: {before_ms:.0f} ms"
+        if imports_ms is not None:
+            details += f", imports: {imports_ms:.0f} ms, initialisation: {self.ready_ms - imports_ms:.0f} ms"
+        print(f"{label} prêt en {before_ms + self.ready_ms:.0f} ms depuis le lancement du processus ({details})")
+        if import_budget_ms and imports_ms is not None and imports_ms > import_budget_ms:
+            print(f"⚠️  Imports au-delà du budget: {imports_ms:.0f} ms > {import_budget_ms:.0f} ms "
+                  f"(python benchmark_import_time.py pour le détail)")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'before_import_ms': round(self.before_import * 1000, 1) if self.before_import is not None else None,
+                'milestones_ms': dict(self.milestones),
+                'ready_ms': self.ready_ms,
+                'deferred_imports_ms': dict(self.imports),
+            }
+
+
+# Rapport du processus courant
+report = StartupReport()
@@ -153,6 +153,37 @@ def test_download():
         print(f"   ❌ Erreur lors du test d'URL valide: {e}")
         return False
 
+def test_download_job():
+    """Test du mode job asynchrone de l'endpoint download"""
+    print("\n🔍 Test du mode job (/download + /jobs)...")
+    try:
+        # Un job inconnu doit retourner 404
+        response = requests.get(f"{BASE_URL}/jobs/inexistant")
+        if response.status_code != 404:
+            print(f"   ❌ Job inconnu: code inattendu {response.status_code}")
+            return False
+        print("   ✅ Job inconnu retourne 404")
+        
+        # La soumission doit répondre immédiatement avec 202
+        payload = {"url": TEST_VIDEO_URL, "async": True}
+        response = requests.post(f"{BASE_URL}/download/360p", json=payload)
+        if response.status_code != 202:
+            print(f"   ❌ Soumission du job échouée: {response.status_code}")
+            return False
+        job_id = response.json()['job_id']
+        print(f"   ✅ Job créé: {job_id}")
+        
+        response = requests.get(f"{BASE_URL}/jobs/{job_id}")
+        if response.status_code == 200:
+            data = response.json()
+            print(f"   ✅ État du job: {data['state']} (phase: {data['progress'].get('phase')})")
+            return True
+        print(f"   ❌ Lecture du job échouée: {response.status_code}")
+        return False
+    except Exception as e:
+        print(f"   ❌ Erreur lors du test du mode job: {e}")
+        return False
+
 def test_error_handling():
     """Test de la gestion d'erreurs"""
     print("\n🔍 Test de la gestion d'erreurs...")
@@ -225,6 +256,7 @@ def main():
         test_video_info,
         test_available_resolutions,
         test_download,
+        test_download_job,
         test_error_handling,
         test_troubleshoot
     ]
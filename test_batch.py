@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests des lots (batch.py, /download/batch): concurrence bornée, résultats
+dans l'ordre des éléments, échec isolé d'un élément
+"""
+
+import threading
+import time
+
+import main
+from batch import run_bounded
+
+
+def test_run_bounded_respects_concurrency_limit():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work(item):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return item * 2
+
+    results = list(run_bounded(range(12), work, 3))
+
+    assert peak[0] == 3
+    assert sorted(outcome for _, _, outcome, _ in results) == [item * 2 for item in range(12)]
+
+
+def test_run_bounded_indexes_follow_input_order():
+    items = ['a', 'b', 'c', 'd']
+    # Le premier élément finit en dernier
+    delays = {'a': 0.15, 'b': 0.1, 'c': 0.05, 'd': 0.0}
+
+    def work(item):
+        time.sleep(delays[item])
+        return item.upper()
+
+    results = list(run_bounded(items, work, 4))
+
+    assert [item for _, item, _, _ in results] != items
+    assert sorted((index, item, outcome) for index, item, outcome, _ in results) == [
+        (0, 'a', 'A'), (1, 'b', 'B'), (2, 'c', 'C'), (3, 'd', 'D')
+    ]
+
+
+def test_run_bounded_failing_item_does_not_abort_batch():
+    def work(item):
+        if item == 2:
+            raise ConnectionError("coupure réseau")
+        return item
+
+    results = {index: outcome for index, _, outcome, _ in run_bounded(range(5), work, 2)}
+
+    assert len(results) == 5
+    assert isinstance(results[2], ConnectionError)
+    assert [results[index] for index in (0, 1, 3, 4)] == [0, 1, 3, 4]
+
+
+def test_batch_endpoint_keeps_item_order_and_isolates_failures(monkeypatch):
+    def download_video(url, resolution):
+        video_id = url[-11:]
+        time.sleep(0.05 if video_id == 'batch000001' else 0.0)
+        if video_id == 'batch000003':
+            raise RuntimeError("flux introuvable")
+        return True, {'message': f"{video_id} ({resolution})"}
+
+    monkeypatch.setattr(main, 'download_video', download_video)
+    items = [f"https://www.youtube.com/watch?v=batch00000{i}" for i in range(1, 5)]
+    items.insert(2, 'https://example.com/pas-youtube')
+
+    response = main.app.test_client().post(
+        '/download/batch', json={'items': items, 'resolution': '720p', 'concurrency': 2}
+    )
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [item['index'] for item in data['results']] == [0, 1, 2, 3, 4]
+    assert [item['success'] for item in data['results']] == [True, True, False, False, True]
+    assert data['results'][2]['error'] == "Invalid YouTube URL."
+    assert data['results'][3]['error'] == "Internal server error: flux introuvable"
+    assert data['summary'] == dict(data['summary'], total=5, succeeded=3, failed=2, invalid=1)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests du cache de métadonnées (cache.py): éviction LRU, expiration, niveau
+disque et niveau SQLite partagé entre processus
+"""
+
+import time
+
+from cache import TTLCache
+from shared_state import SharedState
+
+
+def test_lru_eviction_keeps_recently_used_entries():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert (stats['hits'], stats['misses']) == (3, 1)
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(max_entries=10, ttl=0.05)
+    cache.set('video', {'title': 'Test'})
+    assert cache.get('video') == {'title': 'Test'}
+
+    time.sleep(0.06)
+    assert cache.get('video') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_invalidate_removes_entry_from_every_tier(tmp_path):
+    cache = TTLCache(max_entries=10, ttl=60, disk_folder=str(tmp_path), name='info')
+    cache.set('video', 1)
+    cache.invalidate('video')
+
+    assert cache.get('video') is None
+    assert TTLCache(max_entries=10, ttl=60, disk_folder=str(tmp_path), name='info').get('video') is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    TTLCache(max_entries=10, ttl=60, disk_folder=str(tmp_path), name='info').set('video', {'title': 'Test'})
+
+    cache = TTLCache(max_entries=10, ttl=60, disk_folder=str(tmp_path), name='info')
+    assert cache.get('video') == {'title': 'Test'}
+    assert cache.stats()['disk_hits'] == 1
+    # Remontée en mémoire: le second accès ne relit pas le disque
+    assert cache.get('video') == {'title': 'Test'}
+    assert cache.stats()['hits'] == 1
+    # Autre cache (nom différent) dans le même dossier: aucune collision
+    assert TTLCache(max_entries=10, ttl=60, disk_folder=str(tmp_path), name='other').get('video') is None
+
+
+def test_expired_disk_entry_is_ignored(tmp_path):
+    TTLCache(max_entries=10, ttl=0.05, disk_folder=str(tmp_path), name='info').set('video', 1)
+    time.sleep(0.06)
+
+    assert TTLCache(max_entries=10, ttl=60, disk_folder=str(tmp_path), name='info').get('video') is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_shared_tier_is_visible_to_other_workers(tmp_path):
+    path = str(tmp_path / 'shared_state.db')
+    first = TTLCache(max_entries=10, ttl=60, name='info', shared=SharedState(path))
+    second = TTLCache(max_entries=10, ttl=60, name='info', shared=SharedState(path))
+
+    first.set('video', {'title': 'Test'})
+    assert second.get('video') == {'title': 'Test'}
+    assert second.stats()['disk_hits'] == 1
+
+    first.invalidate('video')
+    assert TTLCache(max_entries=10, ttl=60, name='info', shared=SharedState(path)).get('video') is None
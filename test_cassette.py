@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests de l'enregistrement/rejeu des réponses YouTube (cassette.py) contre
+le faux innertube local: le rejeu se passe du réseau et reproduit le résultat
+"""
+
+from urllib.error import HTTPError, URLError
+
+import pytest
+
+import main
+from cassette import Cassette
+from fake_youtube import FakeInnerTubeServer
+
+URL = "https://www.youtube.com/watch?v=cassette001"
+
+
+def fetch_info():
+    return main.build_video_info(main.build_youtube(URL, 'IOS'))
+
+
+@pytest.fixture(scope='module', autouse=True)
+def pytubefix_hooks():
+    main.load_pytubefix()
+
+
+def test_replay_reproduces_recording_without_network(tmp_path):
+    path = str(tmp_path / 'cassette001.json.gz')
+    with FakeInnerTubeServer() as server:
+        server.install_redirect()
+        recording = Cassette(path)
+        with recording.recording():
+            recorded = fetch_info()
+        requests = server.requests
+
+    cassette = Cassette.load(path)
+    with cassette.replaying():
+        replayed = fetch_info()
+
+    assert replayed == recorded
+    assert len(recording.interactions) == requests
+    assert cassette.misses == []
+
+
+def test_recorded_http_errors_are_replayed(tmp_path):
+    cassette = Cassette(str(tmp_path / 'errors.json'))
+    with FakeInnerTubeServer() as server:
+        server.install_redirect()
+        server.inject_errors(429)
+        with cassette.recording():
+            with pytest.raises(HTTPError) as recorded:
+                main.build_youtube(URL, 'IOS').streams
+
+    with Cassette.load(cassette.path).replaying():
+        with pytest.raises(HTTPError) as replayed:
+            main.build_youtube(URL, 'IOS').streams
+    assert recorded.value.code == replayed.value.code == 429
+
+
+def test_unrecorded_request_fails_like_offline_network():
+    cassette = Cassette()
+    with cassette.replaying():
+        with pytest.raises(URLError):
+            main.build_youtube(URL, 'IOS').streams
+    assert cassette.misses
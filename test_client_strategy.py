@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests du circuit breaker par client YouTube (client_strategy.py):
+transitions fermé -> ouvert -> semi-ouvert -> fermé, distribution des sondes,
+circuits partagés entre workers
+"""
+
+import time
+
+from client_strategy import BREAKER_CLOSED, BREAKER_HALF_OPEN, BREAKER_OPEN, ClientSelector
+from shared_state import SharedState
+
+COOLDOWN = 0.05
+
+
+def make_selector(clients=('WEB', 'ANDROID'), failure_threshold=2):
+    return ClientSelector(list(clients), failure_threshold=failure_threshold, cooldown=COOLDOWN)
+
+
+def state(selector, name):
+    return selector.snapshot()['clients'][name]['state']
+
+
+def test_circuit_opens_after_consecutive_failures():
+    selector = make_selector()
+    selector.record('WEB', False, 0.1)
+    assert state(selector, 'WEB') == BREAKER_CLOSED
+    selector.record('WEB', False, 0.1)
+
+    assert state(selector, 'WEB') == BREAKER_OPEN
+    assert selector.ordering() == ['ANDROID']
+
+
+def test_success_resets_failure_count():
+    selector = make_selector()
+    selector.record('WEB', False, 0.1)
+    selector.record('WEB', True, 0.1)
+    selector.record('WEB', False, 0.1)
+
+    assert state(selector, 'WEB') == BREAKER_CLOSED
+
+
+def test_half_open_probe_success_closes_circuit():
+    selector = make_selector(failure_threshold=1)
+    selector.record('WEB', False, 0.1)
+    time.sleep(COOLDOWN)
+
+    order = selector.ordering()
+    assert order[0] == 'WEB'
+    assert state(selector, 'WEB') == BREAKER_HALF_OPEN
+    # Sonde déjà en cours: pas de seconde sonde en parallèle
+    assert selector.ordering() == ['ANDROID']
+
+    selector.record('WEB', True, 0.1)
+    assert state(selector, 'WEB') == BREAKER_CLOSED
+    assert 'WEB' in selector.ordering()
+
+
+def test_half_open_probe_failure_reopens_circuit():
+    selector = make_selector(failure_threshold=1)
+    selector.record('WEB', False, 0.1)
+    time.sleep(COOLDOWN)
+
+    assert selector.ordering()[0] == 'WEB'
+    selector.record('WEB', False, 0.1)
+
+    assert state(selector, 'WEB') == BREAKER_OPEN
+    assert selector.ordering() == ['ANDROID']
+
+
+def test_released_probe_is_offered_again():
+    selector = make_selector(failure_threshold=1)
+    selector.record('WEB', False, 0.1)
+    time.sleep(COOLDOWN)
+
+    assert selector.ordering()[0] == 'WEB'
+    selector.release('WEB')
+
+    assert selector.ordering()[0] == 'WEB'
+    assert state(selector, 'WEB') == BREAKER_HALF_OPEN
+
+
+def test_one_probe_per_ordering_when_several_circuits_half_open():
+    selector = make_selector(failure_threshold=1)
+    selector.record('WEB', False, 0.1)
+    selector.record('ANDROID', False, 0.1)
+    time.sleep(COOLDOWN)
+
+    # Seul le premier client est sondé: le second reste disponible pour un appel suivant
+    assert selector.ordering() == ['WEB']
+    selector.record('WEB', True, 0.1)
+
+    assert selector.ordering() == ['ANDROID', 'WEB']
+    selector.record('ANDROID', True, 0.1)
+    assert state(selector, 'ANDROID') == BREAKER_CLOSED
+    assert sorted(selector.ordering()) == ['ANDROID', 'WEB']
+
+
+def test_all_circuits_open_still_returns_every_client():
+    selector = make_selector(failure_threshold=1)
+    selector.record('WEB', False, 0.1)
+    selector.record('ANDROID', False, 0.1)
+
+    assert selector.ordering() == ['WEB', 'ANDROID']
+
+
+def shared_selectors(tmp_path, count=2):
+    """Sélecteurs de plusieurs workers sur la même base partagée"""
+    path = str(tmp_path / 'shared_state.db')
+    return [
+        ClientSelector(['WEB', 'ANDROID'], failure_threshold=1, cooldown=COOLDOWN, shared=SharedState(path))
+        for _ in range(count)
+    ]
+
+
+def test_shared_circuit_opens_for_every_worker(tmp_path):
+    first, second = shared_selectors(tmp_path)
+    assert second.ordering() == ['WEB', 'ANDROID']
+
+    first.record('WEB', False, 0.1)
+
+    assert state(second, 'WEB') == BREAKER_OPEN
+    assert second.ordering() == ['ANDROID']
+    assert second.snapshot()['shared']
+
+
+def test_shared_probe_is_given_to_one_worker_only(tmp_path):
+    first, second = shared_selectors(tmp_path)
+    first.record('WEB', False, 0.1)
+    time.sleep(COOLDOWN)
+
+    assert first.ordering()[0] == 'WEB'
+    assert second.ordering() == ['ANDROID']
+    # Seul le propriétaire de la sonde la libère
+    second.release('WEB')
+    assert second.ordering() == ['ANDROID']
+
+    first.record('WEB', True, 0.1)
+    assert state(second, 'WEB') == BREAKER_CLOSED
+    assert 'WEB' in second.ordering()
+
+
+def test_probe_of_dead_worker_expires(tmp_path):
+    path = str(tmp_path / 'shared_state.db')
+    dead, alive = (
+        ClientSelector(['WEB', 'ANDROID'], failure_threshold=1, cooldown=COOLDOWN, probe_timeout=0.05,
+                       shared=SharedState(path))
+        for _ in range(2)
+    )
+    dead.record('WEB', False, 0.1)
+    time.sleep(COOLDOWN)
+    assert dead.ordering()[0] == 'WEB'
+    assert alive.ordering() == ['ANDROID']
+
+    time.sleep(0.05)
+    assert alive.ordering()[0] == 'WEB'
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests du téléchargement par segments (downloader.py) contre le faux serveur
+googlevideo local: reprise d'un fichier `.part`, identité du flux, relances
+"""
+
+import json
+import os
+
+import pytest
+
+from downloader import PartialDownload, RangeDownloader, SegmentError
+from fake_youtube import FakeGoogleVideoServer, media_bytes
+
+SIZE = 256 * 1024
+SEGMENT = 64 * 1024
+IDENTITY = {'video_id': 'partial0001', 'itag': 18, 'size': SIZE}
+
+
+def make_downloader(retries=2):
+    return RangeDownloader(segment_size=SEGMENT, concurrency=2, max_segment_retries=retries, timeout=5)
+
+
+def prepare_partial(path, completed, identity=IDENTITY):
+    """Fichier `.part` dont les segments `completed` sont déjà écrits et vérifiés"""
+    partial = PartialDownload(path, SIZE, SEGMENT, identity)
+    partial.open()
+    content = media_bytes(SIZE)
+    with open(partial.part_path, 'r+b') as f:
+        for start in completed:
+            f.seek(start)
+            f.write(content[start:start + SEGMENT])
+    for start in completed:
+        partial.mark_done(start)
+    return partial
+
+
+def test_partial_state_tracks_contiguous_verified_offset(tmp_path):
+    path = str(tmp_path / 'video.mp4')
+    partial = prepare_partial(path, [0, SEGMENT, 3 * SEGMENT])
+
+    with open(partial.state_path, encoding='utf-8') as f:
+        state = json.load(f)
+    assert state['verified_offset'] == 2 * SEGMENT
+    assert state['completed'] == [0, SEGMENT, 3 * SEGMENT]
+    assert os.path.getsize(partial.part_path) == SIZE
+
+    assert PartialDownload(path, SIZE, SEGMENT, IDENTITY).open() == {0, SEGMENT, 3 * SEGMENT}
+
+
+def test_identity_mismatch_discards_partial_state(tmp_path):
+    path = str(tmp_path / 'video.mp4')
+    prepare_partial(path, [0, SEGMENT])
+
+    assert PartialDownload(path, SIZE, SEGMENT, dict(IDENTITY, itag=22)).open() == set()
+    # L'annexe réécrite ne mentionne plus les anciens segments
+    assert PartialDownload(path, SIZE, SEGMENT, IDENTITY).open() == set()
+
+
+def test_without_identity_nothing_is_resumed(tmp_path):
+    path = str(tmp_path / 'video.mp4')
+    prepare_partial(path, [0, SEGMENT])
+
+    assert PartialDownload(path, SIZE, SEGMENT).open() == set()
+
+
+def test_download_fetches_only_missing_segments(tmp_path):
+    path = str(tmp_path / 'video.mp4')
+    prepare_partial(path, [0, 2 * SEGMENT])
+
+    with FakeGoogleVideoServer(SIZE) as server:
+        stats = make_downloader().download(server.url, path, SIZE, identity=IDENTITY)
+        requests = server.stats()['requests']
+
+    assert requests == 2
+    assert stats['resumed_segments'] == 2
+    assert stats['resumed_bytes'] == 2 * SEGMENT
+    with open(path, 'rb') as f:
+        assert f.read() == media_bytes(SIZE)
+    assert not os.path.exists(path + '.part')
+    assert not os.path.exists(path + '.part.json')
+
+
+def test_download_with_other_identity_starts_over(tmp_path):
+    path = str(tmp_path / 'video.mp4')
+    prepare_partial(path, [0, SEGMENT], identity=dict(IDENTITY, itag=22))
+
+    with FakeGoogleVideoServer(SIZE) as server:
+        stats = make_downloader().download(server.url, path, SIZE, identity=IDENTITY)
+        requests = server.stats()['requests']
+
+    assert requests == 4
+    assert stats['resumed_segments'] == 0
+    with open(path, 'rb') as f:
+        assert f.read() == media_bytes(SIZE)
+
+
+def test_failed_download_keeps_verified_segments(tmp_path):
+    path = str(tmp_path / 'video.mp4')
+
+    with FakeGoogleVideoServer(SIZE) as server:
+        def fail_after_first_segment(done, total):
+            # Le segment suivant reçoit un 503, sans relance possible
+            if done == SEGMENT:
+                server.inject_errors(503)
+
+        downloader = RangeDownloader(segment_size=SEGMENT, concurrency=1, max_segment_retries=0, timeout=5)
+        with pytest.raises(SegmentError):
+            downloader.download(server.url, path, SIZE, fail_after_first_segment, identity=IDENTITY)
+        assert not os.path.exists(path)
+
+        stats = make_downloader().download(server.url, path, SIZE, identity=IDENTITY)
+
+    # Seul le segment en échec (et ceux non terminés) est retéléchargé
+    assert stats['resumed_segments'] >= 1
+    assert stats['resumed_segments'] + stats['segments'] == 4
+    with open(path, 'rb') as f:
+        assert f.read() == media_bytes(SIZE)
+
+
+def test_segment_retries_on_server_errors(tmp_path):
+    path = str(tmp_path / 'video.mp4')
+
+    with FakeGoogleVideoServer(SIZE) as server:
+        server.inject_errors(503, 500)
+        stats = make_downloader(retries=3).download(server.url, path, SIZE)
+
+    assert stats['segment_retries'] == 2
+    with open(path, 'rb') as f:
+        assert f.read() == media_bytes(SIZE)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests de l'index du dossier Google Drive contre le faux serveur Drive local
+(pagination complète, flux de changements, déduplication avant upload,
+synchronisation en arrière-plan)
+"""
+
+import time
+
+from drive_index import DriveFolderIndex
+from fake_drive import FakeDriveServer
+from google_drive import GoogleDriveManager
+
+FOLDER_ID = 'folder-videos'
+
+
+def make_index(server, page_size=10):
+    service = server.build_service()
+    return DriveFolderIndex(lambda: service, FOLDER_ID, sync_interval=0, page_size=page_size)
+
+
+def test_full_load_follows_every_page():
+    with FakeDriveServer() as server:
+        for i in range(25):
+            server.state.add_file(f"Video {i}_abcdefghi{i:02d}_720p.mp4", parents=[FOLDER_ID], size=i)
+        server.state.add_file("Ailleurs_zzzzzzzzzzz_720p.mp4", parents=['other-folder'])
+        index = make_index(server)
+        index.ensure_fresh()
+
+        assert len(index.files()) == 25
+        assert server.state.list_requests == 3
+        # Identifiant vidéo déduit du nom de fichier en l'absence d'appProperties
+        assert index.find('abcdefghi07', '720p')['size'] == '7'
+        assert index.find('zzzzzzzzzzz', '720p') is None
+
+
+def test_changes_feed_keeps_index_current():
+    with FakeDriveServer() as server:
+        kept = server.state.add_file("Gardée_aaaaaaaaaaa_720p.mp4", parents=[FOLDER_ID])
+        removed = server.state.add_file("Supprimée_bbbbbbbbbbb_720p.mp4", parents=[FOLDER_ID])
+        index = make_index(server)
+        index.ensure_fresh()
+
+        server.build_service().files().delete(fileId=removed['id']).execute()
+        added = server.state.add_file(
+            "Renommée.mp4", parents=[FOLDER_ID],
+            app_properties={'video_id': 'ccccccccccc', 'resolution': '480p', 'requested_resolution': '720p'}
+        )
+        server.state.add_file("Ailleurs_ddddddddddd_720p.mp4", parents=['other-folder'])
+        index.ensure_fresh()
+
+        assert server.state.list_requests == 1
+        assert index.contains(kept['id'])
+        assert not index.contains(removed['id'])
+        assert index.find('bbbbbbbbbbb', '720p') is None
+        # La résolution demandée et la résolution réelle mènent au même fichier
+        assert index.find('ccccccccccc', '720p')['id'] == added['id']
+        assert index.find('ccccccccccc', '480p')['id'] == added['id']
+        assert index.find('ddddddddddd', '720p') is None
+
+
+def test_upload_is_visible_and_listed_from_memory():
+    with FakeDriveServer() as server:
+        manager = GoogleDriveManager()
+        manager.folder_id = manager.folder_index.folder_id = FOLDER_ID
+        manager.service = server.build_service()
+
+        success, files = manager.list_files()
+        assert success and files == []
+
+        success, result = manager.upload_stream(
+            iter([b'\0' * 1024]), 'Vidéo_eeeeeeeeeee_720p.mp4', size=1024,
+            app_properties={'video_id': 'eeeeeeeeeee', 'resolution': '720p'}
+        )
+        assert success
+        success, file = manager.find_video('eeeeeeeeeee', '720p')
+        assert success and file['id'] == result['file_id']
+
+        success, files = manager.list_files()
+        assert [file['id'] for file in files] == [result['file_id']]
+        assert server.state.list_requests == 1
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_lookup_reads_memory_and_background_thread_syncs():
+    with FakeDriveServer() as server:
+        server.state.add_file("Présente_fffffffffff_720p.mp4", parents=[FOLDER_ID])
+        manager = GoogleDriveManager()
+        manager.folder_id = manager.folder_index.folder_id = FOLDER_ID
+        manager.folder_index.sync_interval = 0.2
+        manager.service = server.build_service()
+        try:
+            # Avant le premier chargement: index indisponible, chargement lancé en arrière-plan
+            success, _ = manager.find_video('fffffffffff', '720p')
+            assert not success
+            wait_for(lambda: manager.folder_index.loaded_at is not None)
+
+            added = server.state.add_file("Ajoutée_ggggggggggg_720p.mp4", parents=[FOLDER_ID])
+            requests = (server.state.list_requests, server.state.changes_requests)
+            assert manager.find_video('fffffffffff', '720p')[1]['name'] == "Présente_fffffffffff_720p.mp4"
+            assert manager.find_video('ggggggggggg', '720p') == (True, None)
+            assert (server.state.list_requests, server.state.changes_requests) == requests
+
+            # Le fichier ajouté apparaît après la synchronisation du thread d'arrière-plan
+            wait_for(lambda: manager.find_video('ggggggggggg', '720p')[1] is not None)
+            assert manager.find_video('ggggggggggg', '720p')[1]['id'] == added['id']
+            assert server.state.list_requests == 1
+        finally:
+            manager.stop()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Tests de l'upload en flux vers Google Drive (google_drive.py): tampon
+ChunkPipe et débordement sur disque, acquittements partiels de
+PipeMediaUpload, relance des chunks en échec contre le faux serveur Drive
+"""
+
+import hashlib
+import threading
+
+import pytest
+from google.oauth2.credentials import Credentials
+
+from config import Config
+from fake_drive import FakeDriveServer
+from google_drive import ChunkPipe, GoogleDriveManager, PipeAborted, PipeMediaUpload, UPLOAD_CHUNK_SIZE
+
+FOLDER_ID = 'folder-uploads'
+
+
+def test_pipe_spills_to_disk_and_preserves_order():
+    pipe = ChunkPipe(max_bytes=10, spill=True)
+    for chunk in (b'aaaaaaaa', b'bbbbbbbb', b'cccccccc'):
+        pipe.write(chunk)
+    pipe.close()
+
+    assert pipe.peak_bytes == 8
+    assert pipe.spilled_bytes == 16
+    assert pipe.read(12) == b'aaaaaaaabbbb'
+    # Débordement résorbé: les nouveaux chunks repassent par la mémoire
+    assert pipe.read(100) == b'bbbbcccccccc'
+    assert pipe._spool is None
+    assert pipe.read(1) == b''
+
+
+def test_pipe_without_spill_blocks_producer_until_read():
+    pipe = ChunkPipe(max_bytes=10)
+    pipe.write(b'12345678')
+    written = threading.Event()
+
+    def produce():
+        pipe.write(b'abcdefgh')
+        written.set()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    assert not written.wait(0.1)
+
+    assert pipe.read(8) == b'12345678'
+    assert written.wait(1)
+    producer.join()
+    assert pipe.spilled_bytes == 0
+
+
+def test_pipe_spill_is_capped_then_blocks_producer():
+    pipe = ChunkPipe(max_bytes=8, spill=True, spill_max_bytes=16)
+    for chunk in (b'aaaaaaaa', b'bbbbbbbb', b'cccccccc'):
+        pipe.write(chunk)
+    written = threading.Event()
+
+    def produce():
+        pipe.write(b'dddddddd')
+        written.set()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    # Fichier plein (16 octets): le producteur attend l'upload
+    assert not written.wait(0.1)
+    assert pipe.spilled_bytes == 16
+
+    # Relire la mémoire ne suffit pas, le fichier n'est vidé qu'une fois entièrement relu
+    assert pipe.read(12) == b'aaaaaaaabbbb'
+    assert not written.wait(0.1)
+    assert pipe.read(12) == b'bbbbcccccccc'
+    assert written.wait(1)
+    producer.join()
+    pipe.close()
+    assert pipe.read(100) == b'dddddddd'
+    assert pipe.spilled_bytes == 16
+
+
+def test_abort_releases_producer_blocked_on_full_spill():
+    pipe = ChunkPipe(max_bytes=8, spill=True, spill_max_bytes=8)
+    pipe.write(b'aaaaaaaa')
+    pipe.write(b'bbbbbbbb')
+    errors = []
+
+    def produce():
+        try:
+            pipe.write(b'cccccccc')
+        except PipeAborted as e:
+            errors.append(e)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive()
+    pipe.abort()
+    producer.join(1)
+    assert not producer.is_alive()
+    assert len(errors) == 1
+
+
+def test_pipe_error_and_abort():
+    pipe = ChunkPipe(max_bytes=10, spill=True)
+    pipe.write(b'data')
+    pipe.close(error=ConnectionError('téléchargement interrompu'))
+    assert pipe.read(4) == b'data'
+    with pytest.raises(ConnectionError):
+        pipe.read(1)
+
+    pipe = ChunkPipe(max_bytes=10, spill=True)
+    pipe.write(b'0123456789')
+    pipe.write(b'spilled')
+    pipe.abort()
+    assert pipe._spool is None
+    with pytest.raises(PipeAborted):
+        pipe.write(b'more')
+
+
+def test_media_upload_resends_unacknowledged_bytes():
+    pipe = ChunkPipe(max_bytes=100)
+    pipe.write(bytes(range(40)))
+    pipe.close()
+    media = PipeMediaUpload(pipe, size=40, chunksize=16)
+
+    assert media.getbytes(0, 16) == bytes(range(16))
+    # Drive n'a confirmé que 10 octets: le chunk suivant repart de là
+    assert media.getbytes(10, 16) == bytes(range(10, 26))
+    with pytest.raises(ValueError):
+        media.getbytes(5, 16)
+    # Octets confirmés au-delà du tampon: lus et jetés
+    assert media.getbytes(30, 16) == bytes(range(30, 40))
+
+
+@pytest.fixture
+def drive(monkeypatch):
+    monkeypatch.setattr(Config, 'RETRY_DELAY_MIN', 0.0)
+    monkeypatch.setattr(Config, 'RETRY_DELAY_MAX', 0.0)
+    monkeypatch.setattr(Config, 'DRIVE_CHUNK_RETRIES', 3)
+    with FakeDriveServer() as server:
+        manager = GoogleDriveManager()
+        manager.folder_id = manager.folder_index.folder_id = FOLDER_ID
+        manager.service = server.build_service()
+        try:
+            yield server, manager
+        finally:
+            manager.stop()
+
+
+def upload(manager, content):
+    chunks = (content[i:i + 64 * 1024] for i in range(0, len(content), 64 * 1024))
+    return manager.upload_stream(chunks, 'Vidéo_uploadtest1_720p.mp4', size=len(content))
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_failed_chunks_are_retried_from_session(drive, status):
+    server, manager = drive
+    content = bytes(range(256)) * (UPLOAD_CHUNK_SIZE // 256 + 100)
+    server.state.fail_status = status
+    server.state.fail_chunks = 2
+
+    success, result = upload(manager, content)
+
+    assert success, result
+    assert manager.upload_stats()['chunk_retries'] == 2
+    file = server.state.files[result['file_id']]
+    assert file['size'] == str(len(content))
+    assert file['md5Checksum'] == hashlib.md5(content).hexdigest()
+
+
+def test_chunk_retries_are_bounded(drive):
+    server, manager = drive
+    server.state.fail_chunks = 10
+
+    success, error = upload(manager, b'\0' * 1024)
+
+    assert not success
+    assert '503' in error
+    assert manager.upload_stats()['chunk_retries'] == 3
+    assert server.state.files == {}
+
+
+def test_client_errors_are_not_retried(drive):
+    server, manager = drive
+    server.state.fail_status = 400
+    server.state.fail_chunks = 1
+
+    success, _ = upload(manager, b'\0' * 1024)
+
+    assert not success
+    assert manager.upload_stats()['chunk_retries'] == 0
+    assert server.state.failed_chunks == 1
+
+
+def test_manager_transport_does_not_follow_resume_incomplete():
+    manager = GoogleDriveManager()
+    manager.creds = Credentials(token='token')
+    try:
+        # « 308 Resume Incomplete » entre deux chunks n'est pas une redirection
+        assert 308 not in manager._thread_http().http.redirect_codes
+    finally:
+        manager.stop()
+
+
+def test_download_error_is_raised_to_the_caller(drive):
+    server, manager = drive
+    content = bytes(range(256)) * (UPLOAD_CHUNK_SIZE // 256 + 100)
+
+    def chunks():
+        # Premier chunk Drive envoyé, puis googlevideo refuse la suite
+        yield content[:UPLOAD_CHUNK_SIZE + 1024]
+        raise ConnectionError('403 Forbidden (googlevideo)')
+
+    # Erreur du téléchargement: relancée pour que la phase transfer soit retentée
+    with pytest.raises(ConnectionError, match='403'):
+        manager.upload_stream(chunks(), 'Vidéo_uploadtest1_720p.mp4', size=len(content))
+    assert manager.upload_stats()['chunk_retries'] == 0
+    assert server.state.files == {}
+
+
+def test_download_error_before_upload_starts_is_raised(drive):
+    server, manager = drive
+
+    def chunks():
+        raise ConnectionError('410 Gone')
+        yield b''
+
+    with pytest.raises(ConnectionError, match='410'):
+        manager.upload_stream(chunks(), 'Vidéo_uploadtest1_720p.mp4', size=1024)
+    assert server.state.files == {}
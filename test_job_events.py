@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests du flux Server-Sent Events /jobs/<job_id>/events (main.py) via le
+client de test Flask: événements jusqu'à l'état final puis fin du flux, pour
+un job du processus courant et pour un job d'un autre worker (relu depuis la base)
+"""
+
+import json
+import threading
+
+import pytest
+
+import main
+from job_store import JobStore
+from jobs import JOB_FAILED, JOB_SUCCEEDED, JobManager
+
+
+def read_events(job_id, timeout=5):
+    """Lit le flux jusqu'à sa fin; retourne [(événement, données)] et les keepalives reçus"""
+    response = main.app.test_client().get(f'/jobs/{job_id}/events', buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = []
+    reader = threading.Thread(target=lambda: chunks.extend(response.response), daemon=True)
+    reader.start()
+    reader.join(timeout)
+    # Le flux se termine de lui-même après l'événement final
+    assert not reader.is_alive()
+    response.close()
+
+    events, keepalives = [], 0
+    for chunk in chunks:
+        chunk = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+        if chunk.startswith(':'):
+            keepalives += 1
+            continue
+        fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events, keepalives
+
+
+def gated(steps, gate):
+    """Job qui publie ses phases, en attendant `gate` avant la dernière"""
+    def run(url, resolution, progress_callback, retry_state):
+        for phase, fields in steps:
+            progress_callback(phase, **fields)
+        gate.wait(5)
+        return True, {'message': f"{url} ({resolution})"}
+    return run
+
+
+def make_manager(path, handler):
+    manager = JobManager(max_workers=2, max_pending=10, retention=3600, store=JobStore(path), lease_seconds=5)
+    manager.register('download', handler)
+    manager.REMOTE_POLL_INTERVAL = 0.01
+    return manager
+
+
+@pytest.fixture
+def events_app(monkeypatch, tmp_path):
+    """Gestionnaire de jobs de l'API remplacé par un gestionnaire sur une base temporaire"""
+    monkeypatch.setattr(main.Config, 'SSE_KEEPALIVE_SECONDS', 0.05)
+    path = str(tmp_path / 'jobs.db')
+    gate = threading.Event()
+    manager = make_manager(path, gated([('extracting', {}), ('downloading', {'percent': 50})], gate))
+    monkeypatch.setattr(main, 'job_manager', manager)
+    yield path, manager, gate
+    gate.set()
+    manager.stop()
+
+
+def test_events_stream_until_success(events_app):
+    _, manager, gate = events_app
+    job = manager.submit('download', {'url': 'https://youtu.be/a', 'resolution': '720p'})
+    threading.Timer(0.2, gate.set).start()
+
+    events, keepalives = read_events(job.id)
+
+    assert keepalives >= 1
+    assert all(event == 'progress' for event, _ in events[:-1])
+    assert [data['phase'] for _, data in events[:-1]][-1] == 'downloading'
+    event, data = events[-1]
+    assert event == JOB_SUCCEEDED
+    assert data['state'] == JOB_SUCCEEDED
+    assert data['result'] == {'message': "https://youtu.be/a (720p)"}
+
+
+def test_events_stream_ends_on_failure(events_app):
+    _, manager, _ = events_app
+    manager.register('download', lambda url, resolution, progress_callback, retry_state: (False, "Vidéo privée"))
+    job = manager.submit('download', {'url': 'https://youtu.be/b', 'resolution': '720p'})
+
+    events, _ = read_events(job.id)
+
+    event, data = events[-1]
+    assert event == JOB_FAILED
+    assert data['error'] == "Vidéo privée"
+
+
+def test_events_of_job_run_by_another_worker(events_app):
+    path, manager, _ = events_app
+    gate = threading.Event()
+    other = make_manager(path, gated([('downloading', {'percent': 50})], gate))
+    try:
+        job = other.submit('download', {'url': 'https://youtu.be/c', 'resolution': '720p'})
+        assert not manager.is_local(job.id)
+        threading.Timer(0.2, gate.set).start()
+
+        events, keepalives = read_events(job.id)
+
+        # Seules les transitions persistées sont visibles, chaque version une seule fois
+        assert keepalives >= 1
+        assert events[-1][0] == JOB_SUCCEEDED
+        assert events[-1][1]['result'] == {'message': "https://youtu.be/c (720p)"}
+        assert len(events) == len({json.dumps(data, sort_keys=True) for _, data in events})
+    finally:
+        gate.set()
+        other.stop()
+
+
+def test_events_of_unknown_job(events_app):
+    response = main.app.test_client().get('/jobs/inconnu/events')
+    assert response.status_code == 404
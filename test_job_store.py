@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests de la persistance des jobs (job_store.py, jobs.py) sur une base SQLite
+temporaire: aller-retour d'un job, reprise après l'arrêt de son propriétaire,
+deux gestionnaires de jobs sur la même base
+"""
+
+import threading
+import time
+
+from job_store import JobStore
+from jobs import JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JobManager
+
+LEASE = 0.2
+
+
+def record(job_id, state=JOB_QUEUED, owner=None, created_at=None, **fields):
+    return dict({
+        'id': job_id,
+        'kind': 'download',
+        'params': {'url': f"https://youtu.be/{job_id}", 'resolution': '720p'},
+        'state': state,
+        'progress': {'phase': state},
+        'created_at': created_at or time.time(),
+        'owner': owner,
+    }, **fields)
+
+
+def manager(store, handler, max_workers=2):
+    jobs = JobManager(max_workers=max_workers, max_pending=10, retention=3600, store=store, lease_seconds=LEASE)
+    jobs.register('download', handler)
+    return jobs
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def succeed(url, resolution, progress_callback, retry_state):
+    progress_callback('downloading', percent=50)
+    return True, {'message': f"{url} ({resolution})"}
+
+
+def test_store_round_trip(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    saved = record('job-1', JOB_SUCCEEDED, owner='worker-a', created_at=100.0,
+                   result={'filename': 'Vidéo.mp4', 'size': 1024}, retries=2, finished_at=110.0)
+    store.save(saved)
+    store.save(record('job-2', JOB_FAILED, created_at=200.0, error="Vidéo privée", finished_at=210.0))
+    store.save(record('job-3', created_at=300.0))
+
+    loaded = store.load('job-1')
+    assert loaded['params'] == saved['params']
+    assert loaded['result'] == {'filename': 'Vidéo.mp4', 'size': 1024}
+    assert (loaded['state'], loaded['retries'], loaded['owner']) == (JOB_SUCCEEDED, 2, 'worker-a')
+    assert loaded['error'] is None and loaded['interruptions'] == 0
+    assert store.load('inconnu') is None
+
+    assert [job['id'] for job in store.list()] == ['job-3', 'job-2', 'job-1']
+    assert [job['id'] for job in store.list(state=JOB_FAILED)] == ['job-2']
+    assert [job['id'] for job in store.list(limit=1, before=300.0)] == ['job-2']
+    assert store.counts() == {JOB_SUCCEEDED: 1, JOB_FAILED: 1, JOB_QUEUED: 1}
+
+    # Réécrire un job remplace la ligne; seuls les jobs terminés sont purgés
+    store.save(dict(saved, state=JOB_FAILED, error="Relancé"))
+    assert store.load('job-1')['error'] == "Relancé"
+    assert store.purge(finished_before=205.0) == 1
+    assert [job['id'] for job in store.list()] == ['job-3', 'job-2']
+
+
+def test_claim_after_stale_heartbeat(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    store.heartbeat('worker-a')
+    store.save(record('job-1', JOB_RUNNING, owner='worker-a'))
+    store.save(record('job-2', JOB_SUCCEEDED, owner='worker-a', finished_at=time.time()))
+
+    # Propriétaire vivant: rien à reprendre
+    assert store.orphaned((JOB_QUEUED, JOB_RUNNING), time.time() - LEASE) == []
+
+    time.sleep(LEASE)
+    orphaned = store.orphaned((JOB_QUEUED, JOB_RUNNING), time.time() - LEASE)
+    assert [job['id'] for job in orphaned] == ['job-1']
+
+    # Deux workers voient le même orphelin: un seul l'obtient
+    assert store.claim('job-1', 'worker-b', 'worker-a')
+    assert not store.claim('job-1', 'worker-c', 'worker-a')
+    assert store.load('job-1')['owner'] == 'worker-b'
+
+
+def test_manager_reclaims_job_of_silent_owner(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    store.heartbeat('worker-mort')
+    store.save(record('job-1', JOB_RUNNING, owner='worker-mort'))
+    jobs = manager(store, succeed)
+    try:
+        jobs.start()
+        # Bail encore valide: le job n'est pas repris au démarrage
+        assert not jobs.is_local('job-1')
+
+        wait_for(lambda: store.load('job-1')['state'] == JOB_SUCCEEDED)
+        reclaimed = store.load('job-1')
+        assert reclaimed['owner'] == jobs.owner
+        assert reclaimed['interruptions'] == 1
+        assert reclaimed['result'] == {'message': "https://youtu.be/job-1 (720p)"}
+    finally:
+        jobs.stop()
+
+
+def test_two_managers_share_one_database(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    release = threading.Event()
+
+    def blocking(url, resolution, progress_callback, retry_state):
+        release.wait(5)
+        return succeed(url, resolution, progress_callback, retry_state)
+
+    first = manager(JobStore(path), blocking, max_workers=1)
+    second = manager(JobStore(path), succeed)
+    second.REMOTE_POLL_INTERVAL = 0.01
+    first.start()
+    second.start()
+    try:
+        running = first.submit('download', {'url': 'https://youtu.be/a', 'resolution': '720p'})
+        queued = first.submit('download', {'url': 'https://youtu.be/b', 'resolution': '720p'})
+        wait_for(lambda: second.get(running.id).state == JOB_RUNNING)
+
+        # Arrêt propre du premier pendant son job: le job en file n'est pas démarré
+        stopping = threading.Thread(target=first.stop)
+        stopping.start()
+        wait_for(first._stopping.is_set)
+        time.sleep(0.05)
+
+        # Job d'un autre processus: relu depuis la base jusqu'à son état final
+        job, version = second.get(running.id), None
+        release.set()
+        while job.state not in (JOB_SUCCEEDED, JOB_FAILED):
+            job, version = second.wait_for_change(job, version, timeout=1)
+        assert job.state == JOB_SUCCEEDED
+        stopping.join(5)
+
+        # Son job en file, rendu par l'arrêt propre, est repris par le second
+        wait_for(lambda: second.store.load(queued.id)['state'] == JOB_SUCCEEDED)
+        assert second.is_local(queued.id)
+        assert second.store.load(queued.id)['owner'] == second.owner
+        assert second.reclaim() == 0
+        assert second.stats()['counts'][JOB_SUCCEEDED] == 2
+    finally:
+        release.set()
+        first.stop()
+        second.stop()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests des playlists et chaînes (main.py, /playlist/info): énumération
+arrêtée à `limit`, un enregistrement NDJSON par vidéo et échec isolé d'une
+vidéo (faux innertube local)
+"""
+
+import json
+
+import pytest
+
+import main
+from client_strategy import ClientSelector
+from fake_youtube import FakeInnerTubeServer
+
+PAGE_SIZE = 5
+
+
+class PagedCollection:
+    """Playlist/chaîne pytubefix simulée: pagination paresseuse, pages comptées"""
+
+    pages = 0
+
+    def __init__(self, url):
+        self.url = url
+        self.title = self.channel_name = "Collection simulée"
+
+    def url_generator(self):
+        for page in range(10):
+            type(self).pages += 1
+            for i in range(PAGE_SIZE):
+                yield f"https://www.youtube.com/watch?v=plist{page:03d}{i:03d}"
+
+
+@pytest.fixture
+def paged(monkeypatch):
+    pytubefix = main.load_pytubefix()
+    monkeypatch.setattr(PagedCollection, 'pages', 0)
+    monkeypatch.setattr(pytubefix, 'Playlist', PagedCollection)
+    monkeypatch.setattr(pytubefix, 'Channel', PagedCollection)
+    return PagedCollection
+
+
+@pytest.mark.parametrize('url, kind', [
+    ('https://www.youtube.com/playlist?list=PLsimule', 'playlist'),
+    ('https://www.youtube.com/@chainesimulee', 'channel'),
+])
+def test_playlist_limit_stops_enumeration_early(paged, url, kind):
+    found_kind, title, urls = main.enumerate_playlist(url, limit=3)
+
+    assert (found_kind, title) == (kind, "Collection simulée")
+    assert len(urls) == 3
+    assert paged.pages == 1
+
+    _, _, urls = main.enumerate_playlist(url, limit=PAGE_SIZE + 1)
+    assert len(urls) == PAGE_SIZE + 1
+    assert paged.pages == 1 + 2
+
+
+def test_playlist_info_streams_each_video_and_isolates_failure(paged, monkeypatch):
+    monkeypatch.setattr(main.Config, 'RETRY_DELAY_MIN', 0)
+    monkeypatch.setattr(main.Config, 'RETRY_DELAY_MAX', 0)
+    # Client sans PO token ni base.js, circuits propres au test
+    monkeypatch.setattr(main, 'client_selector', ClientSelector(['IOS']))
+    unavailable = 'plist000001'
+    with FakeInnerTubeServer() as server:
+        server.install_redirect()
+        playable = server.player_response
+        server.httpd.player_response = lambda video_id: (
+            dict(playable(video_id), playabilityStatus={'status': 'LOGIN_REQUIRED', 'reason': 'This video is private'})
+            if video_id == unavailable else playable(video_id)
+        )
+        response = main.app.test_client().post(
+            '/playlist/info', json={'url': 'https://www.youtube.com/playlist?list=PLinfo', 'limit': 4, 'concurrency': 2}
+        )
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert lines[0]['playlist'] == dict(lines[0]['playlist'], type='playlist', video_count=4)
+    records = sorted(lines[1:-1], key=lambda record: record['index'])
+    assert [record['index'] for record in records] == [0, 1, 2, 3]
+    assert [record['success'] for record in records] == [True, False, True, True]
+    assert records[2]['video_info']['title'] == "Vidéo simulée plist000002"
+    assert lines[-1]['summary'] == dict(lines[-1]['summary'], total=4, succeeded=3, failed=1)
+    assert paged.pages == 1
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests du PO token en mémoire (po_token.py): relecture uniquement quand le
+fichier change, et un fichier invalide ne remplace jamais un token valide
+"""
+
+import json
+import os
+
+import pytest
+
+from po_token import PoTokenStore
+from shared_state import SharedState
+
+
+def write_token(path, visitor_data, po_token, mtime=None):
+    path.write_text(json.dumps({'visitorData': visitor_data, 'poToken': po_token}), encoding='utf-8')
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_token_is_read_once_and_reloaded_on_change(tmp_path):
+    path = tmp_path / 'token_youtube.json'
+    write_token(path, 'visitor-1', 'token-1', mtime=1_000_000)
+    store = PoTokenStore(str(path), check_interval=0)
+
+    assert store.get() == ('visitor-1', 'token-1')
+    assert store.get() == ('visitor-1', 'token-1')
+    assert store.status()['reloads'] == 1
+
+    write_token(path, 'visitor-2', 'token-2', mtime=1_000_010)
+    assert store.get() == ('visitor-2', 'token-2')
+    assert store.status()['reloads'] == 2
+
+
+def test_file_is_not_checked_before_interval(tmp_path):
+    path = tmp_path / 'token_youtube.json'
+    write_token(path, 'visitor-1', 'token-1', mtime=1_000_000)
+    store = PoTokenStore(str(path), check_interval=60)
+    store.get()
+
+    write_token(path, 'visitor-2', 'token-2', mtime=1_000_010)
+    assert store.get() == ('visitor-1', 'token-1')
+    # Rechargement explicite (POST /token/reload)
+    assert store.reload()[0]
+    assert store.get() == ('visitor-2', 'token-2')
+
+
+def test_invalid_file_keeps_current_token(tmp_path):
+    path = tmp_path / 'token_youtube.json'
+    write_token(path, 'visitor-1', 'token-1', mtime=1_000_000)
+    store = PoTokenStore(str(path), check_interval=0)
+    store.get()
+
+    path.write_text('{"visitorData": "visitor-2"', encoding='utf-8')
+    os.utime(path, (1_000_010, 1_000_010))
+    assert store.get() == ('visitor-1', 'token-1')
+    assert store.status()['last_error']
+
+    write_token(path, 'visitor-2', None, mtime=1_000_020)
+    success, message = store.reload()
+    assert not success and 'poToken' in message
+    assert store.get() == ('visitor-1', 'token-1')
+
+
+def test_missing_file_raises(tmp_path):
+    store = PoTokenStore(str(tmp_path / 'token_youtube.json'), check_interval=0)
+
+    with pytest.raises(RuntimeError, match='renew_token.sh'):
+        store.get()
+    assert store.reload()[0] is False
+    assert not store.status()['loaded']
+
+
+def test_explicit_reload_reaches_other_workers(tmp_path):
+    path = tmp_path / 'token_youtube.json'
+    write_token(path, 'visitor-1', 'token-1', mtime=1_000_000)
+    shared_path = str(tmp_path / 'shared_state.db')
+    first = PoTokenStore(str(path), check_interval=60, shared=SharedState(shared_path))
+    second = PoTokenStore(str(path), check_interval=60, shared=SharedState(shared_path))
+    assert second.get() == ('visitor-1', 'token-1')
+
+    write_token(path, 'visitor-2', 'token-2', mtime=1_000_010)
+    assert first.reload()[0]
+
+    # Sans attendre la vérification périodique (60 s) du second worker
+    assert second.get() == ('visitor-2', 'token-2')
+    assert second.status()['reloads'] == 2
+    assert second.get() == ('visitor-2', 'token-2')
+    assert second.status()['reloads'] == 2
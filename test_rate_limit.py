@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests du limiteur de débit sortant (rate_limit.py): seau à jetons AIMD,
+refus d'attente au-delà du délai maximal, et absence d'effet de ce refus
+sur les circuit breakers des clients YouTube
+"""
+
+import pytest
+
+import main
+from client_strategy import BREAKER_CLOSED, ClientSelector
+from rate_limit import RateGovernor, RateLimitTimeout, TokenBucket, bucket_for_request
+
+
+def test_burst_is_served_without_waiting():
+    bucket = TokenBucket('test', max_rate=10.0, burst=3, min_rate=1.0)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Le 4e appel attend son tour au débit courant
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+
+
+def test_throttled_response_halves_rate_once_per_second():
+    bucket = TokenBucket('test', max_rate=8.0, burst=8, min_rate=1.0)
+
+    bucket.on_throttled()
+    bucket.on_throttled()
+    assert bucket.rate == 4.0
+    assert bucket.throttled == 2
+    assert bucket.tokens <= 0
+
+    bucket.last_decrease -= 1.0
+    for _ in range(5):
+        bucket.on_throttled()
+        bucket.last_decrease -= 1.0
+    assert bucket.rate == 1.0
+
+
+def test_success_recovers_rate_additively():
+    bucket = TokenBucket('test', max_rate=10.0, burst=10, min_rate=1.0, recovery_step=0.1)
+    bucket.on_throttled()
+
+    bucket.on_success()
+    assert bucket.rate == pytest.approx(6.0)
+    for _ in range(10):
+        bucket.on_success()
+    assert bucket.rate == 10.0
+
+
+def test_wait_beyond_max_wait_raises_without_taking_token():
+    bucket = TokenBucket('test', max_rate=1.0, burst=1, min_rate=0.1)
+    bucket.reserve()
+
+    with pytest.raises(RateLimitTimeout):
+        bucket.reserve(max_wait=0.5)
+    assert bucket.acquired == 1
+
+
+def test_governor_uses_one_bucket_per_destination():
+    governor = RateGovernor({'WEB': 2.0, 'default': 5.0})
+
+    assert governor.acquire('WEB') is governor.bucket('WEB')
+    assert governor.bucket('ANDROID').max_rate == 5.0
+    assert RateGovernor({}, enabled=False).acquire('WEB') is None
+
+
+def test_bucket_for_request():
+    assert bucket_for_request('https://rr1---sn-abc.googlevideo.com/videoplayback') == 'googlevideo'
+    data = {'context': {'client': {'clientName': 'ANDROID'}}}
+    assert bucket_for_request('https://www.youtube.com/youtubei/v1/player', data=data) == 'ANDROID'
+    headers = {'X-Youtube-Client-Name': '1'}
+    assert bucket_for_request('https://www.youtube.com/watch', headers, client_names={'1': 'WEB'}) == 'WEB'
+
+
+def test_local_rate_limit_timeout_is_not_a_client_failure(monkeypatch):
+    selector = ClientSelector(['WEB', 'ANDROID'], failure_threshold=1, cooldown=60)
+    monkeypatch.setattr(main, 'client_selector', selector)
+
+    def build_youtube(url, client):
+        raise RateLimitTimeout("Limite de débit WEB: attente de 90.0s refusée")
+
+    monkeypatch.setattr(main, 'build_youtube', build_youtube)
+
+    with pytest.raises(RateLimitTimeout):
+        main.create_youtube_with_headers("https://www.youtube.com/watch?v=ratelimit01")
+    snapshot = selector.snapshot()['clients']['WEB']
+    assert snapshot['state'] == BREAKER_CLOSED
+    assert snapshot['samples'] == 0
+    assert selector.ordering()[0] == 'WEB'
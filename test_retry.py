@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests du moteur de relances (retry.py): Retry-After, budget global,
+erreurs non relançables et mode non bloquant
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from urllib.error import HTTPError
+
+import pytest
+
+from retry import (
+    RetryBudget, RetryLater, RetryPolicy, RetryState, backoff_delay,
+    call_with_retry, call_with_retry_async, retry_after_seconds
+)
+
+
+def http_error(code, retry_after=None):
+    headers = {'Retry-After': retry_after} if retry_after is not None else {}
+    return HTTPError('https://www.youtube.com/youtubei/v1/player', code, 'error', headers, None)
+
+
+def policy(max_attempts=3, max_retry_after=30.0, budget=None, non_retryable=()):
+    return RetryPolicy(max_attempts, 0.0, 0.0, 10.0, max_retry_after, budget=budget, non_retryable=non_retryable)
+
+
+def failing(*errors, result='ok'):
+    errors = list(errors)
+    calls = []
+
+    def func():
+        calls.append(None)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    func.calls = calls
+    return func
+
+
+def test_retry_after_seconds_and_http_date():
+    assert retry_after_seconds(http_error(429, '7')) == 7.0
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 <= retry_after_seconds(http_error(503, later)) <= 60
+    assert retry_after_seconds(http_error(429)) is None
+    assert retry_after_seconds(ValueError('boom')) is None
+
+
+def test_backoff_doubles_and_is_capped():
+    assert backoff_delay(1, 1.0, 1.0, 10.0) == 1.0
+    assert backoff_delay(3, 1.0, 1.0, 10.0) == 4.0
+    assert backoff_delay(10, 1.0, 1.0, 10.0) == 10.0
+
+
+def test_call_with_retry_honours_retry_after(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr('retry.time.sleep', sleeps.append)
+    func = failing(http_error(429, '3'))
+    retried = []
+
+    result = call_with_retry('metadata', func, policy(), RetryState(), on_retry=lambda *args: retried.append(args))
+
+    assert result == 'ok'
+    assert sleeps == [3.0]
+    assert retried[0][:3] == ('metadata', 1, 3.0)
+
+
+def test_retry_after_beyond_maximum_gives_up():
+    state = RetryState()
+    func = failing(http_error(429, '120'))
+
+    with pytest.raises(HTTPError):
+        call_with_retry('metadata', func, policy(max_retry_after=30.0), state)
+    assert len(func.calls) == 1
+    assert state.attempts == {'metadata': 1}
+
+
+def test_non_retryable_and_max_attempts(monkeypatch):
+    monkeypatch.setattr('retry.time.sleep', lambda delay: None)
+    func = failing(KeyError('private'))
+    with pytest.raises(KeyError):
+        call_with_retry('metadata', func, policy(non_retryable=(KeyError,)), RetryState())
+    assert len(func.calls) == 1
+
+    func = failing(*[http_error(500)] * 5)
+    with pytest.raises(HTTPError):
+        call_with_retry('metadata', func, policy(max_attempts=3), RetryState())
+    assert len(func.calls) == 3
+
+
+def test_non_blocking_mode_raises_retry_later():
+    state = RetryState()
+    func = failing(http_error(503, '2'))
+
+    with pytest.raises(RetryLater) as raised:
+        call_with_retry('download', func, policy(), state, blocking=False)
+    assert raised.value.delay == 2.0
+    assert raised.value.phase == 'download'
+
+    # La replanification reprend avec le même état: une seule opération comptée
+    assert call_with_retry('download', func, policy(), state, blocking=False) == 'ok'
+    assert state.total() == 1
+
+
+def test_budget_limits_retries_to_ratio_of_operations():
+    budget = RetryBudget(ratio=0.5, min_per_second=0.0, window=10.0)
+    for _ in range(4):
+        budget.deposit()
+
+    assert [budget.try_withdraw() for _ in range(3)] == [True, True, False]
+    assert budget.stats()['denied'] == 1
+
+
+def test_exhausted_budget_stops_retries(monkeypatch):
+    monkeypatch.setattr('retry.time.sleep', lambda delay: None)
+    budget = RetryBudget(ratio=0.0, min_per_second=0.0)
+    func = failing(http_error(500))
+
+    with pytest.raises(HTTPError):
+        call_with_retry('metadata', func, policy(budget=budget), RetryState())
+    assert len(func.calls) == 1
+    assert budget.stats()['requests'] == 1
+
+
+def test_async_retry_honours_retry_after(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr('asyncio.sleep', fake_sleep)
+    func = failing(http_error(429, '4'))
+
+    async def coroutine():
+        return func()
+
+    assert asyncio.run(call_with_retry_async('metadata', coroutine, policy(), RetryState())) == 'ok'
+    assert sleeps == [4.0]
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests de la déduplication des appels concurrents (singleflight.py): un seul
+appel par clé, résultat et erreur partagés, bail entre processus
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from shared_state import SharedState
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+def blocking_call(result='info'):
+    """Fonction qui attend `release` avant de retourner, compte ses appels"""
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(None)
+        assert release.wait(5)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return func, release, calls
+
+
+def wait_for_followers(flight, count):
+    deadline = time.monotonic() + 5
+    while flight.stats()['waiting_followers'] < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight('test')
+    func, release, calls = blocking_call()
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(flight.do, 'video', func) for _ in range(5)]
+        wait_for_followers(flight, 4)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert all(result == 'info' for result, _ in results)
+    assert flight.stats() == {
+        'in_flight': 0, 'waiting_followers': 0, 'leaders': 1, 'coalesced': 4, 'coalesced_remote': 0
+    }
+
+
+def test_leader_error_is_raised_to_followers():
+    flight = SingleFlight('test')
+    func, release, calls = blocking_call(ValueError('vidéo privée'))
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(flight.do, 'video', func) for _ in range(3)]
+        wait_for_followers(flight, 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+
+    assert len(calls) == 1
+    # Après l'échec, un nouvel appel réessaie
+    assert flight.do('video', lambda: 'info') == ('info', False)
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight('test')
+
+    assert flight.do('a', lambda: 1) == (1, False)
+    assert flight.do('b', lambda: 2) == (2, False)
+    assert flight.stats()['leaders'] == 2
+
+
+def test_shared_lease_waits_for_other_worker_then_rechecks(tmp_path):
+    path = str(tmp_path / 'shared_state.db')
+    other_worker = SharedState(path)
+    flight = SingleFlight('test', shared=SharedState(path), poll_interval=0.01)
+    assert other_worker.try_lease('test', repr('video'))
+    cache = {}
+    calls = []
+
+    def finish_other_worker():
+        cache['video'] = 'info from other worker'
+        other_worker.release_lease('test', repr('video'))
+
+    timer = threading.Timer(0.05, finish_other_worker)
+    timer.start()
+    result = flight.do('video', lambda: calls.append(None), recheck=lambda: cache.get('video'))
+    timer.join()
+
+    assert result == ('info from other worker', True)
+    assert calls == []
+    assert flight.stats()['coalesced_remote'] == 1
+
+
+def test_async_calls_share_one_task():
+    flight = AsyncSingleFlight('test')
+    calls = []
+
+    async def fetch():
+        calls.append(None)
+        await asyncio.sleep(0.01)
+        return 'info'
+
+    async def main():
+        return await asyncio.gather(*(flight.do('video', fetch) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flight.stats()['in_flight'] == 0
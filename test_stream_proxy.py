@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests du proxy /stream (main.py): analyse de l'en-tête Range et relais des
+octets googlevideo depuis le faux serveur local, sans fichier intermédiaire
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from fake_youtube import FakeGoogleVideoServer, media_bytes
+
+SIZE = 300 * 1024
+VIDEO_ID = 'stream00001'
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('', None),
+    ('bytes=0-99', (0, 99)),
+    ('bytes=100-', (100, SIZE - 1)),
+    ('bytes=-500', (SIZE - 500, SIZE - 1)),
+    ('bytes=-999999999', (0, SIZE - 1)),
+    ('bytes=10-999999999', (10, SIZE - 1)),
+    # Plages multiples ou syntaxe inconnue: fichier complet
+    ('bytes=0-1,5-6', None),
+    ('bytes=-', None),
+    ('items=0-10', None),
+])
+def test_parse_range_header(header, expected):
+    assert main.parse_range_header(header, SIZE) == expected
+
+
+@pytest.mark.parametrize('header', ['bytes=300000000-', f'bytes={SIZE}-', 'bytes=20-10'])
+def test_parse_range_header_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        main.parse_range_header(header, SIZE)
+
+
+@pytest.fixture
+def googlevideo(monkeypatch):
+    with FakeGoogleVideoServer(SIZE) as server:
+        stream = SimpleNamespace(url=server.url, filesize=SIZE, is_sabr=False, mime_type='video/mp4')
+        monkeypatch.setattr(main, 'select_stream', lambda url, video_id, resolution: (None, stream, '720p'))
+        yield server
+
+
+def test_stream_full_content(googlevideo):
+    response = main.app.test_client().get(f'/stream/{VIDEO_ID}/720p')
+
+    assert response.status_code == 200
+    assert response.headers['Content-Length'] == str(SIZE)
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.data == media_bytes(SIZE)
+
+
+def test_stream_forwards_range(googlevideo):
+    response = main.app.test_client().get(f'/stream/{VIDEO_ID}/720p', headers={'Range': 'bytes=1000-70999'})
+
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f"bytes 1000-70999/{SIZE}"
+    assert response.data == media_bytes(SIZE)[1000:71000]
+
+
+def test_stream_unsatisfiable_range(googlevideo):
+    response = main.app.test_client().get(f'/stream/{VIDEO_ID}/720p', headers={'Range': f'bytes={SIZE}-'})
+
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == f"bytes */{SIZE}"
+    assert googlevideo.stats()['requests'] == 0
+
+
+def test_stream_rejects_invalid_video_id():
+    assert main.app.test_client().get('/stream/not-an-id/720p').status_code == 400
@@ -0,0 +1,24 @@
+"""
+Point d'entrée WSGI de production (pré-fork, plusieurs processus workers)
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Chaque worker importe l'application après le fork: connexions SQLite,
+threads de jobs et sessions HTTP lui sont propres, l'état qui ne doit pas
+être multiplié par le nombre de workers passe par SHARED_STATE_DB.
+"""
+
+import os
+
+import startup
+from config import Config
+from main import app, job_manager, start_background_tasks
+
+if not Config.GOOGLE_DRIVE_ENABLED:
+    os.makedirs(Config.DOWNLOAD_FOLDER, exist_ok=True)
+
+# Signale ce worker comme propriétaire de ses jobs et reprend ceux des workers arrêtés
+job_manager.start()
+startup.report.ready(f"Worker {os.getpid()}", Config.IMPORT_TIME_BUDGET_MS)
+# Reconstruction de l'index (base neuve) et préchargement de pytubefix, en arrière-plan
+start_background_tasks()